@@ -0,0 +1,79 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""
+Micro-benchmark of the static files URLs built by the templates.
+
+It compares ``url_for('static', filename=sf(...))`` with the secured names
+computed on demand (the first call of every worker runs the PBKDF2 of every
+file), against the lookups in the manifest written by ``AssetsCLI``.
+
+Usage::
+
+    $ python bench/bench_assets.py [-n NUMBER]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import url_for  # noqa: E402
+
+from webapp.assets import Assets  # noqa: E402
+from webapp.webapp import core  # noqa: E402
+
+FILES = ['home.bundle.js', 'multimedia/images/avtar.png',
+         'multimedia/images/favicon.ico', 'locales/home/en.json']
+
+
+def request_computed(assets):
+    for filename in FILES:
+        url_for('static', filename=assets.secure_filename(filename))
+
+
+def request_manifest(assets):
+    for filename in FILES:
+        assets.urls[filename]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    computed = Assets('sha256', salt=os.urandom(2048))
+    manifest = Assets('sha256', salt=os.urandom(2048))
+    manifest.urls = {k: v['url']
+                     for k, v in manifest.build_manifest(FILES).items()}
+
+    cold = timeit.timeit(lambda: Assets('sha256', salt=b'salt')
+                         .build_manifest(FILES), number=100) / 100
+    print(f'{"cold":>10}: {cold * 1e6:8.2f} us (first request per worker)')
+
+    results = {}
+    with core.test_request_context('/'):
+        for name, func, obj in (('computed', request_computed, computed),
+                                ('manifest', request_manifest, manifest)):
+            timer = timeit.Timer(lambda: func(obj))  # noqa: B023
+            best = min(timer.repeat(repeat=5, number=args.number))
+            results[name] = best / args.number * 1e6
+            print(f'{name:>10}: {results[name]:8.2f} us/request')
+
+    speedup = results['computed'] / results['manifest']
+    print(f'{"speedup":>10}: {speedup:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""
+Micro-benchmark of the negotiation of the locale of a request.
+
+It compares the memoized ``get_locale`` against the previous approach, in
+which every call parsed ``Accept-Language`` and created a new ``Locale``.
+The requests follow a distribution of headers like the one seen in the
+access logs: a few browser defaults receive most of the traffic, and there
+is a long tail of unique headers. Pass ``--headers`` to replay a file with
+one header per line instead.
+
+Usage::
+
+    $ python bench/bench_locales.py [-n NUMBER] [--headers FILENAME]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from unittest import mock
+
+from babel import Locale
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.wrappers import Request  # noqa: E402
+
+from webapp import locales  # noqa: E402
+
+AVAILABLE_LANGUAGES = 'es,en,ja'
+DEFAULT_LANGUAGE = 'es'
+HEADERS = [
+    (40, 'es-ES,es;q=0.9,en;q=0.8'),
+    (25, 'en-US,en;q=0.9'),
+    (10, 'es-419,es;q=0.9'),
+    (8, 'en-GB,en-US;q=0.9,en;q=0.8'),
+    (5, 'ja,en-US;q=0.9,en;q=0.8'),
+    (4, ''),
+    (3, 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7'),
+    (2, 'de-DE,de;q=0.9'),
+]
+
+
+def legacy_get_locale(request) -> Locale:
+    # The previous version raised UnknownLocaleError when no language
+    # matched (``best_match`` returns None), the default is used instead.
+    a_lang = [lang.language for lang in locales.languages]
+    for src in [request.args, request.cookies]:
+        locale = src.get('locale', None)
+        if locale is None or locale not in a_lang:
+            continue
+        return Locale(locale)
+
+    if request.accept_languages is None or len(request.accept_languages) == 0:
+        return Locale(DEFAULT_LANGUAGE)
+    return Locale(request.accept_languages.best_match(a_lang) or
+                  DEFAULT_LANGUAGE)
+
+
+def get_headers(number: int, filename: str = None) -> list:
+    if filename is not None:
+        with open(filename) as fp:
+            return fp.read().splitlines()
+
+    rand = random.Random(0)
+    weights, values = zip(*HEADERS)
+    headers = rand.choices(values, weights=weights, k=number)
+    # long tail: 3% of the requests have a unique header.
+    for i in rand.sample(range(number), k=number * 3 // 100):
+        headers[i] = 'es-%d,es;q=0.%d' % (i, rand.randint(1, 9))
+    return headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=20000)
+    parser.add_argument('--headers', metavar='FILENAME')
+    args = parser.parse_args()
+
+    headers = get_headers(args.number, args.headers)
+    environs = [{'HTTP_ACCEPT_LANGUAGE': h, 'QUERY_STRING': ''}
+                for h in headers]
+    pool = mock.MagicMock()
+    pool.locales.language = DEFAULT_LANGUAGE
+    locales.settings = pool
+    locales.load_available_languages(AVAILABLE_LANGUAGES)
+
+    def run_legacy():
+        for environ in environs:
+            legacy_get_locale(Request(environ))
+
+    def run_memoized():
+        for environ in environs:
+            locales.request = Request(environ)
+            locales.get_locale()
+
+    def run_baseline():
+        for environ in environs:
+            locales.request = Request(environ)
+
+    results = {}
+    for name, func in (('baseline', run_baseline), ('legacy', run_legacy),
+                       ('memoized', run_memoized)):
+        locales.negotiate_locale.cache_clear()
+        best = min(timeit.repeat(func, repeat=3, number=1))
+        results[name] = best / len(environs) * 1e6
+        print(f'{name:>10}: {results[name]:8.2f} us/request')
+
+    legacy = results['legacy'] - results['baseline']
+    memoized = results['memoized'] - results['baseline']
+    print(f'{"speedup":>10}: {legacy / memoized:8.1f}x '
+          f'(without the baseline)')
+
+    locales.negotiate_locale.cache_clear()
+    run_memoized()
+    info = locales.negotiate_locale.cache_info()
+    print(f'{"hit rate":>10}: {info.hits / len(environs):8.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""
+Micro-benchmark of the per-request overhead of reading settings.
+
+It compares the compiled snapshot used by ``settings_pool`` against the
+previous approach, in which every read was redirected to ``ConfigParser.get``
+(with ``ExtendedInterpolation``) followed by ``ast.literal_eval``.
+
+Usage::
+
+    $ python bench/bench_settings.py [-n NUMBER]
+"""
+import argparse
+import ast
+import os
+import sys
+import timeit
+from configparser import ConfigParser
+from configparser import ExtendedInterpolation
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from webapp.settings import ParserProxy  # noqa: E402
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config.d')
+
+
+class LegacySectionProxy:
+    def __init__(self, parser, section):
+        object.__setattr__(self, '_cp', parser)
+        object.__setattr__(self, '_section', section)
+
+    def __getattr__(self, option):
+        value = self._cp.get(self._section, option)
+        try:
+            return ast.literal_eval(value)
+        except ValueError:
+            return value
+
+
+class LegacyParserProxy:
+    def __init__(self, parser):
+        self._cp = parser
+        self._sections = {}
+
+    def __getattr__(self, section):
+        if section in self._sections:
+            return self._sections[section]
+        self._sections[section] = LegacySectionProxy(self._cp, section)
+        return self._sections[section]
+
+
+def request(settings):
+    """
+    Settings read by a request to the home page: ``access_token_needed``,
+    ``sf()`` (once per asset in the templates) and the watson assistant.
+    """
+    settings.auth.security_level
+    for _ in range(4):
+        settings.server.debug_mode
+    settings.locales.language
+    settings.assistant.integration_id
+    settings.assistant.region
+    settings.assistant.service_instance_id
+    settings.assistant.open_chat
+    settings.assistant.app_domain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    cfg = ConfigParser(interpolation=ExtendedInterpolation())
+    cfg.read(os.path.join(CONFIG_DIR, name)
+             for name in sorted(os.listdir(CONFIG_DIR)))
+
+    results = {}
+    for name, pool in (('legacy', LegacyParserProxy(cfg)),
+                       ('compiled', ParserProxy(cfg))):
+        timer = timeit.Timer(lambda: request(pool))  # noqa: B023
+        best = min(timer.repeat(repeat=5, number=args.number))
+        results[name] = best / args.number * 1e6
+        print(f'{name:>10}: {results[name]:8.2f} us/request')
+
+    print(f'{"speedup":>10}: {results["legacy"] / results["compiled"]:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""
+Benchmark of the streamed render of the home page.
+
+The home page is requested in every language, with the whole document
+rendered in memory before it is sent (buffered), and sent while it is
+rendered (streamed, see ``render_page``). For every mode it reports the
+time to the first chunk (TTFB), the time to the last chunk, and the peak
+of the memory allocated during the request.
+
+Usage::
+
+    $ python bench/bench_streaming.py [-n NUMBER]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+import webapp.blueprint  # noqa: E402, F401
+from webapp import render  # noqa: E402
+from webapp.callbacks import MainCTX  # noqa: E402
+from webapp.locales import languages  # noqa: E402
+from webapp.locales import load_available_languages  # noqa: E402
+from webapp.locales import preload_translations  # noqa: E402
+from webapp.settings import load_dir  # noqa: E402
+from webapp.settings import settings_pool as settings  # noqa: E402
+from webapp.webapp import core  # noqa: E402
+
+
+def request(lang: str) -> tuple:
+    environ = EnvironBuilder('/', query_string={'locale': lang}).get_environ()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    body = core.wsgi_app(environ, lambda status, headers: None)
+    try:
+        for chunk in body:
+            if first is None:
+                first = time.perf_counter()
+            size += len(chunk)
+    finally:
+        getattr(body, 'close', lambda: None)()
+    return first - start, time.perf_counter() - start, size
+
+
+def measure(streamed: bool, number: int) -> dict:
+    ttfb = []
+    total = []
+    peak = 0
+    with mock.patch.object(render, 'is_streamed', return_value=streamed):
+        for lang in languages:
+            request(lang.language)  # compile the templates
+        for _ in range(number):
+            for lang in languages:
+                tracemalloc.start()
+                first, last, size = request(lang.language)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                ttfb.append(first)
+                total.append(last)
+    ttfb.sort()
+    total.sort()
+    return dict(ttfb=ttfb[len(ttfb) // 2], total=total[len(total) // 2],
+                peak=peak, size=size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=50)
+    args = parser.parse_args()
+
+    load_dir(os.path.join(os.path.dirname(__file__), '..', 'config.d'))
+    MainCTX.data = dict(len=len, G_ANALYTICS_ID='G-0')
+    load_available_languages(settings.locales.available_languages)
+    preload_translations()
+    core.config['SERVER_NAME'] = None
+
+    print(f'{"mode":>10}  {"ttfb":>10}  {"total":>10}  {"peak":>10}')
+    for name, streamed in (('buffered', False), ('streamed', True)):
+        result = measure(streamed, args.number)
+        print(f'{name:>10}  {result["ttfb"] * 1e3:7.2f} ms  '
+              f'{result["total"] * 1e3:7.2f} ms  '
+              f'{result["peak"] / 1024:7.1f} KB')
+    print(f'{"size":>10}: {result["size"] / 1024:.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
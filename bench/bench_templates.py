@@ -0,0 +1,71 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""
+Benchmark of the compilation of the templates in a new worker.
+
+Every run creates a new template environment (like a new gunicorn worker)
+and loads every template of the application, without a bytecode cache,
+and with a ``TemplateCache`` already written by a previous worker.
+
+Usage::
+
+    $ python bench/bench_templates.py [-n NUMBER]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from webapp.locales import TranslationFiller  # noqa: E402
+from webapp.webapp import core  # noqa: E402
+from webapp.webapp import TemplateCache  # noqa: E402
+
+
+def new_worker(bytecode_cache: TemplateCache = None) -> float:
+    env = core.create_jinja_environment()
+    env.add_extension(TranslationFiller)
+    env.bytecode_cache = bytecode_cache
+    start = time.perf_counter()
+    for name in env.list_templates():
+        env.get_template(name)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=20)
+    args = parser.parse_args()
+
+    names = core.create_jinja_environment().list_templates()
+    print(f'{"templates":>10}: {len(names)}')
+    with tempfile.TemporaryDirectory() as folder:
+        cache = TemplateCache(folder, salt='bench')
+        first = new_worker(cache)
+        results = {
+            'compile': min(new_worker() for _ in range(args.number)),
+            'bytecode': min(new_worker(cache) for _ in range(args.number)),
+        }
+
+    print(f'{"first":>10}: {first * 1e3:8.2f} ms (writes the cache)')
+    for name, elapsed in results.items():
+        print(f'{name:>10}: {elapsed * 1e3:8.2f} ms/worker')
+    speedup = results['compile'] / results['bytecode']
+    print(f'{"speedup":>10}: {speedup:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
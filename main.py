@@ -22,26 +22,78 @@ from webapp.blueprint import auth
 from webapp.blueprint import cv
 from webapp.callbacks import MainCTX
 from webapp.exceptions import CriticalError
+from webapp.locales import i18n
 from webapp.locales import load_available_languages
+from webapp.locales import LocalesWatcher
+from webapp.locales import preload_translations
+from webapp.locales import TranslationFiller
+from webapp.pagecache import page_cache
+from webapp.preload import preloads
+from webapp.settings import CachedEngine
+from webapp.settings import ConfigWatcher
+from webapp.settings import enable_instrumentation
 from webapp.settings import EnvironEngine
+from webapp.settings import get_file_engine
+from webapp.settings import get_guarded_engine
 from webapp.settings import get_secret
 from webapp.settings import get_vault_engine
 from webapp.settings import load_dir
+from webapp.settings import prefetch_secrets
 from webapp.settings import set_secret_engine
 from webapp.settings import settings_pool as settings
+from webapp.static import static_files
+from webapp.warmup import WarmUp
 from webapp.webapp import core
+from webapp.webapp import TemplateCache
+
+
+def warm_up():
+    tokens = auth.backend.security.tokens
+    token = None
+    if settings.auth.security_level >= 1:
+        token = tokens.create_access_token(resource='warm-up')
+    warm = WarmUp(core, token=token)
+    warm.add('qr', cv.backend.qr.get_qr_code,
+             'https://%s/' % settings.server.domain_name)
+    warm.run()
+    if token is not None:
+        payload = tokens.decode_jwt_token(token)
+        auth.backend.security.idp_d.blacklist_token(payload['jti'])
 
 
 def main(start: bool = False):
     load_dir('config.d/')
+    if settings.server.instrumentation:
+        enable_instrumentation()
+    if settings.server.watch_config:
+        watcher = ConfigWatcher('config.d/',
+                                interval=settings.server.watch_interval)
+        watcher.start()
+    guarded = None
     if settings.secret.engine == 'environ':
         engine = EnvironEngine(settings.environ.prefix)
     elif settings.secret.engine == 'vault':
-        engine = get_vault_engine()
+        guarded = engine = get_guarded_engine(get_vault_engine)
+    elif settings.secret.engine == 'file':
+        engine = get_file_engine()
     else:
         raise CriticalError('Unknown engine')
 
+    if settings.secret.cache_ttl:
+        engine = CachedEngine(engine,
+                              ttl=settings.secret.cache_ttl,
+                              ttls=settings.secret.cache_ttls)
+        engine.start()
     set_secret_engine(engine)
+    if isinstance(engine, CachedEngine):
+        # Without the cache, every secret would be read twice at startup.
+        secrets = ['ASSETS_SALT', 'G_ANALYTICS_ID', 'RECAPTCHA_PUBLIC_KEY',
+                   'RECAPTCHA_PRIVATE_KEY']
+        if settings.auth.security_level >= 1:
+            secrets.extend(['AUTH_DATABASE_URL', 'JWT_ENCODE_KEY',
+                            'JWT_DECODE_KEY', 'GITHUB_CID', 'GITHUB_CST',
+                            'LINKEDIN_CID', 'LINKEDIN_CST'])
+        prefetch_secrets(secrets)
     load_available_languages(settings.locales.available_languages)
 
     if settings.auth.security_level >= 1:
@@ -62,6 +114,24 @@ def main(start: bool = False):
 
     MainCTX.init()
     assets.update_salt(get_secret('ASSETS_SALT', default=os.urandom(2048)))
+    if not settings.server.debug_mode:
+        assets.load_manifest(settings.server.assets_manifest)
+        static_files.cache.max_size = settings.server.static_cache_size
+        static_files.index(assets.names.values())
+        preloads.clear()
+        page_cache.max_entries = settings.server.page_cache_size
+        page_cache.ttl = settings.server.page_cache_ttl
+    preload_translations()
+    if settings.locales.server_render:
+        core.jinja_env.add_extension(TranslationFiller)
+    if settings.server.template_cache:
+        core.jinja_env.bytecode_cache = TemplateCache(
+            settings.server.template_cache_dir or None,
+            salt=TemplateCache.get_salt(core.jinja_env.extensions))
+    if settings.locales.revalidate_interval:
+        locales_watcher = LocalesWatcher(
+            i18n, interval=settings.locales.revalidate_interval)
+        locales_watcher.start()
     cv.backend.qr.add_logo(os.path.join(core.static_folder,
                                         sf('multimedia/images/avtar.png')))
     core.config.update(
@@ -76,6 +146,10 @@ def main(start: bool = False):
         SESSION_COOKIE_SECURE=True,
         SESSION_COOKIE_PATH='/'
     )
+    if guarded is not None:
+        guarded.save()
+    if settings.server.warm_up:
+        warm_up()
     if start:
         core.run(debug=settings.server.debug_mode)
     else:
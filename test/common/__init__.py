@@ -1,3 +1,10 @@
 from .test_assets import *  # noqa: F401, F403
 from .test_locales import *  # noqa: F401, F403
+from .test_pagecache import *  # noqa: F401, F403
+from .test_preload import *  # noqa: F401, F403
+from .test_render import *  # noqa: F401, F403
 from .test_settings import *  # noqa: F401, F403
+from .test_static import *  # noqa: F401, F403
+from .test_stats import *  # noqa: F401, F403
+from .test_warmup import *  # noqa: F401, F403
+from .test_webapp import *  # noqa: F401, F403
@@ -0,0 +1,105 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import collections
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+
+class FakeVaultHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code: int, data: dict = None):
+        body = json.dumps(data or {}).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        vault = self.server.vault
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        vault.calls[self.path] += 1
+
+        if self.path == '/v1/auth/approle/login':
+            vault.token = uuid.uuid4().hex
+            return self.reply(200, vault.auth())
+
+        if self.path == '/v1/auth/token/renew-self':
+            if self.headers.get('X-Vault-Token') != vault.token:
+                return self.reply(403, {'errors': ['permission denied']})
+            if not vault.renewable:
+                return self.reply(400, {'errors': ['not renewable']})
+            return self.reply(200, vault.auth())
+        self.reply(404, {'errors': []})
+
+    def do_GET(self):
+        vault = self.server.vault
+        vault.calls[self.path] += 1
+        if self.headers.get('X-Vault-Token') != vault.token:
+            return self.reply(403, {'errors': ['permission denied']})
+
+        prefix = '/v1/%s/data/' % vault.mount_point
+        path = self.path.split('?')[0][len(prefix):]
+        if not self.path.startswith(prefix) or path not in vault.data:
+            return self.reply(404, {'errors': []})
+        self.reply(200, {'data': {'data': vault.data[path], 'metadata': {}}})
+
+
+class FakeVault:
+    """
+    Minimal HashiCorp Vault HTTP server that implements the AppRole login,
+    token renewal and KV version 2 reads.
+
+    Example usage::
+
+        >>> vault = FakeVault({'app/path': {'key': 'value'}})
+        >>> vault.start()
+        >>> client = hvac.Client(url=vault.url)
+        >>> vault.stop()
+    """
+
+    def __init__(self, data: dict, mount_point: str = 'secret',
+                 lease_duration: int = 60):
+        self.data = data
+        self.mount_point = mount_point
+        self.lease_duration = lease_duration
+        self.renewable = True
+        self.token = None
+        self.calls = collections.Counter()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeVaultHandler)
+        self.server.vault = self
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        return 'http://%s:%s' % self.server.server_address
+
+    def auth(self):
+        return {'auth': {'client_token': self.token,
+                         'lease_duration': self.lease_duration,
+                         'renewable': self.renewable}}
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -11,11 +11,19 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import argparse
+import json
+import os
 import re
+import tempfile
 import unittest
 from unittest import mock
 
+from webapp import assets as assets_module
 from webapp.assets import Assets
+from webapp.assets import AssetsCLI
+from webapp.assets import sf
+from webapp.assets import static_url
 from webapp.webapp import core
 
 
@@ -60,4 +68,152 @@ class TestAssets(unittest.TestCase):
         assert Assets.format(basename='a', hashsum='b', ext='.c') == 'a.b.c'
 
 
-__all__ = ['TestAssets']
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'manifest.json')
+        self.assets = Assets('sha256', salt=b'salt')
+        self.url = core.static_url_path + '/'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_manifest(self):
+        m = self.assets.build_manifest(['home.bundle.js', 'img/a.png'])
+        name = self.assets.secure_filename('img/a.png')
+        self.assertDictEqual(m['img/a.png'],
+                             {'name': name, 'url': self.url + name})
+
+    def test_save_manifest_merge(self):
+        Assets.save_manifest(self.path, self.assets.build_manifest(['a.js']))
+        Assets.save_manifest(self.path, self.assets.build_manifest(['b.js']))
+        with open(self.path) as fp:
+            self.assertSetEqual(set(json.load(fp)), {'a.js', 'b.js'})
+
+    def test_load_manifest(self):
+        self.assertFalse(self.assets.load_manifest(self.path))
+        Assets.save_manifest(self.path, self.assets.build_manifest(['a.js']))
+        self.assertTrue(self.assets.load_manifest(self.path))
+        name = self.assets.secure_filename('a.js')
+        self.assertDictEqual(self.assets.names, {'a.js': name})
+        self.assertDictEqual(self.assets.urls, {'a.js': self.url + name})
+        version = self.assets.version
+        self.assertEqual(len(version), 16)
+        Assets.save_manifest(self.path, self.assets.build_manifest(['b.js']))
+        self.assets.load_manifest(self.path)
+        self.assertNotEqual(self.assets.version, version)
+
+    def test_sf_manifest(self):
+        self.assets.names = {'a.js': 'a.manifest.js'}
+        self.assets.urls = {'a.js': '/dist/a.manifest.js'}
+        pool = mock.MagicMock()
+        pool.server.debug_mode = False
+        with mock.patch.object(assets_module, 'assets', new=self.assets), \
+                mock.patch.object(assets_module, 'settings_pool', new=pool), \
+                mock.patch.object(Assets, 'get_file_hash') as get_file_hash:
+            self.assertEqual(sf('a.js'), 'a.manifest.js')
+            self.assertEqual(static_url('a.js'), '/dist/a.manifest.js')
+            get_file_hash.assert_not_called()
+
+
+class TestAssetsCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, 'dist')
+        self.files = ['home.bundle.js', 'locales/home/en.json']
+        self.write_files()
+        self.list = os.path.join(self.tmp.name, 'files.txt')
+        with open(self.list, 'w') as fp:
+            fp.write('\n'.join(self.files))
+        self.manifest = os.path.join(self.tmp.name, 'manifest.json')
+        self.state = os.path.join(self.tmp.name, 'state.json')
+
+        self.assets = Assets('sha256', salt=b'salt')
+        self.assets.STATIC_FOLDER = self.folder
+        patcher = mock.patch.object(assets_module, 'assets', new=self.assets)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cli = AssetsCLI(argparse.ArgumentParser().add_subparsers())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_files(self, content='content'):
+        for name in self.files:
+            path = os.path.join(self.folder, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as fp:
+                fp.write('%s of %s' % (content, name))
+
+    def secure(self, **kwargs):
+        with mock.patch('sys.stderr'):
+            self.cli.secure_by_list(self.list, self.manifest, self.state,
+                                    simulate=False, **kwargs)
+        with open(self.state) as fp:
+            return json.load(fp)
+
+    def test_secure(self):
+        state = self.secure(jobs=2)
+        for name in self.files:
+            secured = self.assets.secure_filename(name)
+            self.assertFalse(os.path.exists(os.path.join(self.folder, name)))
+            with open(os.path.join(self.folder, secured)) as fp:
+                self.assertEqual(fp.read(), 'content of %s' % name)
+            self.assertEqual(state['files'][name]['name'], secured)
+        self.assertFalse([n for n in os.listdir(self.folder)
+                          if n.startswith('.staging')])
+        self.assertTrue(self.assets.load_manifest(self.manifest))
+        self.assertSetEqual(set(self.assets.names), set(self.files))
+
+    def test_secure_incremental(self):
+        self.secure(jobs=1)
+        self.write_files()
+        with mock.patch.object(Assets, 'get_file_hash') as get_file_hash, \
+                mock.patch.object(AssetsCLI, 'swap',
+                                  wraps=AssetsCLI.swap) as swap:
+            self.secure(jobs=1)
+            get_file_hash.assert_not_called()
+            swap.assert_called_once_with({}, self.files)
+        for name in self.files:
+            self.assertFalse(os.path.exists(os.path.join(self.folder, name)))
+
+        self.write_files('changed')
+        state = self.secure(jobs=1)
+        secured = os.path.join(self.folder, state['files']['home.bundle.js']
+                               ['name'])
+        with open(secured) as fp:
+            self.assertEqual(fp.read(), 'changed of home.bundle.js')
+
+    def test_secure_stale_variants(self):
+        state = self.secure(jobs=1)
+        secured = os.path.join(self.folder, state['files']['home.bundle.js']
+                               ['name'])
+        for ext in Assets.ENCODINGS.values():
+            with open(secured + ext, 'wb') as fp:
+                fp.write(b'old')
+
+        self.write_files()
+        self.secure(jobs=1)
+        for ext in Assets.ENCODINGS.values():
+            self.assertTrue(os.path.exists(secured + ext))
+
+        self.write_files('changed')
+        self.secure(jobs=1)
+        for ext in Assets.ENCODINGS.values():
+            self.assertFalse(os.path.exists(secured + ext))
+
+    def test_secure_already_secured(self):
+        self.secure(jobs=1)
+        state = self.secure(jobs=1)
+        self.assertSetEqual(set(state['files']), set(self.files))
+
+    def test_secure_salt_changed(self):
+        before = self.secure(jobs=1)
+        self.write_files()
+        self.assets.update_salt(b'other')
+        after = self.secure(jobs=1)
+        self.assertNotEqual(before['salt'], after['salt'])
+        self.assertNotEqual(before['files'], after['files'])
+
+
+__all__ = ['TestAssets', 'TestManifest', 'TestAssetsCLI']
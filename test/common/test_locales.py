@@ -11,42 +11,128 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import json
 import os
+import shutil
+import tempfile
 import unittest
 from unittest import mock
 
+from flask import g
+from jinja2 import DictLoader
+from jinja2 import Environment
+from werkzeug.exceptions import Forbidden
+from werkzeug.exceptions import NotFound
+
+from webapp import assets as assets_module
+from webapp import locales
+from webapp.blueprint.i18n.backend import api as i18n_api
 from webapp.locales import _default_lang_obj
+from webapp.locales import build_numbered_index
+from webapp.locales import extract_keys
+from webapp.locales import find_scripts
+from webapp.locales import find_templates
+from webapp.locales import key_expression
+from webapp.locales import key_pattern
+from webapp.locales import KeyTable
 from webapp.locales import Lang
 from webapp.locales import Locales
+from webapp.locales import LocalesCLI
+from webapp.locales import LocalesWatcher
+from webapp.locales import merge_fallbacks
+from webapp.locales import NumberedItem
+from webapp.locales import TranslationFiller
+from webapp.static import StaticFiles
+from webapp.stats import stats
+from webapp.webapp import core
 
 
 class TestLang(unittest.TestCase):
     def test_obj_create(self):
-        e = {}
+        e = {'option-name': 'value'}
         d = Lang(e)
-        assert d._data is e
+        self.assertTupleEqual(d._table.names, ('option-name',))
+        self.assertTupleEqual(d._values, ('value',))
+        with self.assertRaises(AttributeError):
+            d.__dict__
 
     def test_func_get_data(self):
-        e = {}
+        e = {'a': 1, 'b-c': 2}
         d = Lang(e)
-        assert d.get_data() is e
+        self.assertDictEqual(d.get_data(), e)
+        assert d.get_data() is not e
 
     def test_magic_getattr(self):
         v = 'a unique value'
-        m = mock.MagicMock()
-        m.get.return_value = v
-        d = Lang(m)
-        r = d.__getattr__('option_name')
-        m.get.assert_called_once_with('option-name')
-        assert r == v
+        d = Lang({'option-name': v})
+        self.assertEqual(d.option_name, v)
+        self.assertEqual(d.__getattr__('option-name'), v)
+        self.assertIsNone(d.undefined_option)
+        with self.assertRaises(AttributeError):
+            d.__undefined__
+
+    def test_magic_getitem(self):
+        d = Lang({'option-name': 'value'})
+        self.assertEqual(d['option-name'], 'value')
+        self.assertRaises(KeyError, d.__getitem__, 'undefined')
+        self.assertIn('option-name', d)
+        self.assertNotIn('undefined', d)
 
     def test_magic_setattr(self):
-        v = 'a unique value'
-        k = 'option-name'
-        m = mock.MagicMock()
-        d = Lang(m)
-        d.__setattr__(k, v)
-        m.__setitem__.assert_called_once_with(k, v)
+        d = Lang({'option-name': 'value'})
+        with self.assertRaises(AttributeError):
+            d.option_name = 'other'
+        with self.assertRaises(AttributeError):
+            del d.option_name
+        self.assertEqual(d.option_name, 'value')
+
+    def test_shared_table(self):
+        table = KeyTable(['a', 'b-c'])
+        es = Lang({'a': 'uno', 'b-c': 'dos'}, table)
+        ja = Lang({'a': 'ichi'}, table)
+        self.assertIs(es._table, ja._table)
+        self.assertEqual(ja.a, 'ichi')
+        self.assertIsNone(ja.b_c)
+        self.assertRaises(KeyError, ja.__getitem__, 'b-c')
+        self.assertEqual(ja.get('b_c', 'default'), 'default')
+        self.assertDictEqual(ja.get_data(), {'a': 'ichi'})
+
+    def test_numbered(self):
+        d = Lang({'skill-1': 'Python', 'skill-1-p': 90, 'skill-2': 'Go',
+                  'skill-2-p': 60, 'skill-3': 'C', 'skill-3-p': 40,
+                  'skills-title': 'Skills'})
+        self.assertListEqual([i.n for i in d.numbered('skills')],
+                             ['1', '2', '3'])
+        self.assertListEqual([i.n for i in d.numbered('skills', 1)],
+                             ['1', '3'])
+        self.assertListEqual([i.n for i in d.numbered('skills', 0)], ['2'])
+        self.assertEqual(d.numbered('skills', 0)[0]['p'], 60)
+        self.assertTupleEqual(d.numbered('crt'), ())
+        self.assertTupleEqual(d.numbered('undefined'), ())
+
+
+class TestNumberedIndex(unittest.TestCase):
+    def test_item(self):
+        i = NumberedItem('2', {'img': 'a.png'})
+        self.assertEqual(i['img'], 'a.png')
+        self.assertIsNone(i.get('link'))
+        self.assertEqual(repr(i), "NumberedItem('2')")
+        with self.assertRaises(AttributeError):
+            i.other = 1
+
+    def test_build(self):
+        index = build_numbered_index({
+            '2-crt-img': 'b.png', '2-crt-link': 'https://b',
+            '1-crt-img': 'a.png', '1-crt-alt': 'A', '12-crt-alt': 'L',
+            '1-icon-url': 'https://', '1-icon-meta': 'fa'})
+        crt = index[('crt', None)]
+        self.assertListEqual([i.n for i in crt], ['2', '1'])
+        self.assertDictEqual(crt[0].values, {'img': 'b.png',
+                                             'link': 'https://b'})
+        self.assertDictEqual(crt[1].values, {'img': 'a.png', 'alt': 'A'})
+        self.assertDictEqual(index[('icon', 1)][0].values,
+                             {'url': 'https://', 'meta': 'fa'})
+        self.assertTupleEqual(index[('edu', None)], ())
 
 
 class TestLocales(unittest.TestCase):
@@ -94,6 +180,14 @@ class TestLocales(unittest.TestCase):
         o.set_cache(f, t)
         o._cache.__setitem__.assert_called_once_with(f, t)
 
+    def test_clear_cache(self):
+        o = Locales('./')
+        c = o._cache
+        c['/test/filename.json'] = mock.MagicMock()
+        o.clear_cache()
+        self.assertDictEqual(o._cache, {})
+        assert o._cache is not c
+
     def test_in_cache(self):
         f = '/test/filename.json'
         o = Locales('./')
@@ -118,6 +212,7 @@ class TestLocales(unittest.TestCase):
                 new_callable=mock.mock_open,
                 read_data='{"mock-json": "some-value"}')
     @mock.patch('json.load', clear=True)
+    @mock.patch.object(locales, 'orjson', new=None)
     def test_read(self, json_load, mock_file):
         f = '/test/filename.json'
         d = {'mock-json': 'some-value'}
@@ -127,6 +222,14 @@ class TestLocales(unittest.TestCase):
         mock_file.assert_called_with(f)
         self.assertDictEqual(r, d)
 
+    @unittest.skipIf(locales.orjson is None, 'orjson is not installed')
+    def test_read_orjson(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fp:
+            fp.write('{"mock-json": "some-value"}')
+            fp.flush()
+            self.assertDictEqual(Locales.read(fp.name),
+                                 {'mock-json': 'some-value'})
+
     def test_load(self):
         v = 'unique-value-obj'
         p = '/test/path'
@@ -144,4 +247,452 @@ class TestLocales(unittest.TestCase):
         assert r is v
 
 
-__all__ = ['TestLang', 'TestLocales']
+class TestLocalesIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for bp_name in ('home', 'auth'):
+            os.makedirs(os.path.join(self.tmp.name, 'locales', bp_name))
+            for lang in ('es', 'en'):
+                path = os.path.join(self.tmp.name, 'locales', bp_name,
+                                    '%s.json' % lang)
+                with open(path, 'w') as fp:
+                    json.dump({'title': '%s-%s' % (bp_name, lang)}, fp)
+        self.locales = Locales(self.tmp.name)
+        patcher = mock.patch.object(locales, 'sf', side_effect=lambda f: f)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_preload(self):
+        self.assertEqual(self.locales.preload(['es', 'en', 'ja']), 4)
+        self.assertSetEqual(set(self.locales.index),
+                            {('home', 'es'), ('home', 'en'),
+                             ('auth', 'es'), ('auth', 'en')})
+        with self.assertRaises(TypeError):
+            self.locales.index[('home', 'ja')] = None
+
+    def test_preload_shared_table(self):
+        self.locales.preload(['es', 'en'])
+        self.assertIs(self.locales.index[('home', 'es')]._table,
+                      self.locales.index[('home', 'en')]._table)
+        self.assertIsNot(self.locales.index[('home', 'es')]._table,
+                         self.locales.index[('auth', 'es')]._table)
+
+    def test_merge_fallbacks(self):
+        data = {'ja': {'a': 'ja-a'},
+                'en': {'a': 'en-a', 'b': 'en-b'},
+                'es': {'a': 'es-a', 'b': 'es-b', 'c': 'es-c'}}
+        merged, filled = merge_fallbacks(data, ['en', 'es'])
+        self.assertDictEqual(merged['ja'],
+                             {'a': 'ja-a', 'b': 'en-b', 'c': 'es-c'})
+        self.assertDictEqual(merged['en'],
+                             {'a': 'en-a', 'b': 'en-b', 'c': 'es-c'})
+        self.assertDictEqual(merged['es'], data['es'])
+        self.assertDictEqual(filled, {'ja': ['b', 'c'], 'en': ['c'],
+                                      'es': []})
+        self.assertDictEqual(data['ja'], {'a': 'ja-a'})
+        self.assertDictEqual(merge_fallbacks(data)[0], data)
+
+    def test_preload_fallbacks(self):
+        self.write('home', 'en', 'home-en')
+        self.locales.preload(['es', 'en', 'ja'], fallbacks=['en', 'es'])
+        home_es = self.locales.get('home', 'es')
+        self.assertEqual(home_es.title, 'home-es')
+        self.assertEqual(home_es.other, 'value')
+        self.assertDictEqual(self.locales.filled,
+                             {('home', 'es'): ['other'], ('home', 'en'): [],
+                              ('auth', 'es'): [], ('auth', 'en'): []})
+
+    def test_reload_fallbacks(self):
+        self.locales.preload(['es', 'en'], fallbacks=['en'])
+        auth_es = self.locales.get('auth', 'es')
+        home_es = self.locales.get('home', 'es')
+        self.write('home', 'en', 'changed')
+        self.locales.reload([('home', 'en')])
+        self.assertIs(self.locales.get('auth', 'es'), auth_es)
+        self.assertIsNot(self.locales.get('home', 'es'), home_es)
+        self.assertEqual(self.locales.get('home', 'es').other, 'value')
+        self.assertEqual(self.locales.get('home', 'es').title, 'home-es')
+        self.assertEqual(self.locales.get('home', 'en').title, 'changed')
+        self.assertListEqual(self.locales.filled[('home', 'es')], ['other'])
+
+    def test_get(self):
+        self.locales.preload(['es'])
+        with mock.patch.object(Locales, 'read') as read:
+            lang = self.locales.get('home', 'es')
+            read.assert_not_called()
+        self.assertEqual(lang.title, 'home-es')
+        self.assertIs(self.locales.get('home', 'es'), lang)
+        self.assertEqual(self.locales.get('home', 'en').title, 'home-en')
+        self.assertTrue(self.locales.validate_cache(
+            os.path.join(self.tmp.name, 'locales/home/en.json')))
+
+    def write(self, bp_name, lang, title):
+        path = os.path.join(self.tmp.name, 'locales', bp_name,
+                            '%s.json' % lang)
+        with open(path, 'w') as fp:
+            json.dump({'title': title, 'other': 'value'}, fp)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_reload(self):
+        self.locales.preload(['es', 'en'])
+        home_en = self.locales.get('home', 'en')
+        index = self.locales.index
+        self.write('home', 'es', 'changed')
+        self.locales.reload([('home', 'es')])
+        self.assertIsNot(self.locales.index, index)
+        self.assertEqual(index[('home', 'es')].title, 'home-es')
+        self.assertEqual(self.locales.get('home', 'es').title, 'changed')
+        self.assertIs(self.locales.get('home', 'en'), home_en)
+
+    def test_watcher(self):
+        stats.reset()
+        stats.enabled = True
+        self.addCleanup(setattr, stats, 'enabled', False)
+        self.locales.preload(['es', 'en'])
+        watcher = LocalesWatcher(self.locales, interval=0.01)
+        self.assertListEqual(
+            watcher.get_dirs(),
+            [os.path.join(self.tmp.name, 'locales', 'auth'),
+             os.path.join(self.tmp.name, 'locales', 'home')])
+        self.assertSetEqual(watcher.check(), set())
+
+        self.write('auth', 'en', 'changed')
+        with mock.patch.object(Locales, 'read',
+                               wraps=self.locales.read) as read:
+            self.assertSetEqual(watcher.check(), {('auth', 'en')})
+            self.assertEqual(read.call_count, 1)
+        self.assertEqual(self.locales.get('auth', 'en').title, 'changed')
+        self.assertEqual(stats.get('locales', 'reload')[0], 1)
+        self.assertSetEqual(watcher.check(), set())
+
+        stats.enabled = False
+        self.write('auth', 'en', 'again')
+        self.assertSetEqual(watcher.check(), {('auth', 'en')})
+        self.assertEqual(stats.get('locales', 'reload')[0], 1)
+
+    def test_watcher_thread(self):
+        self.locales.preload(['es'])
+        watcher = LocalesWatcher(self.locales, interval=0.01)
+        watcher.start()
+        self.write('home', 'es', 'changed')
+        for _ in range(100):
+            if self.locales.get('home', 'es').title == 'changed':
+                break
+            watcher._stop_event.wait(0.01)
+        watcher.stop()
+        watcher.join()
+        self.assertEqual(self.locales.get('home', 'es').title, 'changed')
+
+    def test_counters(self):
+        self.locales.preload(['es'])
+        stats.reset()
+        with mock.patch.object(stats, 'enabled', new=True):
+            self.locales.get('home', 'es')
+            self.locales.get('home', 'en')
+        self.assertEqual(stats.get('locales', 'hit')[0], 1)
+        self.assertEqual(stats.get('locales', 'miss')[0], 1)
+
+
+class TestLanguages(unittest.TestCase):
+    def setUp(self):
+        pool = mock.MagicMock()
+        pool.locales.language = 'es'
+        patcher = mock.patch.object(locales, 'settings', new=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        locales.languages[:] = []
+        locales._shared_locales.clear()
+        locales.negotiate_locale.cache_clear()
+
+    def test_get_fallbacks(self):
+        locales.settings.locales.fallback = 'en'
+        self.assertListEqual(locales.get_fallbacks(), ['en', 'es'])
+        locales.settings.locales.fallback = ''
+        self.assertListEqual(locales.get_fallbacks(), ['es'])
+
+    def test_load_available_languages(self):
+        languages = locales.languages
+        locales.load_available_languages('es,en')
+        locales.load_available_languages('en,ja')
+        self.assertIs(locales.languages, languages)
+        self.assertListEqual([lang.language for lang in languages],
+                             ['en', 'ja'])
+
+    def get_locale(self, path='/', **headers):
+        with core.test_request_context(path, headers=headers):
+            return locales.get_locale()
+
+    def test_get_locale(self):
+        locales.load_available_languages('es,en,ja')
+        en = self.get_locale(**{'Accept-Language': 'en-US,en;q=0.9'})
+        self.assertEqual(en.language, 'en')
+        self.assertIs(en, locales.languages[1])
+        self.assertIs(self.get_locale(**{'Accept-Language': 'fr'}),
+                      locales.languages[0])
+        self.assertIs(self.get_locale(), locales.languages[0])
+        self.assertIs(self.get_locale('/?locale=ja',
+                                      **{'Accept-Language': 'en'}),
+                      locales.languages[2])
+        self.assertIs(self.get_locale('/?locale=xx',
+                                      **{'Accept-Language': 'en'}), en)
+        self.assertIs(self.get_locale(**{'Accept-Language': 'en',
+                                         'Cookie': 'locale=ja'}),
+                      locales.languages[2])
+
+    def test_negotiate_locale_cache(self):
+        locales.load_available_languages('es,en')
+        header = 'en-GB,en;q=0.8'
+        with mock.patch.object(locales, 'parse_accept_header',
+                               wraps=locales.parse_accept_header) as parse:
+            for _ in range(3):
+                self.get_locale(**{'Accept-Language': header})
+            parse.assert_called_once()
+
+        locales.load_available_languages('es,ja')
+        self.assertEqual(locales.negotiate_locale.cache_info().currsize, 0)
+        self.assertEqual(
+            self.get_locale(**{'Accept-Language': header}).language, 'es')
+
+
+class TestTranslationFiller(unittest.TestCase):
+    templates = {
+        'text.html': '<h2 class="h3" data-i18n="title-a"></h2>',
+        'attr.html': '<img src="a.png" data-i18n="[alt]{{ n }}-alt" />',
+        'html.html': '<p data-i18n="[html]title-a">x</p>',
+        'full.html': '<p data-i18n="title-a">Keep</p>'
+                     '<span data-i18n="missing"></span>',
+    }
+
+    def setUp(self):
+        self.env = Environment(loader=DictLoader(self.templates),
+                               extensions=[TranslationFiller],
+                               autoescape=True)
+        self.env.globals['translate'] = locales.translate
+        self.lang = Lang({'title-a': 'Title <A>', '1-alt': 'Alt "1"'})
+
+    def render(self, name, **context):
+        return self.env.get_template(name).render(i18n=self.lang, **context)
+
+    def test_key_expression(self):
+        self.assertEqual(key_expression('title-a'), "'title-a'")
+        self.assertEqual(key_expression("{{ item.n + '-date' }}"),
+                         "(item.n + '-date')")
+        self.assertEqual(key_expression('err_{{ code }}_text'),
+                         "'err_' ~ (code) ~ '_text'")
+
+    def test_fill_text(self):
+        self.assertEqual(self.render('text.html'),
+                         '<h2 class="h3" data-i18n="title-a">'
+                         'Title &lt;A&gt;</h2>')
+
+    def test_fill_attr(self):
+        self.assertEqual(self.render('attr.html', n=1),
+                         '<img src="a.png" data-i18n="[alt]1-alt" '
+                         'alt="Alt &#34;1&#34;" />')
+
+    def test_untouched(self):
+        self.assertEqual(self.render('html.html'), self.templates['html.html'])
+        self.assertEqual(self.render('full.html'), self.templates['full.html'])
+
+    def test_index(self):
+        index = {('errors', 'en'): self.lang}
+        with mock.patch.object(locales.i18n, 'index', new=index):
+            with core.test_request_context('/?locale=en'):
+                locales.load_available_languages('es,en')
+                try:
+                    html = self.env.get_template('text.html').render(
+                        bp_name='errors')
+                    empty = self.env.get_template('text.html').render(
+                        bp_name='tac')
+                finally:
+                    locales.languages[:] = []
+                    locales._shared_locales.clear()
+                    locales.negotiate_locale.cache_clear()
+        self.assertIn('>Title &lt;A&gt;</h2>', html)
+        self.assertIn('"title-a"></h2>', empty)
+
+
+class TestSubsets(unittest.TestCase):
+    keys = ['title', 'skill-1', 'skill-2', '1-edu-date', '1-icon-url',
+            'input-code', 'invalid-len', 'unused']
+
+    def test_key_pattern(self):
+        pattern = key_pattern("{{ item.n + '-edu-date' }}")
+        self.assertTrue(pattern.match('1-edu-date'))
+        self.assertFalse(pattern.match('1-edu-degree'))
+        pattern = key_pattern('err_{{ code }}_text')
+        self.assertTrue(pattern.match('err_404_text'))
+        self.assertFalse(pattern.match('err_404_title'))
+        self.assertTrue(key_pattern('a-b').match('a-b'))
+        self.assertFalse(key_pattern('a-b').match('a-bc'))
+
+    def test_extract_keys_template(self):
+        source = ('<title data-i18n="title"></title>'
+                  '<span data-i18n="{{ \'skill-\' + item.n }}"></span>'
+                  '<img data-i18n="[alt]{{ item.n }}-edu-date" />'
+                  '<a href="{{ i18n.get(\'1-icon-url\') }}"></a>')
+        self.assertSetEqual(extract_keys(source, self.keys),
+                            {'title', 'skill-1', 'skill-2', '1-edu-date'})
+
+    def test_extract_keys_script(self):
+        source = ('if (code == $.i18n(\'input-code\')) {'
+                  'display_err("invalid-len"); $.i18n(\'other\'); }')
+        self.assertSetEqual(extract_keys(source, self.keys), set())
+        self.assertSetEqual(extract_keys(source, self.keys, literals=True),
+                            {'input-code', 'invalid-len'})
+
+    def test_find_templates(self):
+        env = Environment(loader=DictLoader({
+            'base.html': '{% include "footer.html" %}{% block body %}'
+                         '{% endblock %}',
+            'footer.html': '<p data-i18n="title"></p>',
+            'page.html': '{% extends "base.html" %}',
+            'other.html': '<p data-i18n="unused"></p>',
+        }))
+        sources = find_templates(env, 'page.html')
+        self.assertEqual(len(sources), 3)
+        self.assertIn('<p data-i18n="title"></p>', sources)
+
+    def test_find_scripts(self):
+        with tempfile.TemporaryDirectory() as folder:
+            os.mkdir(os.path.join(folder, 'js'))
+            files = {
+                'page.js': "require('./css/page.css');\n"
+                           "require('./js/a.js');\nrequire('./js/b.js');",
+                'js/a.js': "$.i18n('input-code');",
+                'js/c.js': "$.i18n('unused');",
+            }
+            for name, content in files.items():
+                with open(os.path.join(folder, name), 'w') as fp:
+                    fp.write(content)
+            sources = find_scripts(os.path.join(folder, 'page.js'))
+        self.assertListEqual(sources, [files['page.js'], files['js/a.js']])
+
+    def test_subset(self):
+        cli = LocalesCLI(mock.MagicMock())
+        result = cli.subset('auth', locales.PAGE_TEMPLATES['auth'])
+        data, subset = result['en']
+        # keys of the templates and of the scripts
+        self.assertIn('auth-text', subset)
+        self.assertIn('input-code', subset)
+        self.assertIn('invalid-code', subset)
+        self.assertNotIn('oauth-github', subset)
+        self.assertEqual(subset['submit'], data['submit'])
+
+    def test_write_subsets(self):
+        with tempfile.TemporaryDirectory() as folder:
+            src = os.path.join(core.static_folder, 'locales', 'auth')
+            dst = os.path.join(folder, 'locales', 'auth')
+            shutil.copytree(src, dst)
+            cli = LocalesCLI(mock.MagicMock())
+            cli.folder = os.path.join(folder, 'locales')
+            pages = {'auth': 'auth/index.html', 'errors': 'errors/index.html'}
+            with mock.patch.object(locales, 'PAGE_TEMPLATES', new=pages):
+                cli.write_subsets(simulate=True)
+                self.assertFalse(os.path.exists(
+                    os.path.join(dst, 'en.subset.json')))
+                cli.write_subsets(simulate=False, fallbacks=['en'])
+                # the subsets are not read again as translations
+                cli.write_subsets(simulate=False, fallbacks=['en'])
+
+            with open(os.path.join(dst, 'en.subset.json')) as fp:
+                subset = json.load(fp)
+            self.assertIn('input-code', subset)
+            self.assertNotIn('oauth-github', subset)
+            with open(os.path.join(dst, 'ja.subset.json')) as fp:
+                self.assertDictEqual(json.load(fp), subset)
+            self.assertFalse(os.path.exists(
+                os.path.join(dst, 'en.subset.subset.json')))
+
+
+class TestTranslationsAPI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for bp_name, name, data in (
+                ('auth', 'en.json', {'a': '1', 'b': '2', 'c': '3'}),
+                ('auth', 'en.subset.json', {'a': '1'}),
+                ('auth', 'es.json', {'a': 'uno', 'b': 'dos'}),
+                ('home', 'en.json', {'phone': '9 5555 5555'}),
+                ('home-limited', 'en.json', {'phone': '9 **** 5555'})):
+            folder = os.path.join(self.tmp.name, 'locales', bp_name)
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, name), 'w') as fp:
+                json.dump(data, fp)
+
+        pool = mock.MagicMock()
+        pool.server.debug_mode = True
+        self.i18n = Locales(self.tmp.name)
+        self.static = StaticFiles(self.tmp.name)
+        for patcher in (
+                mock.patch.object(assets_module, 'settings_pool', new=pool),
+                mock.patch.object(i18n_api, 'i18n', new=self.i18n),
+                mock.patch.object(i18n_api, 'static_files', new=self.static)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.i18n.preload(['es', 'en', 'ja'], fallbacks=['en'])
+
+    def get(self, path, token=None, **headers):
+        with core.test_request_context('/api/v1/i18n/' + path,
+                                       headers=headers):
+            g.token_decoded = token
+            response = i18n_api.translation(*path.split('/'))
+            response.direct_passthrough = False
+            return response
+
+    def test_subset(self):
+        r = self.get('auth/en')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.mimetype, 'application/json')
+        self.assertDictEqual(json.loads(r.data), {'a': '1'})
+        self.assertTrue(r.cache_control.no_cache)
+
+    def test_whole_translation(self):
+        r = self.get('auth/es')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.mimetype, 'application/json')
+        self.assertDictEqual(json.loads(r.data),
+                             {'a': 'uno', 'b': 'dos', 'c': '3'})
+        self.assertTrue(r.cache_control.no_cache)
+        r = self.get('auth/es', **{'If-None-Match': r.headers['ETag']})
+        self.assertEqual(r.status_code, 304)
+
+    def test_not_found(self):
+        with self.assertRaises(NotFound):
+            self.get('auth/ja')
+        with self.assertRaises(NotFound):
+            self.get('privacy/en')
+
+    def test_protected(self):
+        with self.assertRaises(Forbidden):
+            self.get('home/en')
+        r = self.get('home-limited/en')
+        self.assertDictEqual(json.loads(r.data), {'phone': '9 **** 5555'})
+        self.assertTrue(r.cache_control.public)
+
+        r = self.get('home/en', token={'tty': 'access'})
+        self.assertDictEqual(json.loads(r.data), {'phone': '9 5555 5555'})
+        self.assertTrue(r.cache_control.private)
+        self.assertFalse(r.cache_control.public)
+        self.assertIn('Cookie', r.vary)
+
+    def test_etag(self):
+        self.static.index()
+        r = self.get('auth/en')
+        etag = r.get_etag()[0]
+        filename = 'locales/auth/en.subset.json'
+        self.assertEqual(etag, self.static.etags[filename])
+        self.assertFalse(r.cache_control.immutable)
+        r = self.get('auth/en', **{'If-None-Match': '"%s"' % etag})
+        self.assertEqual(r.status_code, 304)
+
+
+__all__ = ['TestLang', 'TestNumberedIndex', 'TestLocales', 'TestLocalesIndex',
+           'TestLanguages', 'TestTranslationFiller', 'TestSubsets',
+           'TestTranslationsAPI']
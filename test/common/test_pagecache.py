@@ -0,0 +1,136 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+from babel import Locale
+from flask import Response
+
+from webapp import pagecache
+from webapp.assets import assets
+from webapp.locales import i18n
+from webapp.pagecache import PageCache
+from webapp.webapp import core
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PageCache(max_entries=2, ttl=60)
+        self.calls = 0
+        self.tier = 'home'
+        self.lang = Locale('en')
+        patcher = mock.patch.object(pagecache, 'get_locale',
+                                    side_effect=lambda: self.lang)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        @self.cache.cached(lambda: self.tier)
+        def view(status=200):
+            self.calls += 1
+            return 'page %d' % self.calls, status
+
+        @self.cache.cached(lambda: self.tier)
+        def streamed_view():
+            self.calls += 1
+            chunks = iter(('<head></head>', 'page %d' % self.calls))
+            return Response(chunks, mimetype='text/html')
+
+        self.view = view
+        self.streamed_view = streamed_view
+
+    def get(self, status=200, **headers):
+        with core.test_request_context('/', headers=headers):
+            return self.view(status)
+
+    def test_hit(self):
+        r1 = self.get()
+        r2 = self.get()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(r1.get_data(), b'page 1')
+        self.assertEqual(r2.get_data(), b'page 1')
+        self.assertEqual(r2.mimetype, 'text/html')
+        self.assertEqual(r1.get_etag(), r2.get_etag())
+        self.assertFalse(r2.get_etag()[1])
+        self.assertTrue(r2.cache_control.no_cache)
+        self.assertIn('Accept-Language', r2.vary)
+
+    def test_not_modified(self):
+        etag = self.get().get_etag()[0]
+        r = self.get(**{'If-None-Match': '"%s"' % etag})
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+    def test_key(self):
+        self.get()
+        self.tier = 'home-limited'
+        self.assertEqual(self.get().get_data(), b'page 2')
+        self.lang = Locale('es')
+        self.assertEqual(self.get().get_data(), b'page 3')
+        with mock.patch.object(assets, 'version', new='new'):
+            self.assertEqual(self.get().get_data(), b'page 4')
+        self.assertEqual(len(self.cache), 2)
+
+    def test_disabled(self):
+        self.cache.ttl = 0
+        self.get()
+        self.assertTupleEqual(self.get(), ('page 2', 200))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_not_stored(self):
+        self.assertEqual(self.get(status=404).status_code, 404)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expired(self):
+        with mock.patch.object(pagecache.time, 'monotonic',
+                               return_value=1000):
+            self.get()
+        with mock.patch.object(pagecache.time, 'monotonic',
+                               return_value=1059):
+            self.assertEqual(self.get().get_data(), b'page 1')
+        with mock.patch.object(pagecache.time, 'monotonic',
+                               return_value=1061):
+            self.assertEqual(self.get().get_data(), b'page 2')
+
+    def test_streamed(self):
+        with core.test_request_context('/'):
+            r1 = self.streamed_view()
+            self.assertTrue(r1.is_streamed)
+            self.assertIsNone(r1.get_etag()[0])
+            self.assertEqual(len(self.cache), 0)
+            self.assertEqual(r1.get_data(), b'<head></head>page 1')
+            r2 = self.streamed_view()
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(r2.is_streamed)
+        self.assertEqual(r2.get_data(), b'<head></head>page 1')
+        self.assertIsNotNone(r2.get_etag()[0])
+
+    def test_streamed_disconnect(self):
+        with core.test_request_context('/'):
+            chunks = iter(self.streamed_view().response)
+            next(chunks)
+            chunks.close()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_clear_on_reload(self):
+        self.get()
+        with mock.patch.object(i18n, 'index', new=MappingProxyType({})):
+            self.assertEqual(self.get().get_data(), b'page 2')
+            self.assertEqual(self.get().get_data(), b'page 2')
+        with mock.patch.object(pagecache, 'page_cache', new=self.cache):
+            pagecache.clear_pages({'server'})
+        self.assertEqual(len(self.cache), 0)
+
+
+__all__ = ['TestPageCache']
@@ -0,0 +1,89 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import unittest
+from unittest import mock
+
+from flask import Blueprint
+from flask import Response
+
+from webapp import preload
+from webapp.preload import format_link
+from webapp.preload import Preloads
+from webapp.webapp import core
+
+
+class TestPreloads(unittest.TestCase):
+    def setUp(self):
+        self.preloads = Preloads()
+        self.blueprint = Blueprint('frontend_test', __name__)
+        self.static_url = mock.patch.object(
+            preload, 'static_url', side_effect=lambda f: '/dist/' + f)
+        self.static_url.start()
+        self.addCleanup(self.static_url.stop)
+
+    def test_format_link(self):
+        self.assertEqual(format_link('/a.js', as_='script'),
+                         '</a.js>; rel=preload; as=script')
+        self.assertEqual(format_link('https://a', rel='preconnect',
+                                     crossorigin=True),
+                         '<https://a>; rel=preconnect; crossorigin')
+
+    def test_get_links(self):
+        self.preloads.register(self.blueprint, 'test', ['<b>; rel=preload'])
+        self.assertIsNone(self.preloads.get_links('other'))
+        self.assertEqual(self.preloads.get_links('frontend_test'),
+                         '</dist/test.bundle.js>; rel=preload; as=script, '
+                         '<b>; rel=preload')
+        self.preloads.get_links('frontend_test')
+        preload.static_url.assert_called_once_with('test.bundle.js')
+
+    def test_get_links_callable(self):
+        bp_name = mock.MagicMock(return_value='test-limited')
+        self.preloads.register(self.blueprint, bp_name)
+        self.assertEqual(self.preloads.get_links('frontend_test'),
+                         '</dist/test-limited.bundle.js>; rel=preload; '
+                         'as=script')
+        bp_name.return_value = 'test'
+        self.assertIn('test.bundle.js',
+                      self.preloads.get_links('frontend_test'))
+        self.assertSetEqual(set(self.preloads.links), {'test', 'test-limited'})
+
+    def test_early_hints(self):
+        self.preloads.register(self.blueprint, 'test')
+        early_hints = mock.MagicMock()
+        environ = {'wsgi.early_hints': early_hints}
+        with mock.patch.object(preload, 'preloads', new=self.preloads), \
+                core.test_request_context('/', environ_base=environ), \
+                mock.patch('webapp.preload.request') as request:
+            request.blueprint = 'frontend_test'
+            request.environ = environ
+            preload.send_early_hints()
+            links = self.preloads.get_links('frontend_test')
+            early_hints.assert_called_once_with([('Link', links)])
+
+            r = preload.add_preload_links(Response('', mimetype='text/html'))
+            self.assertEqual(r.headers['Link'], links)
+            r = preload.add_preload_links(Response('', status=302))
+            self.assertNotIn('Link', r.headers)
+
+    def test_no_blueprint(self):
+        with core.test_request_context('/'), \
+                mock.patch('webapp.preload.request') as request:
+            request.blueprint = None
+            preload.send_early_hints()
+            r = preload.add_preload_links(Response('', mimetype='text/html'))
+            self.assertNotIn('Link', r.headers)
+
+
+__all__ = ['TestPreloads']
@@ -0,0 +1,90 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import unittest
+from unittest import mock
+
+from flask import Flask
+from jinja2 import DictLoader
+
+from webapp import render
+from webapp.render import buffer_chunks
+from webapp.render import generate_template
+from webapp.render import is_streamed
+from webapp.render import render_page
+from webapp.webapp import core
+
+
+class TestRender(unittest.TestCase):
+    def test_buffer_chunks(self):
+        chunks = ['<html>', '<head>', '</head>', '<body>', 'a' * 8, 'b', '']
+        self.assertListEqual(list(buffer_chunks(chunks, size=14)),
+                             ['<html><head></head>', '<body>aaaaaaaa', 'b'])
+
+    def test_buffer_chunks_empty(self):
+        self.assertListEqual(list(buffer_chunks([])), [])
+
+    def test_generate_template(self):
+        app = Flask(__name__)
+        app.jinja_env.loader = DictLoader(
+            {'page.html': '<head></head>{{ a }}{{ len(b) }}'})
+        app.context_processor(lambda: dict(len=len))
+        with app.test_request_context('/'):
+            chunks = generate_template('page.html', a=1, b='xy')
+        self.assertEqual(''.join(chunks), '<head></head>12')
+
+    def test_render_page_without_stream_template(self):
+        chunks = iter(('<head></head>', 'body'))
+        with mock.patch.object(render, 'is_streamed', return_value=True), \
+                mock.patch.object(render, 'stream_template', new=None), \
+                mock.patch.object(render, 'generate_template',
+                                  return_value=chunks) as generate:
+            with core.test_request_context('/'):
+                response = render_page('page.html', a=1)
+        generate.assert_called_once_with('page.html', a=1)
+        self.assertListEqual(list(response.response),
+                             ['<head></head>', 'body'])
+
+    def test_is_streamed(self):
+        settings = mock.Mock()
+        with mock.patch.object(render, 'settings', new=settings):
+            settings.server.stream_blueprints = 'frontend_home, frontend_tac'
+            self.assertTrue(is_streamed('frontend_home'))
+            self.assertTrue(is_streamed('frontend_tac'))
+            self.assertFalse(is_streamed('frontend_auth'))
+            self.assertFalse(is_streamed(None))
+            settings.server.stream_blueprints = ''
+            self.assertFalse(is_streamed('frontend_home'))
+
+    def test_render_page(self):
+        with mock.patch.object(render, 'is_streamed', return_value=False), \
+                mock.patch.object(render, 'render_template',
+                                  return_value='page') as render_template:
+            with core.test_request_context('/'):
+                self.assertEqual(render_page('page.html', a=1), 'page')
+        render_template.assert_called_once_with('page.html', a=1)
+
+    def test_render_page_streamed(self):
+        chunks = iter(('<head>', '</head>', 'body'))
+        with mock.patch.object(render, 'is_streamed', return_value=True), \
+                mock.patch.object(render, 'stream_template',
+                                  return_value=chunks):
+            with core.test_request_context('/'):
+                response = render_page('page.html')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/html')
+        self.assertListEqual(list(response.response),
+                             ['<head></head>', 'body'])
+
+
+__all__ = ['TestRender']
@@ -1,54 +1,92 @@
 import binascii
+import functools
+import os
+import tempfile
+import threading
 import unittest
+from configparser import ConfigParser
+from configparser import ExtendedInterpolation
+from configparser import NoOptionError
+from configparser import NoSectionError
 from unittest import mock
 
+import hvac
+
+from .fake_vault import FakeVault
 from webapp import settings
 from webapp.exceptions import CriticalError
+from webapp.settings import CachedEngine
 from webapp.settings import EnvironEngine
+from webapp.settings import FileEngine
+from webapp.settings import GuardedEngine
 from webapp.settings import ParserProxy
 from webapp.settings import Secrets
 from webapp.settings import SectionProxy
 from webapp.settings import VaultEngine
+from webapp.stats import stats
 
 
 class TestBasicSettings(unittest.TestCase):
     def test_basic_create(self):
         section = 'unittest'
         cfg = mock.MagicMock()
+        cfg.items.return_value = [('option', '1')]
         s = SectionProxy(cfg, section)
         self.assertEqual(s._section, section)
-        self.assertIs(s._cp, cfg)
+        self.assertEqual(s.option, 1)
+        cfg.items.assert_called_once_with(section)
 
     def test_basic_integrity_class(self):
         self.assertIsNone(SectionProxy._section)
-        self.assertIsNone(SectionProxy._cp)
 
     def test_basic_magic_getattr_to_python(self):
         t = 'unittest'
         c = mock.Mock()
-        c.get.return_value = '101'
+        c.items.return_value = [('mocked_attr', '101')]
         s = SectionProxy(c, t)
-        r = s.__getattr__('mocked_attr')
-        s._cp.get.assert_called_with(t, 'mocked_attr')
-        self.assertEqual(r, 101)
+        self.assertEqual(s.mocked_attr, 101)
+        self.assertEqual(s.mocked_attr, 101)
+        c.items.assert_called_once_with(t)
 
     def test_basic_magic_getattr_no_python(self):
         t = 'unittest'
-        v = '1*1'
         c = mock.Mock()
-        c.get.return_value = v
+        c.items.return_value = [('a', '1*1'), ('b', '127.0.0.1')]
         s = SectionProxy(c, t)
-        r = s.__getattr__('mocked_attr')
-        s._cp.get.assert_called_with(t, 'mocked_attr')
-        self.assertEqual(v, r)
+        self.assertEqual(s.a, '1*1')
+        self.assertEqual(s.b, '127.0.0.1')
+
+    @mock.patch('ast.literal_eval', clear=True)
+    def test_basic_magic_getattr_compiled(self, literal_mock):
+        literal_mock.return_value = 1
+        c = mock.Mock()
+        c.items.return_value = [('mocked_attr', '1')]
+        s = SectionProxy(c, 'unittest')
+        for _ in range(3):
+            self.assertEqual(s.mocked_attr, 1)
+        literal_mock.assert_called_once_with('1')
+
+    def test_basic_magic_getattr_missing(self):
+        c = mock.Mock()
+        c.items.return_value = []
+        s = SectionProxy(c, 'unittest')
+        self.assertRaises(NoOptionError, getattr, s, 'mocked_attr')
+        self.assertFalse(hasattr(s, '__wrapped__'))
 
     def test_basic_magic_setattr(self):
         t = 'unittest'
         v = '1*1'
         c = mock.Mock()
+        c.items.return_value = [('mocked_attr', '1')]
         s = SectionProxy(c, t)
-        self.assertIsNone(s.__setattr__('mocked_attr', v))
-        s._cp.set.assert_called_with(t, 'mocked_attr', v)
+        self.assertRaises(AttributeError, s.__setattr__, 'mocked_attr', v)
+        self.assertRaises(AttributeError, s.__delattr__, 'mocked_attr')
+        self.assertEqual(s.mocked_attr, 1)
+
+    def test_basic_to_python(self):
+        self.assertEqual(settings.to_python('[1, 2]'), [1, 2])
+        self.assertEqual(settings.to_python('es,en'), 'es,en')
+        self.assertEqual(settings.to_python('127.0.0.1'), '127.0.0.1')
 
 
 class TestSecrets(unittest.TestCase):
@@ -114,6 +152,13 @@ class TestSecrets(unittest.TestCase):
             s.get_value, k)
         s.engine.get_value.assert_called_once_with(k)
 
+    def test_secret_prefetch(self):
+        s = Secrets()
+        self.assertRaises(CriticalError, s.prefetch, ['test'])
+        s.engine = mock.MagicMock()
+        s.prefetch(['a', 'b'])
+        s.engine.get_values.assert_called_once_with(['a', 'b'])
+
     def test_secret_get_value_default(self):
         s = Secrets(mock.MagicMock())
         s.engine.get_value.return_value = settings.DEFAULT_NULL_RANDOM
@@ -200,7 +245,7 @@ class TestVaultEngine(unittest.TestCase):
         m = {}
         e = VaultEngine(m, c)
         d = {'_VaultEngine__kv_map': m, '_VaultEngine__client': c,
-             '_VaultEngine__mp': None}
+             '_VaultEngine__mp': None, '_VaultEngine__login': None}
         self.assertDictEqual(e.__dict__, d)
 
     def test_vault_get_value_null(self):
@@ -255,6 +300,319 @@ class TestVaultEngine(unittest.TestCase):
         d.get.assert_not_called()
 
 
+class TestCachedEngine(unittest.TestCase):
+    def test_cached_create(self):
+        m = mock.MagicMock()
+        e = CachedEngine(m, ttl=10, ttls={'k': 1})
+        self.assertIs(e.engine, m)
+        self.assertEqual(e.get_ttl('k'), 1)
+        self.assertEqual(e.get_ttl('other'), 10)
+        self.assertDictEqual(e._cache, {})
+
+    @mock.patch('time.monotonic')
+    def test_cached_get_value(self, monotonic):
+        monotonic.return_value = 100
+        m = mock.MagicMock()
+        m.get_value.return_value = 'secret'
+        e = CachedEngine(m, ttl=10)
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertEqual(e.get_value('k'), 'secret')
+        m.get_value.assert_called_once_with('k')
+
+        monotonic.return_value = 110
+        m.get_value.return_value = 'renewed'
+        self.assertEqual(e.get_value('k'), 'renewed')
+        self.assertEqual(m.get_value.call_count, 2)
+
+    def test_cached_get_value_kwargs(self):
+        m = mock.MagicMock()
+        e = CachedEngine(m)
+        e.get_value('k', pop=True)
+        e.get_value('k', pop=True)
+        self.assertEqual(m.get_value.call_count, 2)
+        self.assertDictEqual(e._cache, {})
+
+    @mock.patch('time.monotonic')
+    def test_cached_renew_due(self, monotonic):
+        monotonic.return_value = 100
+        m = mock.MagicMock()
+        m.renew.return_value = 40
+        m.get_value.return_value = 'secret'
+        e = CachedEngine(m, ttl=10, ttls={'b': 100}, ratio=0.5)
+        e.renew()
+        e.get_value('a')
+        e.get_value('b')
+        self.assertEqual(e.renew_due(), 5)
+        m.renew.assert_called_once_with()
+
+        monotonic.return_value = 106
+        m.get_values.return_value = {'a': 'renewed'}
+        self.assertEqual(e.renew_due(), 5)
+        m.get_values.assert_called_once_with(['a'])
+        self.assertEqual(e._cache['a'][0], 'renewed')
+        self.assertEqual(e._cache['b'][0], 'secret')
+
+        monotonic.return_value = 120
+        e.renew_due()
+        self.assertEqual(m.renew.call_count, 2)
+
+    def test_cached_get_values(self):
+        m = mock.MagicMock()
+        m.get_values.side_effect = lambda keys: {k: k.lower() for k in keys}
+        e = CachedEngine(m)
+        e.set_cache('A', 'cached')
+        self.assertDictEqual(e.get_values(['A', 'B', 'C']),
+                             {'A': 'cached', 'B': 'b', 'C': 'c'})
+        m.get_values.assert_called_once_with(['B', 'C'])
+        self.assertEqual(e.get_value('B'), 'b')
+        m.get_value.assert_not_called()
+
+    def test_cached_renew_none(self):
+        m = mock.MagicMock()
+        m.renew.return_value = None
+        e = CachedEngine(m, ttl=10)
+        self.assertIsNone(e.renew())
+        self.assertEqual(e.renew_due(), 7.5)
+
+
+class TestCachedVaultEngine(unittest.TestCase):
+    def setUp(self):
+        self.vault = FakeVault({'app/db': {'url': 'sqlite://', 'user': 'u'},
+                                'app/jwt': {'key': 'jwt-secret'}})
+        self.vault.start()
+        self.client = hvac.Client(url=self.vault.url)
+        self.login = functools.partial(self.client.auth.approle.login,
+                                       role_id='role', secret_id='secret')
+        self.login()
+        kv_map = {'DB_URL': {'path': 'app/db', 'key': 'url'},
+                  'DB_USER': {'path': 'app/db', 'key': 'user'},
+                  'DB_PASS': {'path': 'app/db', 'key': 'pass'},
+                  'JWT_KEY': {'path': 'app/jwt', 'key': 'key'}}
+        self.engine = VaultEngine(kv_map, self.client, mp='secret',
+                                  login=self.login)
+
+    def tearDown(self):
+        self.vault.stop()
+
+    def test_vault_cached_hot_path(self):
+        e = CachedEngine(self.engine, ttl=60)
+        for _ in range(10):
+            self.assertEqual(e.get_value('DB_URL'), 'sqlite://')
+        self.assertEqual(self.vault.calls['/v1/secret/data/app/db'], 1)
+
+    def test_vault_get_values(self):
+        r = self.engine.get_values(['DB_URL', 'DB_PASS', 'JWT_KEY', 'NONE'])
+        self.assertDictEqual(r, {'DB_URL': 'sqlite://',
+                                 'DB_PASS': settings.DEFAULT_NULL_RANDOM,
+                                 'JWT_KEY': 'jwt-secret',
+                                 'NONE': settings.DEFAULT_NULL_RANDOM})
+        self.assertEqual(self.vault.calls['/v1/secret/data/app/db'], 1)
+        self.assertEqual(self.vault.calls['/v1/secret/data/app/jwt'], 1)
+
+    def test_vault_prefetch(self):
+        s = Secrets(CachedEngine(self.engine, ttl=60))
+        s.prefetch(['DB_URL', 'DB_USER', 'JWT_KEY'])
+        self.assertEqual(s.get_value('DB_URL'), 'sqlite://')
+        self.assertEqual(s.get_value('DB_USER'), 'u')
+        self.assertEqual(s.get_value('JWT_KEY'), 'jwt-secret')
+        self.assertEqual(self.vault.calls['/v1/secret/data/app/db'], 1)
+        self.assertEqual(self.vault.calls['/v1/secret/data/app/jwt'], 1)
+
+    def test_vault_renew_token(self):
+        e = CachedEngine(self.engine, ttl=60)
+        token = self.vault.token
+        self.assertEqual(e.renew(), 60)
+        self.assertEqual(self.vault.calls['/v1/auth/token/renew-self'], 1)
+        self.assertEqual(self.vault.token, token)
+
+        self.vault.renewable = False
+        e.renew()
+        self.assertEqual(self.vault.calls['/v1/auth/approle/login'], 2)
+        self.assertNotEqual(self.vault.token, token)
+        self.assertEqual(e.get_value('JWT_KEY'), 'jwt-secret')
+
+    def test_vault_background_renewal(self):
+        e = CachedEngine(self.engine, ttl=0.2, ratio=0.25)
+        e.start()
+        self.assertEqual(e.get_value('DB_URL'), 'sqlite://')
+        self.vault.data['app/db']['url'] = 'postgres://'
+        for _ in range(100):
+            if e._cache['DB_URL'][0] == 'postgres://':
+                break
+            e._stop_event.wait(0.01)
+        e.stop()
+        self.assertEqual(e._cache['DB_URL'][0], 'postgres://')
+        self.assertGreater(self.vault.calls['/v1/secret/data/app/db'], 1)
+
+
+class TestFileEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'secrets.vcv')
+        self.key = FileEngine.generate_key()
+        self.values = {'SECRET_%d' % i: 'value-%d' % i for i in range(50)}
+        FileEngine.build(self.filename, self.values, self.key)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_get_value(self):
+        e = FileEngine(self.filename, self.key)
+        for k, v in self.values.items():
+            self.assertEqual(e.get_value(k), v)
+        r = e.get_value('UNDEFINED')
+        self.assertEqual(r, settings.DEFAULT_NULL_RANDOM)
+        e.close()
+
+    def test_file_encrypted(self):
+        with open(self.filename, 'rb') as fp:
+            data = fp.read()
+        self.assertNotIn(b'value-1', data)
+        self.assertNotIn(b'SECRET_1', data)
+
+    def test_file_wrong_key(self):
+        e = FileEngine(self.filename, FileEngine.generate_key())
+        self.assertEqual(e.get_value('SECRET_1'), settings.DEFAULT_NULL_RANDOM)
+
+    def test_file_tampered(self):
+        with open(self.filename, 'r+b') as fp:
+            fp.seek(-1, os.SEEK_END)
+            last = fp.read(1)
+            fp.seek(-1, os.SEEK_END)
+            fp.write(bytes([last[0] ^ 1]))
+        e = FileEngine(self.filename, self.key)
+        r = [e.get_value(k) for k in self.values]
+        self.assertEqual(r.count(settings.DEFAULT_NULL_RANDOM), 1)
+
+    def test_file_invalid(self):
+        with open(self.filename, 'wb') as fp:
+            fp.write(b'\0' * 64)
+        self.assertRaises(CriticalError, FileEngine, self.filename, self.key)
+
+
+class TestGuardedEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmp.name, 'lkg.vcv')
+        self.key = FileEngine.generate_key()
+        self.engine = mock.MagicMock()
+        self.engine.get_value.return_value = 'secret'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_engine(self, **kwargs):
+        kwargs.setdefault('snapshot', self.snapshot)
+        kwargs.setdefault('key', self.key)
+        return GuardedEngine(self.engine, timeout=0.2, threshold=2,
+                             reset_timeout=60, **kwargs)
+
+    def test_guarded_get_value(self):
+        e = self.get_engine()
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertEqual(e.state, GuardedEngine.CLOSED)
+        self.assertFalse(os.path.exists(self.snapshot))
+        self.assertTrue(e.save())
+        self.assertFalse(e.save())
+        self.assertEqual(FileEngine(self.snapshot, self.key).get_value('k'),
+                         'secret')
+        self.assertListEqual(os.listdir(self.tmp.name), ['lkg.vcv'])
+
+    def test_guarded_renew(self):
+        self.engine.renew.return_value = 60
+        e = self.get_engine()
+        e.get_value('k')
+        self.assertEqual(e.renew(), 60)
+        self.assertEqual(FileEngine(self.snapshot, self.key).get_value('k'),
+                         'secret')
+
+    @mock.patch('time.monotonic')
+    def test_guarded_breaker(self, monotonic):
+        monotonic.return_value = 100
+        stats.reset()
+        e = self.get_engine()
+        e.get_value('k')
+        self.engine.get_value.side_effect = hvac.exceptions.VaultDown
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertEqual(e.state, GuardedEngine.CLOSED)
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertEqual(e.state, GuardedEngine.OPEN)
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertEqual(self.engine.get_value.call_count, 3)
+        self.assertEqual(stats.get('breaker', 'trip')[0], 1)
+        self.assertEqual(stats.get('breaker', 'fallback')[0], 3)
+
+        monotonic.return_value = 160
+        self.engine.get_value.side_effect = None
+        self.engine.get_value.return_value = 'renewed'
+        self.assertEqual(e.get_value('k'), 'renewed')
+        self.assertEqual(e.state, GuardedEngine.CLOSED)
+
+    def test_guarded_timeout(self):
+        event = threading.Event()
+        self.engine.get_value.side_effect = lambda key: event.wait(1)
+        e = self.get_engine(snapshot=None)
+        self.assertEqual(e.get_value('k'), settings.DEFAULT_NULL_RANDOM)
+        event.set()
+
+    def test_guarded_snapshot(self):
+        FileEngine.build(self.snapshot, {'k': 'stored'}, self.key)
+        self.engine.get_values.side_effect = hvac.exceptions.VaultDown
+        e = self.get_engine()
+        self.assertDictEqual(e.get_values(['k']), {'k': 'stored'})
+        self.assertDictEqual(e.get_values(['k', 'other']),
+                             {'k': 'stored',
+                              'other': settings.DEFAULT_NULL_RANDOM})
+
+    def test_guarded_default(self):
+        self.engine.get_value.side_effect = hvac.exceptions.VaultDown
+        s = Secrets(self.get_engine())
+        self.assertEqual(s.get_value('G_ANALYTICS_ID', default=''), '')
+        self.assertRaises(CriticalError, s.get_value, 'JWT_ENCODE_KEY')
+
+    @mock.patch('time.monotonic')
+    def test_guarded_factory(self, monotonic):
+        monotonic.return_value = 100
+        FileEngine.build(self.snapshot, {'k': 'stored'}, self.key)
+        factory = mock.MagicMock(side_effect=hvac.exceptions.VaultDown)
+        e = GuardedEngine(factory=factory, timeout=0.2, threshold=1,
+                          reset_timeout=60, snapshot=self.snapshot,
+                          key=self.key)
+        self.assertEqual(e.get_value('k'), 'stored')
+        self.assertEqual(e.state, GuardedEngine.OPEN)
+        self.assertEqual(e.renew(), 60)
+        self.assertIsNone(e.engine)
+
+        monotonic.return_value = 160
+        factory.side_effect = None
+        factory.return_value = self.engine
+        self.assertEqual(e.get_value('k'), 'secret')
+        self.assertIs(e.engine, self.engine)
+        e.get_value('k')
+        self.assertEqual(factory.call_count, 2)
+
+    def test_guarded_corrupt_snapshot(self):
+        FileEngine.build(self.snapshot, {'k': 'stored'}, self.key)
+        with open(self.snapshot, 'r+b') as fp:
+            fp.truncate(FileEngine.HEADER.size + 4)
+        self.engine.get_values.side_effect = hvac.exceptions.VaultDown
+        e = self.get_engine()
+        self.assertDictEqual(e.get_values(['k']),
+                             {'k': settings.DEFAULT_NULL_RANDOM})
+
+        with open(self.snapshot, 'wb') as fp:
+            fp.write(b'garbage')
+        e = self.get_engine()
+        self.assertDictEqual(e.get_values(['k']),
+                             {'k': settings.DEFAULT_NULL_RANDOM})
+
+    def test_guarded_no_key(self):
+        e = self.get_engine(key=None)
+        e.get_value('k')
+        self.assertFalse(e.save())
+        self.assertFalse(os.path.exists(self.snapshot))
+
+
 class TestEnvironEngine(unittest.TestCase):
     def test_environ_create(self):
         p = 'prefix'
@@ -298,13 +656,147 @@ class TestSettingsPool(unittest.TestCase):
 
     @mock.patch('webapp.settings._default_section_proxy', clear=True)
     def test_pool_magic_getattr(self, s_m):
+        a = 'mocked_attr'
         c = mock.Mock()
+        c.sections.return_value = [a]
         s = ParserProxy(c)
-        a = 'mocked_attr'
-        s.__getattr__(a)
+        s_m.assert_called_once_with(c, a)
         self.assertIn(a, s._sections)
-        s_m.assert_called_with(c, a)
+        self.assertIs(getattr(s, a), s_m.return_value)
+        self.assertRaises(NoSectionError, getattr, s, 'undefined')
+        self.assertFalse(hasattr(s, '__wrapped__'))
+
+    def test_pool_invalid_section(self):
+        c = mock.Mock()
+        c.sections.return_value = ['compile']
+        self.assertRaises(CriticalError, ParserProxy, c)
+
+    def test_pool_compile(self):
+        c = ConfigParser(interpolation=ExtendedInterpolation())
+        c.read_string('[a]\nx = 1\ny = ${x}0')
+        s = ParserProxy(c)
+        self.assertEqual(s.a.x, 1)
+        self.assertEqual(s.a.y, 10)
+
+        n = ConfigParser()
+        n.read_string('[a]\nx = 2')
+        old = s._sections
+        s.compile(n)
+        self.assertIsNot(s._sections, old)
+        self.assertIs(s._cp, n)
+        self.assertEqual(s.a.x, 2)
+        self.assertEqual(old['a'].x, 1)
+
+
+class TestReload(unittest.TestCase):
+    def setUp(self):
+        self.parser = settings.settings_pool._cp
+        self.callbacks = settings._reload_callbacks[:]
+        settings._reload_callbacks[:] = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.write('a.cfg', '[a]\nx = 1\n')
+        self.write('b.cfg', '[b]\ny = 1\n')
+        settings.reload_dir(self.tmp.name)
+
+    def tearDown(self):
+        settings._reload_callbacks[:] = self.callbacks
+        settings.settings_pool.compile(self.parser)
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        with open(os.path.join(self.tmp.name, name), 'w') as fp:
+            fp.write(data)
+
+    def test_reload_swap(self):
+        pool = settings.settings_pool
+        a = pool.a
+        self.write('a.cfg', '[a]\nx = 2\n')
+        self.assertSetEqual(settings.reload_dir(self.tmp.name), {'a'})
+        self.assertEqual(a.x, 1)
+        self.assertEqual(pool.a.x, 2)
+        self.assertIs(settings.settings_pool, pool)
+
+    def test_reload_removed(self):
+        os.remove(os.path.join(self.tmp.name, 'b.cfg'))
+        self.assertSetEqual(settings.reload_dir(self.tmp.name), {'b'})
+        self.assertRaises(NoSectionError, getattr, settings.settings_pool, 'b')
+
+    def test_reload_callbacks(self):
+        a = mock.MagicMock()
+        b = mock.MagicMock()
+        c = mock.MagicMock()
+        settings.on_reload('a')(a)
+        settings.on_reload('b')(b)
+        settings.on_reload()(c)
+
+        self.assertSetEqual(settings.reload_dir(self.tmp.name), set())
+        c.assert_not_called()
+
+        self.write('a.cfg', '[a]\nx = 2\n')
+        settings.reload_dir(self.tmp.name)
+        a.assert_called_once_with({'a'})
+        b.assert_not_called()
+        c.assert_called_once_with({'a'})
+
+    @mock.patch('webapp.settings.INotify', None)
+    def test_watcher_check(self):
+        w = settings.ConfigWatcher(self.tmp.name)
+        self.assertSetEqual(w.check(), set())
+
+        self.write('a.cfg', '[a]\nx = 10\n')
+        self.assertSetEqual(w.check(), {'a'})
+        self.assertEqual(settings.settings_pool.a.x, 10)
+        self.assertSetEqual(w.check(), set())
+
+    def test_reload_invalid(self):
+        self.write('c.cfg', '[compile]\nz = 1\n')
+        self.assertRaises(CriticalError, settings.reload_dir, self.tmp.name)
+        self.assertEqual(settings.settings_pool.a.x, 1)
+
+    def test_reload_required(self):
+        self.write('b.cfg', '')
+        self.assertRaises(CriticalError, settings.reload_dir, self.tmp.name,
+                          required={'a', 'b'})
+        self.assertEqual(settings.settings_pool.b.y, 1)
+
+    @mock.patch('webapp.settings.INotify', None)
+    def test_watcher_invalid(self):
+        w = settings.ConfigWatcher(self.tmp.name, interval=0.01)
+        self.assertSetEqual(w.required, {'a', 'b'})
+        with self.assertLogs('webapp', 'ERROR') as logs:
+            w.start()
+            self.write('b.cfg', '[b]\ny = 20\n[compile]\nz = 1\n')
+            for _ in range(200):
+                if logs.output:
+                    break
+                w._stop_event.wait(0.01)
+        self.assertTrue(w.is_alive())
+        self.assertEqual(settings.settings_pool.b.y, 1)
+
+        self.write('b.cfg', '[b]\ny = 30\n')
+        for _ in range(200):
+            if settings.settings_pool.b.y == 30:
+                break
+            w._stop_event.wait(0.01)
+        w.stop()
+        w.join()
+        self.assertEqual(settings.settings_pool.b.y, 30)
+
+    @mock.patch('webapp.settings.INotify', None)
+    def test_watcher_thread(self):
+        w = settings.ConfigWatcher(self.tmp.name, interval=0.01)
+        w.start()
+        self.write('b.cfg', '[b]\ny = 20\n')
+        for _ in range(200):
+            if settings.settings_pool.b.y == 20:
+                break
+            w._stop_event.wait(0.01)
+        w.stop()
+        w.join()
+        self.assertEqual(settings.settings_pool.b.y, 20)
 
 
 __all__ = ['TestBasicSettings', 'TestSecrets', 'TestVaultEngine',
-           'TestEnvironEngine', 'TestSettingsPool']
+           'TestEnvironEngine', 'TestSettingsPool', 'TestReload',
+           'TestCachedEngine', 'TestCachedVaultEngine', 'TestFileEngine',
+           'TestGuardedEngine']
@@ -0,0 +1,249 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from werkzeug.exceptions import NotFound
+
+from webapp import assets as assets_module
+from webapp.assets import Assets
+from webapp.static import HotCache
+from webapp.static import StaticFiles
+from webapp.webapp import core
+
+
+class TestStaticFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.tmp.name, 'js'))
+        for name in ('js/home.abcdef.js', 'robots.txt'):
+            with open(os.path.join(self.tmp.name, name), 'w') as fp:
+                fp.write('content of %s' % name)
+        self.static = StaticFiles(self.tmp.name)
+        self.static.index(['js/home.abcdef.js'])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def send_file(self, filename, **headers):
+        with core.test_request_context('/', headers=headers):
+            response = self.static.send_file(filename)
+            response.direct_passthrough = False
+            return response
+
+    def test_static_index(self):
+        self.assertSetEqual(set(self.static.etags),
+                            {'js/home.abcdef.js', 'robots.txt'})
+        self.assertEqual(self.static.etags['robots.txt'],
+                         StaticFiles.get_etag(os.path.join(self.tmp.name,
+                                                           'robots.txt')))
+
+    def test_static_secured(self):
+        r = self.send_file('js/home.abcdef.js')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_data(), b'content of js/home.abcdef.js')
+        self.assertEqual(r.get_etag(),
+                         (self.static.etags['js/home.abcdef.js'], False))
+        self.assertTrue(r.cache_control.public)
+        self.assertTrue(r.cache_control.no_cache)
+        self.assertFalse(r.cache_control.immutable)
+        self.assertIsNone(r.cache_control.max_age)
+
+    def test_static_not_secured(self):
+        r = self.send_file('robots.txt')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_etag()[0], self.static.etags['robots.txt'])
+        self.assertFalse(r.cache_control.public)
+
+    def test_static_not_modified(self):
+        etag = self.static.etags['js/home.abcdef.js']
+        with mock.patch('webapp.static.send_from_directory') as send:
+            r = self.send_file('js/home.abcdef.js',
+                               **{'If-None-Match': '"%s"' % etag})
+            send.assert_not_called()
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.get_etag(), (etag, False))
+        self.assertTrue(r.cache_control.no_cache)
+
+    def test_static_hot_cache(self):
+        self.send_file('robots.txt')
+        self.assertEqual(len(self.static.cache), 1)
+        with mock.patch('webapp.static.send_from_directory') as send:
+            r = self.send_file('robots.txt')
+            send.assert_not_called()
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_data(), b'content of robots.txt')
+        self.assertEqual(r.mimetype, 'text/plain')
+        self.assertEqual(r.get_etag()[0], self.static.etags['robots.txt'])
+
+    def test_static_hot_cache_mimetype(self):
+        with core.test_request_context('/'):
+            r1 = self.static.send_file('robots.txt', mimetype='image/x-icon')
+            r2 = self.static.send_file('robots.txt')
+        self.assertEqual(r1.mimetype, 'image/x-icon')
+        self.assertEqual(r2.mimetype, 'text/plain')
+        self.assertEqual(len(self.static.cache), 2)
+
+    def test_static_single_read(self):
+        with mock.patch('webapp.static.send_from_directory') as send, \
+                mock.patch('builtins.open', wraps=open) as open_:
+            r = self.send_file('robots.txt')
+            send.assert_not_called()
+        open_.assert_called_once()
+        self.assertEqual(r.get_data(), b'content of robots.txt')
+        self.assertIsNotNone(r.last_modified)
+        self.assertEqual(self.static.cache.get(('robots.txt', None, None))[0],
+                         b'content of robots.txt')
+
+    @mock.patch('time.monotonic')
+    def test_static_missing(self, monotonic):
+        monotonic.return_value = 100
+        with self.assertRaises(NotFound):
+            self.send_file('js/home.unknown.js')
+        self.assertIn('js/home.unknown.js', self.static.missing)
+        with mock.patch('webapp.static.send_from_directory') as send:
+            with self.assertRaises(NotFound):
+                self.send_file('js/home.unknown.js')
+            send.assert_not_called()
+
+        monotonic.return_value = 100 + StaticFiles.MISSING_TTL
+        with mock.patch('webapp.static.send_from_directory') as send:
+            self.send_file('js/home.unknown.js')
+            send.assert_called_once()
+
+    def test_static_not_indexed(self):
+        with open(os.path.join(self.tmp.name, 'new.txt'), 'w') as fp:
+            fp.write('new')
+        r = self.send_file('new.txt')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_data(), b'new')
+
+
+class TestHotCache(unittest.TestCase):
+    def test_cache_lru(self):
+        c = HotCache(max_size=10, max_item_size=6)
+        self.assertTrue(c.set('a', b'aaaa', []))
+        self.assertTrue(c.set('b', b'bbbb', []))
+        self.assertEqual(c.get('a'), (b'aaaa', []))
+        self.assertTrue(c.set('c', b'cccc', []))
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.size, 8)
+        self.assertFalse(c.set('d', b'd' * 7, []))
+        self.assertIsNone(c.get('d'))
+
+    def test_cache_replace(self):
+        c = HotCache(max_size=10)
+        c.set('a', b'aaaa', [])
+        c.set('a', b'aa', [])
+        self.assertEqual(c.size, 2)
+        c.clear()
+        self.assertEqual((len(c), c.size), (0, 0))
+
+
+class TestCompressedFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data = b'console.log("compressed");\n' * 100
+        for name in ('home.bundle.js', 'image.png'):
+            with open(os.path.join(self.tmp.name, name), 'wb') as fp:
+                fp.write(self.data)
+        self.assets = Assets('sha256')
+        self.assets.STATIC_FOLDER = self.tmp.name
+        self.encodings = self.assets.compress('home.bundle.js')
+        self.static = StaticFiles(self.tmp.name)
+        self.static.index()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def send_file(self, filename, **headers):
+        with core.test_request_context('/', headers=headers):
+            response = self.static.send_file(filename)
+            response.direct_passthrough = False
+            return response
+
+    def test_compress(self):
+        self.assertIn('gzip', self.encodings)
+        self.assertEqual(self.assets.compress('image.png'), [])
+        path = os.path.join(self.tmp.name, 'home.bundle.js')
+        with open(path + '.gz', 'rb') as fp:
+            self.assertEqual(gzip.decompress(fp.read()), self.data)
+
+    @mock.patch.object(assets_module, 'brotli', new=None)
+    def test_compress_no_brotli(self):
+        path = os.path.join(self.tmp.name, 'home.bundle.js')
+        with open(path + '.br', 'wb') as fp:
+            fp.write(b'old')
+        self.assertEqual(self.assets.compress('home.bundle.js'), ['gzip'])
+        self.assertFalse(os.path.exists(path + '.br'))
+
+    def test_compress_stale_variants(self):
+        path = os.path.join(self.tmp.name, 'home.bundle.js')
+        with open(path, 'wb') as fp:
+            fp.write(os.urandom(64))
+        self.assertEqual(self.assets.compress('home.bundle.js'), [])
+        for ext in Assets.ENCODINGS.values():
+            self.assertFalse(os.path.exists(path + ext))
+        self.static.index()
+        r = self.send_file('home.bundle.js', **{'Accept-Encoding': 'gzip'})
+        self.assertIsNone(r.content_encoding)
+
+    @mock.patch.object(assets_module, 'brotli', new=None)
+    def test_compress_all_no_brotli(self):
+        with mock.patch.object(assets_module.assets, 'STATIC_FOLDER',
+                               new=self.tmp.name), \
+                mock.patch('sys.stderr'), \
+                self.assertLogs('webapp', 'WARNING') as logs:
+            assets_module.AssetsCLI.compress_all(simulate=True)
+        self.assertIn('brotli is not installed', logs.output[0])
+
+    def test_variants(self):
+        self.assertDictEqual(
+            self.static.variants,
+            {'home.bundle.js': {e: 'home.bundle.js' + Assets.ENCODINGS[e]
+                                for e in self.encodings}})
+
+    def test_send_gzip(self):
+        r = self.send_file('home.bundle.js', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(r.content_encoding, 'gzip')
+        self.assertEqual(r.mimetype, 'text/javascript')
+        self.assertIn('Accept-Encoding', r.vary)
+        self.assertEqual(gzip.decompress(r.get_data()), self.data)
+        etag = r.get_etag()[0]
+        self.assertEqual(etag, self.static.etags['home.bundle.js'] + '-gzip')
+
+        r = self.send_file('home.bundle.js', **{'Accept-Encoding': 'gzip',
+                                                'If-None-Match': etag})
+        self.assertEqual(r.status_code, 304)
+
+    @unittest.skipIf(assets_module.brotli is None, 'brotli is not installed')
+    def test_send_brotli(self):
+        r = self.send_file('home.bundle.js',
+                           **{'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(r.content_encoding, 'br')
+        self.assertEqual(assets_module.brotli.decompress(r.get_data()),
+                         self.data)
+
+    def test_send_identity(self):
+        r = self.send_file('home.bundle.js')
+        self.assertIsNone(r.content_encoding)
+        self.assertIn('Accept-Encoding', r.vary)
+        self.assertEqual(r.get_data(), self.data)
+        self.assertEqual(r.get_etag()[0], self.static.etags['home.bundle.js'])
+
+
+__all__ = ['TestStaticFiles', 'TestHotCache', 'TestCompressedFiles']
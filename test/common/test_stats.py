@@ -0,0 +1,143 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import unittest
+from configparser import ConfigParser
+from unittest import mock
+
+from werkzeug.exceptions import Forbidden
+from werkzeug.exceptions import NotFound
+
+from webapp import settings
+from webapp.blueprint.debug.backend import api as debug_api
+from webapp.settings import InstrumentedSectionProxy
+from webapp.settings import ParserProxy
+from webapp.settings import Secrets
+from webapp.stats import Stats
+from webapp.stats import stats
+from webapp.webapp import core
+
+
+class TestStats(unittest.TestCase):
+    def test_obj_create(self):
+        s = Stats()
+        self.assertFalse(s.enabled)
+        self.assertListEqual(s.totals(), [])
+
+    def test_record(self):
+        s = Stats()
+        s.record('settings', 'a.b', 1)
+        s.record('settings', 'a.b', 2)
+        s.record('secrets', 'KEY')
+        self.assertTupleEqual(s.get('settings', 'a.b'), (2, 3))
+        self.assertTupleEqual(s.get('secrets', 'KEY'), (1, 0))
+        self.assertTupleEqual(s.get('secrets', 'UNDEFINED'), (0, 0))
+
+    def test_totals(self):
+        s = Stats()
+        s.record('a', 'fast', 1)
+        s.record('a', 'slow', 5)
+        r = s.totals()
+        self.assertListEqual([e['name'] for e in r], ['slow', 'fast'])
+        self.assertDictEqual(r[0], dict(kind='a', name='slow', count=1,
+                                        time=5))
+        s.reset()
+        self.assertListEqual(s.totals(), [])
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        stats.reset()
+        stats.enabled = True
+
+    def tearDown(self):
+        stats.enabled = False
+        stats.reset()
+
+    def test_section_proxy(self):
+        c = ConfigParser()
+        c.read_string('[a]\nx = 1')
+        s = InstrumentedSectionProxy(c, 'a')
+        self.assertEqual(s.x, 1)
+        self.assertEqual(s.x, 1)
+        self.assertEqual(stats.get('settings', 'a.x')[0], 2)
+
+    @mock.patch('webapp.settings._default_section_proxy',
+                InstrumentedSectionProxy)
+    def test_parser_proxy(self):
+        c = ConfigParser()
+        c.read_string('[a]\nx = 1')
+        s = ParserProxy(c)
+        self.assertEqual(s.a.x, 1)
+        self.assertEqual(stats.get('compile', 'a')[0], 1)
+        self.assertEqual(stats.get('settings', 'a.x')[0], 1)
+
+    def test_secrets(self):
+        s = Secrets(mock.MagicMock())
+        s.engine.get_value.return_value = 'value'
+        s.get_value('KEY')
+        s.prefetch(['KEY'])
+        self.assertEqual(stats.get('secrets', 'KEY')[0], 1)
+        self.assertEqual(stats.get('secrets', '<prefetch>')[0], 1)
+
+    def test_disabled(self):
+        stats.enabled = False
+        s = Secrets(mock.MagicMock())
+        s.get_value('KEY')
+        self.assertListEqual(stats.totals(), [])
+
+    def test_enable(self):
+        pool = mock.MagicMock()
+        with mock.patch.object(settings, 'settings_pool', new=pool), \
+                mock.patch.object(settings, '_default_section_proxy'):
+            stats.enabled = False
+            settings.enable_instrumentation()
+            self.assertTrue(stats.enabled)
+            self.assertIs(settings._default_section_proxy,
+                          InstrumentedSectionProxy)
+            pool.compile.assert_called_once_with()
+
+    def get_totals(self, enabled=True, token='', **kwargs):
+        kwargs.setdefault('environ_base', {'REMOTE_ADDR': '127.0.0.1'})
+        pool = mock.MagicMock()
+        pool.server.stats_endpoint = enabled
+        with mock.patch.object(debug_api, 'settings', new=pool), \
+                mock.patch.object(debug_api, 'get_secret',
+                                  return_value=token), \
+                core.test_request_context('/api/v1/debug/stats', **kwargs):
+            return debug_api.stats_totals()
+
+    def test_endpoint(self):
+        stats.record('settings', 'a.x', 1)
+        r = self.get_totals()
+        self.assertEqual(r['stats'][0]['name'], 'a.x')
+
+    def test_endpoint_disabled(self):
+        self.assertRaises(NotFound, self.get_totals, enabled=False)
+        stats.enabled = False
+        self.assertRaises(NotFound, self.get_totals)
+
+    def test_endpoint_remote(self):
+        remote = {'REMOTE_ADDR': '203.0.113.1'}
+        self.assertRaises(Forbidden, self.get_totals, environ_base=remote)
+        self.assertRaises(Forbidden, self.get_totals,
+                          headers={'X-Forwarded-For': '203.0.113.1'})
+        self.assertRaises(Forbidden, self.get_totals, token='secret',
+                          environ_base=remote,
+                          headers={'Authorization': 'Bearer other'})
+        r = self.get_totals(token='secret', environ_base=remote,
+                            headers={'Authorization': 'Bearer secret'})
+        self.assertIn('stats', r)
+
+
+__all__ = ['TestStats', 'TestInstrumentation']
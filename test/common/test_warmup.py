@@ -0,0 +1,92 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+from babel import Locale
+
+from webapp import locales
+from webapp import warmup
+from webapp.warmup import WarmUp
+from webapp.webapp import core
+
+
+class TestWarmUp(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(warmup, 'languages',
+                                    new=[Locale('es'), Locale('en')])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.paths = []
+
+    def get(self, path, **query):
+        self.paths.append((path, query))
+        return 200
+
+    def test_pages(self):
+        warm = WarmUp(core, token='abc')
+        with mock.patch.object(warm, 'get', side_effect=self.get):
+            warm.warm_pages()
+        self.assertEqual(len(self.paths), len(warmup.PAGES) * 2 * 2)
+        self.assertIn(('/', {'locale': 'en', '__token': 'abc'}), self.paths)
+        self.assertIn(('/tac/', {'locale': 'es'}), self.paths)
+
+    def test_pages_without_token(self):
+        warm = WarmUp(core)
+        with mock.patch.object(warm, 'get', side_effect=self.get):
+            warm.warm_pages()
+        self.assertEqual(len(self.paths), len(warmup.PAGES) * 2)
+
+    def test_translations(self):
+        index = MappingProxyType({('home', 'es'): None, ('auth', 'en'): None})
+        warm = WarmUp(core)
+        with mock.patch.object(warm, 'get', side_effect=self.get), \
+                mock.patch.object(locales.i18n, 'index', new=index):
+            warm.warm_translations()
+        self.assertListEqual(self.paths, [('/api/v1/i18n/home/es', {}),
+                                          ('/api/v1/i18n/auth/en', {})])
+
+    def test_translations_with_token(self):
+        index = MappingProxyType({('home', 'es'): None})
+        warm = WarmUp(core, token='abc')
+        with mock.patch.object(warm, 'get', side_effect=self.get), \
+                mock.patch.object(locales.i18n, 'index', new=index):
+            warm.warm_translations()
+        self.assertListEqual(self.paths, [('/api/v1/i18n/home/es',
+                                           {'__token': 'abc'})])
+
+    def test_locales(self):
+        with mock.patch.object(warmup, 'negotiate_locale') as negotiate:
+            WarmUp.warm_locales()
+        headers = [c.args[0] for c in negotiate.call_args_list]
+        self.assertListEqual(headers, list(warmup.ACCEPT_LANGUAGES))
+        self.assertIn('en-US,en;q=0.9', headers)
+
+    def test_run(self):
+        warm = WarmUp(core)
+        warm.steps = []
+        step = mock.MagicMock()
+        warm.add('first', step, 1, 2)
+        warm.add('broken', mock.MagicMock(side_effect=ValueError))
+        warm.add('last', step, 3)
+        with mock.patch.object(warmup, 'logger') as logger:
+            timings = warm.run()
+        self.assertListEqual(list(timings), ['first', 'broken', 'last'])
+        self.assertListEqual(step.call_args_list,
+                             [mock.call(1, 2), mock.call(3)])
+        logger.exception.assert_called_once()
+
+
+__all__ = ['TestWarmUp']
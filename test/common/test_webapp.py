@@ -0,0 +1,71 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from jinja2 import DictLoader
+from jinja2 import Environment
+
+from webapp.webapp import TemplateCache
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.folder = os.path.join(self.tmp.name, 'templates')
+        self.templates = {'page.html': 'Hello {{ name }}'}
+
+    def new_env(self, salt=''):
+        return Environment(loader=DictLoader(self.templates),
+                           bytecode_cache=TemplateCache(self.folder, salt))
+
+    def render(self, env):
+        return env.get_template('page.html').render(name='world')
+
+    def test_shared(self):
+        self.assertEqual(self.render(self.new_env()), 'Hello world')
+        self.assertEqual(len(os.listdir(self.folder)), 1)
+        env = self.new_env()
+        with mock.patch.object(env, 'compile', wraps=env.compile) as compile:
+            self.assertEqual(self.render(env), 'Hello world')
+            compile.assert_not_called()
+
+    def test_source_changed(self):
+        self.render(self.new_env())
+        self.templates['page.html'] = 'Bye {{ name }}'
+        self.assertEqual(self.render(self.new_env()), 'Bye world')
+
+    def test_salt(self):
+        self.render(self.new_env())
+        self.render(self.new_env(salt='filler'))
+        self.assertEqual(len(os.listdir(self.folder)), 2)
+
+    def test_get_salt(self):
+        extensions = {'a.Filler': mock.MagicMock()}
+        source = os.path.join(self.tmp.name, 'filler.py')
+        with open(source, 'w') as fp:
+            fp.write('TEXT_RE = 1')
+        with mock.patch('inspect.getsourcefile', return_value=source):
+            salt = TemplateCache.get_salt(extensions)
+            self.assertEqual(TemplateCache.get_salt(extensions), salt)
+            with open(source, 'w') as fp:
+                fp.write('TEXT_RE = 2')
+            self.assertNotEqual(TemplateCache.get_salt(extensions), salt)
+        self.assertNotEqual(TemplateCache.get_salt({}), salt)
+
+
+__all__ = ['TestTemplateCache']
@@ -14,7 +14,11 @@
 from . import blueprint
 from . import callbacks
 from . import csp
+from . import pagecache
+from . import preload
 from . import settings
+from . import static
 from .webapp import core
 
-__all__ = ['core', 'csp', 'callbacks', 'settings', 'blueprint']
+__all__ = ['core', 'csp', 'callbacks', 'settings', 'blueprint',
+           'pagecache', 'preload', 'static']
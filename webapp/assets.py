@@ -12,19 +12,30 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import base64
+import functools
+import gzip
 import hashlib
+import json
 import os
 import re
 import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import url_for
 
 from .common import Reactor
+from .logger import logger
 from .settings import get_secret
 from .settings import settings_pool
 from .webapp import core
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-cfg = settings_pool.security
 hash_stack = {}
 
 
@@ -38,6 +49,10 @@ class Assets:
 
     """
     STATIC_FOLDER = core.static_folder
+    COMPRESS_EXTENSIONS = frozenset(['.css', '.html', '.ico', '.js', '.json',
+                                     '.map', '.svg', '.txt', '.xml'])
+    ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+    CHUNK_SIZE = 64 * 1024
     REGEX_REPLACE = re.compile('[^a-zA-Z]')
     FILE_FORMATTER = '{basename}.{hashsum}{ext}'
 
@@ -49,6 +64,9 @@ class Assets:
         self._salt = salt
         self._algm = algm
         self._cache = {}
+        self.names = {}
+        self.urls = {}
+        self.version = ''
 
     def update_salt(self, salt: bytes) -> None:
         """
@@ -98,6 +116,27 @@ class Assets:
             file_id = file_id.decode('utf8')
         return self.REGEX_REPLACE.sub('', file_id)
 
+    @classmethod
+    def hash_file(cls, path: str) -> str:
+        """
+        Generates the SHA-256 of the content of a file.
+
+        :param path: Location of the file.
+        :return: returns the hexadecimal digest.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(cls.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_salt_id(self) -> str:
+        """
+        Returns an identifier of the salt, it is used to know if the secured
+        names of a previous run are still valid.
+        """
+        return hashlib.sha256(self._salt or b'').hexdigest()[:16]
+
     def get_file_hash(self, filename: str):
         """
         Generates a hash identifier from the name of a supplied file.
@@ -129,6 +168,123 @@ class Assets:
         filename = self.format(basename=basename, hashsum=hashsum, ext=ext)
         return os.path.join(dirname, filename)
 
+    @staticmethod
+    def get_url(filename: str) -> str:
+        """
+        Returns the URL of a file in the static folder, without the need of
+        an application context.
+
+        :param filename: Relative path of the file in the folder
+        :return: Returns the URL path of the file
+        """
+        return '%s/%s' % (core.static_url_path, filename)
+
+    def build_manifest(self, filenames: list) -> dict:
+        """
+        Create the manifest of the secured files, it has the secured name and
+        the final URL of every file.
+
+        :param filenames: The original names of the files.
+        :return: A ``dict`` like ``{filename: {'name': ..., 'url': ...}}``
+        """
+        manifest = {}
+        for filename in filenames:
+            name = self.secure_filename(filename)
+            manifest[filename] = {'name': name, 'url': self.get_url(name)}
+        return manifest
+
+    @staticmethod
+    def save_manifest(path: str, manifest: dict) -> None:
+        """
+        Write the manifest, the entries of a previous manifest in the same
+        location are preserved (unless they have been replaced).
+
+        :param path: Location of the manifest.
+        :param manifest: The manifest created by ``build_manifest``.
+        """
+        if os.path.exists(path):
+            with open(path) as fp:
+                manifest = dict(json.load(fp), **manifest)
+
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump(manifest, fp, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def load_manifest(self, path: str) -> bool:
+        """
+        Load the manifest written by ``AssetsCLI``, so that the secured names
+        and URLs of the files are obtained with a lookup in a ``dict``. The
+        ``version`` of the assets is taken from the content of the manifest.
+
+        :param path: Location of the manifest.
+        :return: Returns ``True`` if the manifest was loaded, otherwise,
+            returns ``False``
+        """
+        if not os.path.exists(path):
+            return False
+
+        with open(path, 'rb') as fp:
+            raw = fp.read()
+        manifest = json.loads(raw)
+        self.names = {k: v['name'] for k, v in manifest.items()}
+        self.urls = {k: v['url'] for k, v in manifest.items()}
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        return True
+
+    @staticmethod
+    def compress_data(data: bytes, encoding: str) -> bytes:
+        """
+        Compress the data with the highest level of an encoding.
+
+        :param data: The content of a file.
+        :param encoding: The name of the encoding (``br`` or ``gzip``)
+        :return: The compressed data.
+        """
+        if encoding == 'br':
+            return brotli.compress(data, quality=11)
+        return gzip.compress(data, compresslevel=9, mtime=0)
+
+    @staticmethod
+    def remove_variant(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def compress(self, filename: str) -> list:
+        """
+        Write the compressed variants of a file next to it (like
+        ``home.bundle.js.gz`` and ``home.bundle.js.br``), only if they are
+        smaller than the original file. The ``br`` variant requires the
+        ``brotli`` package. The variants that are not written are removed,
+        so a variant of a previous version of the file is never served.
+
+        :param filename: Relative path of the file in the static folder.
+        :return: The encodings of the variants written.
+        """
+        if os.path.splitext(filename)[1] not in self.COMPRESS_EXTENSIONS:
+            return []
+
+        abspath = self.get_abspath(filename)
+        with open(abspath, 'rb') as fp:
+            data = fp.read()
+
+        written = []
+        for encoding, ext in self.ENCODINGS.items():
+            if encoding == 'br' and brotli is None:
+                self.remove_variant(abspath + ext)
+                continue
+            compressed = self.compress_data(data, encoding)
+            if len(compressed) >= len(data):
+                self.remove_variant(abspath + ext)
+                continue
+            with open(abspath + ext + '.tmp', 'wb') as fp:
+                fp.write(compressed)
+            os.replace(abspath + ext + '.tmp', abspath + ext)
+            written.append(encoding)
+        return written
+
 
 assets = Assets('sha256', salt=b'')
 
@@ -141,51 +297,224 @@ class AssetsCLI(Reactor):
         self.parser = parent.add_parser(self.name, help='Actions in Assets')
 
         self.parser.add_argument('-s', '--secure', action='store_true')
+        self.parser.add_argument(
+            '-c', '--compress',
+            help='Write the gzip and brotli variants of every file in the '
+                 'static folder. It must run after --secure (or in the same '
+                 'command), so the variants have the secured names. The '
+                 'brotli variants require the "brotli" extra.',
+            action='store_true',
+        )
         self.parser.add_argument(
             '-f', '--from-file',
             dest='filename',
             metavar=('filename',),
-            required=True
         )
         self.parser.add_argument('--simulate', action='store_true')
         self.parser.add_argument('--salt', metavar='TEXT', type=str)
+        self.parser.add_argument(
+            '-j', '--jobs',
+            help='Number of processes used to secure the files (by default, '
+                 'the number of CPUs).',
+            metavar='<number>',
+            type=int,
+        )
+        self.parser.add_argument(
+            '-m', '--manifest',
+            help='Location of the manifest of the secured files.',
+            metavar='<filename>',
+        )
 
     @staticmethod
-    def secure(filename: str, simulate: bool = True):
-        abspath = assets.get_abspath(filename)
-        if not os.path.exists(abspath):
-            print('file not found: %s', filename, file=sys.stderr)
-            exit(1)
-        dst = assets.secure_filename(filename)
-        if not simulate:
-            shutil.move(assets.get_abspath(filename), assets.get_abspath(dst))
-        print(f'rename: {filename}  ->  {dst}',  file=sys.stderr)
+    def load_state(path: str) -> dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as fp:
+            return json.load(fp)
 
-    def secure_by_list(self, file_list: str, **kwargs):
+    @staticmethod
+    def save_state(path: str, state: dict) -> None:
+        with open(path + '.tmp', 'w') as fp:
+            json.dump(state, fp, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def map(func: callable, items: list, jobs: int = None):
+        if jobs == 1 or len(items) < 2:
+            return map(func, items)
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        chunksize = max(1, len(items) // ((jobs or os.cpu_count()) * 4))
+        try:
+            return list(executor.map(func, items, chunksize=chunksize))
+        finally:
+            executor.shutdown()
+
+    @staticmethod
+    def swap(changed: dict, unchanged: list) -> None:
+        """
+        Link (or copy) every changed file into a staging folder, and then
+        move them to their secured names with ``os.replace``. Nothing in the
+        static folder is modified if the staging fails.
+
+        The secured name of a file does not change with its content, so the
+        compressed variants of the previous content are removed (they are
+        written again by ``--compress``)
+        """
+        staging = assets.get_abspath('.staging-%d' % os.getpid())
+        try:
+            for filename, name in changed.items():
+                dst = os.path.join(staging, name)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                try:
+                    os.link(assets.get_abspath(filename), dst)
+                except OSError:
+                    shutil.copy2(assets.get_abspath(filename), dst)
+
+            for filename, name in changed.items():
+                abspath = assets.get_abspath(name)
+                for ext in Assets.ENCODINGS.values():
+                    Assets.remove_variant(abspath + ext)
+                os.replace(os.path.join(staging, name), abspath)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        for filename in list(changed) + unchanged:
+            os.unlink(assets.get_abspath(filename))
+
+    def secure_by_list(self, file_list: str, manifest: str, state_path: str,
+                       jobs: int = None, simulate: bool = True):
+        start = time.monotonic()
         with open(file_list) as fp:
-            data = fp.read().splitlines()
+            data = [line for line in fp.read().splitlines() if line]
+
+        state = self.load_state(state_path)
+        salt_id = assets.get_salt_id()
+        files = state.get('files', {}) if state.get('salt') == salt_id else {}
+
+        results = {}
+        pending = []
         for filename in data:
-            self.secure(filename, **kwargs)
+            entry = files.get(filename)
+            if os.path.exists(assets.get_abspath(filename)):
+                pending.append((filename, entry))
+            elif entry and os.path.exists(assets.get_abspath(entry['name'])):
+                results[filename] = entry
+            else:
+                print('file not found: %s' % filename, file=sys.stderr)
+                exit(1)
+
+        job = functools.partial(secure_file, assets._algm, assets._salt,
+                                assets.STATIC_FOLDER)
+        changed = {}
+        unchanged = []
+        total = len(pending)
+        for i, (filename, entry) in enumerate(self.map(job, pending, jobs), 1):
+            results[filename] = entry
+            if (files.get(filename) == entry and
+                    os.path.exists(assets.get_abspath(entry['name']))):
+                unchanged.append(filename)
+                continue
+            changed[filename] = entry['name']
+            print(f'[{i}/{total}] rename: {filename}  ->  {entry["name"]}',
+                  file=sys.stderr)
+
+        if not simulate:
+            self.swap(changed, unchanged)
+            self.save_state(state_path, {'salt': salt_id, 'files': results})
+            assets.save_manifest(manifest, {
+                k: {'name': v['name'], 'url': assets.get_url(v['name'])}
+                for k, v in results.items()})
+            print(f'manifest: {manifest}', file=sys.stderr)
+
+        elapsed = time.monotonic() - start
+        print(f'secured {len(changed)} files, '
+              f'{len(data) - len(changed)} unchanged, in {elapsed:.2f}s',
+              file=sys.stderr)
+
+    @staticmethod
+    def compress_all(simulate: bool = True):
+        if brotli is None:
+            logger.warning('brotli is not installed, only the gzip variants '
+                           'are written (install webapp[brotli])')
+        for root, _, files in os.walk(assets.STATIC_FOLDER):
+            for name in files:
+                filename = os.path.relpath(os.path.join(root, name),
+                                           assets.STATIC_FOLDER)
+                if simulate:
+                    ext = os.path.splitext(filename)[1]
+                    if ext in assets.COMPRESS_EXTENSIONS:
+                        print(f'compress: {filename}', file=sys.stderr)
+                    continue
+                encodings = assets.compress(filename)
+                if encodings:
+                    print(f'compress: {filename}  ->  {", ".join(encodings)}',
+                          file=sys.stderr)
 
     def process(self, args):
-        if args.salt:
-            salt = args.salt
-        else:
-            salt = get_secret('ASSETS_SALT')
+        if not args.secure and not args.compress:
+            self.parser.print_help()
+            return
 
-        assets.update_salt(salt)
         if args.secure:
-            self.secure_by_list(args.filename, simulate=args.simulate)
-        else:
-            self.parser.print_help()
+            if args.filename is None:
+                self.parser.error('the following arguments are required: -f')
+            if args.salt:
+                salt = args.salt
+            else:
+                salt = get_secret('ASSETS_SALT')
+
+            assets.update_salt(salt)
+            manifest = args.manifest or settings_pool.server.assets_manifest
+            self.secure_by_list(args.filename, manifest,
+                                settings_pool.server.assets_state,
+                                jobs=args.jobs, simulate=args.simulate)
+        if args.compress:
+            self.compress_all(simulate=args.simulate)
+
+
+def secure_file(algm: str, salt: bytes, folder: str, job: tuple) -> tuple:
+    """
+    Compute the secured name of a file, the name of the previous run is
+    reused when the content of the file has not changed.
+
+    :param algm: Name of the hash algorithm, used to secure the files.
+    :param salt: Unique and secret key used to secure files.
+    :param folder: Location of the static folder.
+    :param job: A tuple like ``(filename, entry)``, where ``entry`` is the
+        state of the file in the previous run (or ``None``)
+    :return: A tuple like ``(filename, {'hash': ..., 'name': ...})``
+    """
+    filename, entry = job
+    digest = Assets.hash_file(os.path.join(folder, filename))
+    if entry is not None and entry['hash'] == digest:
+        return filename, entry
+    name = Assets(algm, salt).secure_filename(filename)
+    return filename, {'hash': digest, 'name': name}
 
 
 def sf(filename: str):
     if settings_pool.server.debug_mode:
         return filename
-    return assets.secure_filename(filename)
+    try:
+        return assets.names[filename]
+    except KeyError:
+        return assets.secure_filename(filename)
+
+
+def static_url(filename: str):
+    """
+    Returns the URL of a static file, it is the same as
+    ``url_for('static', filename=sf(filename))``.
+
+    :param filename: Original name of the file.
+    :return: Returns the URL path of the file
+    """
+    try:
+        return assets.urls[filename]
+    except KeyError:
+        return url_for('static', filename=sf(filename))
 
 
 @core.context_processor
 def ctx_sf():
-    return dict(sf=sf)
+    return dict(sf=sf, static_url=static_url)
@@ -4,8 +4,10 @@ $(function(){
             document.cookie = "locale=" + lang + ";samesite=lax;path=/";
             console.log(lang);
             $('html').attr("lang", lang)
-            $.i18n({ locale: lang});
-            $("body").i18n();
-            $("head").i18n();
+            load_locale(lang).done(function () {
+                $.i18n({ locale: lang});
+                $("body").i18n();
+                $("head").i18n();
+            });
     });
 });
@@ -1,18 +1,20 @@
-import es from 'locales/es.json';
-import en from 'locales/en.json';
-import ja from 'locales/ja.json';
+// The translations of the page are requested to the server, only with the
+// keys used by the page (see LocalesCLI), the missing keys are already
+// filled in from the fallback languages.
+window.load_locale = function (lang) {
+    var page = $('html').attr("data-i18n-page");
+    var sources = {};
+    sources[lang] = '/api/v1/i18n/' + page + '/' + lang;
+    return $.i18n().load(sources);
+}
 
 
 jQuery(document).ready(function (e) {
     e.i18n.debug = !0;
     var default_lang = $('html').attr("lang");
-    var r = e.i18n({locale: default_lang});
+    e.i18n({locale: default_lang});
 
-    r.load({
-        'es': es,
-        'en': en,
-        'ja': ja
-    }).done(
+    load_locale(default_lang).done(
         function () {
                 e("body").i18n()
                 e("head").i18n()
@@ -16,7 +16,9 @@ from . import favicon
 from .api import bp_api
 from .auth import bp_frontend_auth
 from .cv import bp_api_cv
+from .debug import bp_api_debug
 from .home import bp_frontend_home
+from .i18n import bp_api_i18n
 from .privacy import bp_frontend_pp
 from .tac import bp_frontend_tac
 from webapp.webapp import core
@@ -29,7 +31,9 @@ __all__ = [
     'bp_api',
     'bp_frontend_auth',
     'bp_api_cv',
+    'bp_api_debug',
     'bp_frontend_home',
+    'bp_api_i18n',
     'bp_frontend_pp',
     'bp_frontend_tac',
 ]
@@ -19,8 +19,9 @@ from flask_wtf import csrf
 from ..backend import oauth
 from ..backend.forms import get_auth_form
 from ..backend.security.tools import unauthenticated_only
-from webapp.assets import sf
 from webapp.locales import i18n
+from webapp.preload import BASE_LINKS
+from webapp.preload import preloads
 from webapp.webapp import core
 
 bp_frontend_auth = Blueprint('frontend_auth', __name__, url_prefix='/auth')
@@ -28,7 +29,7 @@ bp_frontend_auth = Blueprint('frontend_auth', __name__, url_prefix='/auth')
 
 @bp_frontend_auth.context_processor
 def ctx_auth():
-    i18n_data = i18n.load(sf('locales/auth/%s.json' % get_locale().language))
+    i18n_data = i18n.get('auth', get_locale().language)
 
     return dict(
         i18n=i18n_data,
@@ -38,6 +39,9 @@ def ctx_auth():
     )
 
 
+preloads.register(bp_frontend_auth, 'auth', BASE_LINKS)
+
+
 @bp_frontend_auth.route('/', methods=['GET'])
 @unauthenticated_only
 def auth_code():
@@ -0,0 +1,57 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hmac
+
+from flask import abort
+from flask import Blueprint
+from flask import request
+
+from webapp.blueprint.api import bp_api
+from webapp.settings import get_secret
+from webapp.settings import settings_pool as settings
+from webapp.stats import stats
+
+bp_api_debug = Blueprint('debug', __name__, url_prefix='/debug')
+bp_api.register_blueprint(bp_api_debug)
+
+LOOPBACK = frozenset(['127.0.0.1', '::1'])
+
+
+def is_allowed() -> bool:
+    """
+    The totals include the names of the settings and the secrets, so they
+    are only sent to the clients of the same host (that are not behind a
+    proxy), or to the ones with the ``STATS_TOKEN`` secret as bearer token.
+    """
+    if (request.remote_addr in LOOPBACK and
+            'X-Forwarded-For' not in request.headers):
+        return True
+    token = get_secret('STATS_TOKEN', default='')
+    if not token:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    return hmac.compare_digest(authorization.encode('utf-8'),
+                               ('Bearer %s' % token).encode('utf-8'))
+
+
+@bp_api_debug.route('/stats', methods=['GET'])
+def stats_totals():
+    if not stats.enabled or not settings.server.stats_endpoint:
+        abort(404)
+    if not is_allowed():
+        abort(403)
+    return dict(stats=stats.totals())
+
+
+__all__ = ['bp_api_debug']
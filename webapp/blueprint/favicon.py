@@ -11,17 +11,12 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-import os
-
-from flask import send_from_directory as send
-
 from ..assets import sf
+from ..static import static_files
 from ..webapp import core
 
-_static = os.path.join(core.static_folder, 'multimedia/images')
-
 
 @core.route('/favicon.ico')
 def favicon():
-    filename = os.path.basename(sf('multimedia/images/favicon.ico'))
-    return send(_static, filename, mimetype='image/vnd.microsoft.icon')
+    return static_files.send_file(sf('multimedia/images/favicon.ico'),
+                                  mimetype='image/vnd.microsoft.icon')
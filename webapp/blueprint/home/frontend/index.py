@@ -11,48 +11,31 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-import re
-
 from flask import Blueprint
-from flask import render_template
 from flask_babel import get_locale
 
-from webapp.assets import sf
 from webapp.blueprint.auth.backend.security.tools import access_token_needed
 from webapp.blueprint.auth.backend.security.tools import is_authenticated
 from webapp.locales import i18n
+from webapp.pagecache import page_cache
+from webapp.preload import BASE_LINKS
+from webapp.preload import preloads
+from webapp.render import render_page
 
 bp_frontend_home = Blueprint('frontend_home', __name__, url_prefix='/')
 
-regex = {
-    'skills': re.compile(r'^skill-(?P<n>\d{1,2})$'),
-    'edu': re.compile(r'^(?P<n>\d{1,2})-edu-degree$'),
-    'wxp': re.compile(r'^(?P<n>\d{1,2})-w-xp-comp$'),
-    'vxp': re.compile(r'^(?P<n>\d{1,2})-v-xp-comp$'),
-    'crt': re.compile(r'^(?P<n>\d{1,2})-crt-img$'),
-    'icon': re.compile(r'^(?P<n>\d{1,2})-icon-url$'),
-}
+
+def get_bp_name():
+    if is_authenticated():
+        return 'home'
+    return 'home-limited'
 
 
 @bp_frontend_home.context_processor
 def ctx_home():
-    if is_authenticated():
-        bp_name = 'home'
-    else:
-        bp_name = 'home-limited'
-
+    bp_name = get_bp_name()
     lang = get_locale().language
-    i18n_data = i18n.load(sf('locales/%s/%s.json' % (bp_name, lang)))
-
-    def get_number(name, mod, chk=True):
-        for key in i18n_data.get_data().keys():
-            r = regex[name].match(key)
-            if r is None:
-                continue
-
-            if chk and int(r.group('n')) % 2 != mod:
-                continue
-            yield r.group('n')
+    i18n_data = i18n.get(bp_name, lang)
 
     class AOSDelay:
         def __init__(self):
@@ -65,17 +48,20 @@ def ctx_home():
             return delay
 
     return dict(
-        get_number=get_number,
         get_delay=AOSDelay().get_delay,
         i18n=i18n_data,
         bp_name=bp_name,
     )
 
 
+preloads.register(bp_frontend_home, get_bp_name, BASE_LINKS)
+
+
 @bp_frontend_home.route('/', methods=['GET'])
 @access_token_needed
+@page_cache.cached(get_bp_name)
 def home_page():
-    return render_template('home/index.html')
+    return render_page('home/index.html')
 
 
 __all__ = ['bp_frontend_home']
@@ -0,0 +1,79 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import json
+import os
+
+from flask import abort
+from flask import Blueprint
+from flask import g
+from flask import request
+from flask import Response
+
+from webapp.blueprint.api import bp_api
+from webapp.blueprint.auth.backend.security.tools import is_authenticated
+from webapp.locales import i18n
+from webapp.locales import Locales
+from webapp.static import static_files
+
+bp_api_i18n = Blueprint('i18n', __name__, url_prefix='/i18n')
+bp_api.register_blueprint(bp_api_i18n)
+
+# Translations with private data, they are only sent to the authenticated
+# users (the others receive ``home-limited``, see ``get_bp_name``)
+PROTECTED = frozenset(['home'])
+
+
+def send_translation(bp_name: str, lang: str) -> Response:
+    """
+    Send the whole translation of the index (with the keys filled in from
+    the fallback languages), used until the subsets are written.
+    """
+    data = i18n.index[(bp_name, lang)].get_data()
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                      sort_keys=True).encode('utf-8')
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha256(body).hexdigest()[:32])
+    return response.make_conditional(request)
+
+
+@bp_api_i18n.route('/<bp_name>/<lang>', methods=['GET'])
+def translation(bp_name, lang):
+    g.no_json = True
+    if (bp_name, lang) not in i18n.index:
+        abort(404)
+    protected = bp_name in PROTECTED
+    if protected and not is_authenticated():
+        abort(403)
+
+    filename = Locales.get_subset_filename(bp_name, lang)
+    if (filename in static_files.etags or
+            os.path.exists(i18n.get_abspath(filename))):
+        response = static_files.send_file(filename,
+                                          mimetype='application/json')
+    else:
+        response = send_translation(bp_name, lang)
+
+    # the URL does not change with the content, the client must revalidate
+    if protected:
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.vary.add('Cookie')
+    else:
+        response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+
+__all__ = ['bp_api_i18n']
@@ -14,6 +14,8 @@
 from flask import Blueprint
 from flask import render_template
 
+from webapp.pagecache import page_cache
+from webapp.preload import preloads
 from webapp.settings import settings_pool as settings
 
 bp_frontend_pp = Blueprint('frontend_pp', __name__, url_prefix='/privacy')
@@ -24,7 +26,11 @@ def ctx_tac():
     return dict(bp_name='privacy', review_date=settings.privacy.review_date)
 
 
+preloads.register(bp_frontend_pp, 'privacy')
+
+
 @bp_frontend_pp.route('/', methods=['GET'])
+@page_cache.cached()
 def privacy_page():
     return render_template('privacy/index.html')
 
@@ -14,6 +14,9 @@
 from flask import Blueprint
 from flask import render_template
 
+from webapp.pagecache import page_cache
+from webapp.preload import preloads
+
 bp_frontend_tac = Blueprint('frontend_tac', __name__, url_prefix='/tac')
 
 
@@ -22,7 +25,11 @@ def ctx_tac():
     return dict(bp_name='tac')
 
 
+preloads.register(bp_frontend_tac, 'tac')
+
+
 @bp_frontend_tac.route('/', methods=['GET'])
+@page_cache.cached()
 def tac_page():
     return render_template('tac/index.html')
 
@@ -12,6 +12,8 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import argparse
+import base64
+import os
 import sys
 from argparse import RawDescriptionHelpFormatter as HelpFormatter
 
@@ -19,11 +21,18 @@ from .assets import AssetsCLI
 from .blueprint import auth
 from .common import Reactor
 from .exceptions import CriticalError
+from .locales import LocalesCLI
+from .settings import DEFAULT_NULL_RANDOM
 from .settings import EnvironEngine
+from .settings import FileEngine
+from .settings import get_file_engine
 from .settings import get_vault_engine
 from .settings import load_dir
+from .settings import prefetch_secrets
+from .settings import Secrets
 from .settings import set_secret_engine
 from .settings import settings_pool as settings
+from .stats import StatsCLI
 
 
 class CustomHelper(HelpFormatter):
@@ -62,7 +71,7 @@ class ParserReactor(Reactor):
         self.parser.add_argument(
             '--secret-engine', '-se',
             type=str,
-            choices=('vault', 'environ'),
+            choices=('vault', 'environ', 'file'),
             dest='engine'
         )
         self.sub_parser = self.parser.add_subparsers(
@@ -87,6 +96,67 @@ class ParserReactor(Reactor):
         reactor.process(args)
 
 
+class SecretsCLI(Reactor):
+    def __init__(self, parent):
+        self.name = 'secrets'
+        self.parser = parent.add_parser(self.name,
+                                        help='Actions with secrets files')
+        group = self.parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            '-g',
+            '--generate-key',
+            help='Generate a new key to encrypt a secrets file.',
+            action='store_true',
+        )
+        group.add_argument(
+            '-e',
+            '--export',
+            help='Read the secrets from the secret engine and write them to '
+                 'an encrypted secrets file.',
+            metavar='<filename>',
+            type=str,
+        )
+        self.parser.add_argument(
+            '-f', '--from-file',
+            help='File with the name of the secrets, one per line.',
+            dest='filename',
+            metavar='<filename>',
+        )
+
+    @staticmethod
+    def generate_key():
+        print(base64.b64encode(FileEngine.generate_key()).decode('utf-8'))
+
+    def export(self, filename: str, keys_file: str):
+        if keys_file is None:
+            self.parser.error('the following arguments are required: -f')
+
+        name = settings.file.key_variable
+        if name not in os.environ:
+            print('missing key: %s' % name, file=sys.stderr)
+            exit(1)
+        key = Secrets.b64decode(name, os.environ[name])
+
+        with open(keys_file) as fp:
+            keys = [line for line in fp.read().splitlines() if line]
+        values = prefetch_secrets(keys)
+        missing = [k for k, v in values.items() if v == DEFAULT_NULL_RANDOM]
+        if missing:
+            print('not found: %s' % ', '.join(missing), file=sys.stderr)
+            exit(1)
+
+        FileEngine.build(filename, values, key)
+        print(f'{len(values)} secrets written to {filename}', file=sys.stderr)
+
+    def process(self, args):
+        if args.generate_key:
+            self.generate_key()
+        elif args.export:
+            self.export(args.export, args.filename)
+        else:
+            self.parser.print_help()
+
+
 cli_parser = ParserReactor(
     formatter_class=CustomHelper, description='WebApp Command Line: ismael-cv'
 )
@@ -99,12 +169,17 @@ def main():
     cli_parser.add_reactor(auth.backend.database.cli.DatabaseCLI(cli_parser))
     cli_parser.add_reactor(auth.backend.security.cli.CodeCLI(cli_parser))
     cli_parser.add_reactor(auth.backend.security.cli.TokenCLI(cli_parser))
+    cli_parser.add_reactor(LocalesCLI(cli_parser))
+    cli_parser.add_reactor(SecretsCLI(cli_parser))
+    cli_parser.add_reactor(StatsCLI(cli_parser))
     args = cli_parser.parser.parse_args()
     secret_engine = args.engine or settings.secret.engine
     if secret_engine == 'environ':
         engine = EnvironEngine(settings.environ.prefix)
     elif secret_engine == 'vault':
         engine = get_vault_engine()
+    elif secret_engine == 'file':
+        engine = get_file_engine()
     else:
         raise CriticalError('Unknown engine')
     set_secret_engine(engine)
@@ -17,3 +17,10 @@ class CriticalError(SystemExit):
     """
     Custom exception to abort on critical failure.
     """
+
+
+class SecretUnavailableError(Exception):
+    """
+    Exception raised when a secret can not be read from the engine and
+    there is no last-known-good value to fall back to.
+    """
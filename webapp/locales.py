@@ -11,20 +11,171 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import functools
 import json
 import os
+import re
+import sys
+from types import MappingProxyType
 from typing import List
 
 from babel import Locale
 from flask import request
 from flask_babel import get_locale as get_flask_locale
-
+from jinja2 import Environment
+from jinja2 import meta
+from jinja2 import pass_context
+from jinja2.ext import Extension
+from werkzeug.datastructures import LanguageAccept
+from werkzeug.http import parse_accept_header
+
+from .assets import sf
+from .common import Reactor
+from .logger import logger
+from .settings import ConfigWatcher
+from .settings import on_reload
 from .settings import settings_pool as settings
+from .stats import stats
 from .webapp import babel
 from .webapp import core
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 languages: List[Locale] = []
+_shared_locales: dict = {}
+
+# Sections of the CV with numbered items: the regex that finds the number of
+# every item, and the prefix of the keys with the values of the item.
+NUMBERED_SECTIONS = {
+    'skills': (re.compile(r'^skill-(?P<n>\d{1,2})$'), 'skill-%s-'),
+    'edu': (re.compile(r'^(?P<n>\d{1,2})-edu-degree$'), '%s-edu-'),
+    'wxp': (re.compile(r'^(?P<n>\d{1,2})-w-xp-comp$'), '%s-w-xp-'),
+    'vxp': (re.compile(r'^(?P<n>\d{1,2})-v-xp-comp$'), '%s-v-xp-'),
+    'crt': (re.compile(r'^(?P<n>\d{1,2})-crt-img$'), '%s-crt-'),
+    'icon': (re.compile(r'^(?P<n>\d{1,2})-icon-url$'), '%s-icon-'),
+}
+
+# Template rendered by every page with translations, the keys sent to the
+# client are found in it (and in the scripts of the bundle of the page).
+PAGE_TEMPLATES = {
+    'auth': 'auth/index.html',
+    'errors': 'errors/index.html',
+    'home': 'home/index.html',
+    'home-limited': 'home/index.html',
+}
+SOURCE_FOLDER = os.path.join(os.path.dirname(core.static_folder), 'src')
+I18N_ATTR_RE = re.compile(r'data-i18n="(?:\[[\w-]+\])?(?P<key>[^"]*)"')
+STRING_RE = re.compile(r'\'([^\']*)\'|"([^"]*)"')
+LITERAL_RE = re.compile(r'([\'"])(?P<key>[\w-]+)\1')
+REQUIRE_RE = re.compile(r'require\([\'"](?P<path>\.[^\'"]+\.js)[\'"]\)')
+
+
+class NumberedItem:
+    """
+    An item of a numbered section of a translation (like a skill, or a
+    certification), with the values of the keys related to it.
+
+    :param n: The number of the item, as it appears in the keys.
+    :param values: A ``dict`` like ``{suffix: value}``, where ``suffix`` is
+        the name of the key without the prefix of the item.
+
+    Example usage::
+
+        >>> item = NumberedItem('1', {'img': 'a.png', 'link': 'https://'})
+        >>> item.n
+        '1'
+        >>> item['img']
+        'a.png'
+        >>>
+    """
+    __slots__ = ('n', 'values')
+
+    def __init__(self, n: str, values: dict):
+        """
+        Initialize the object.
+        """
+        self.n = n
+        self.values = values
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.n)
+
+    def __getitem__(self, suffix: str) -> str:
+        return self.values[suffix]
+
+    def get(self, suffix: str, default: str = None) -> str:
+        return self.values.get(suffix, default)
+
+
+def build_numbered_index(data: dict) -> dict:
+    """
+    Find the items of every numbered section of a translation, keeping the
+    order in which they appear.
+
+    :param data: A ``dict`` with the translations.
+    :return: A ``dict`` like ``{(section, parity): (item, ...)}``, where
+        ``parity`` is ``0`` (even numbers), ``1`` (odd numbers) or ``None``
+        (all the items)
+    """
+    index = {}
+    for section, (regex, prefix) in NUMBERED_SECTIONS.items():
+        items = []
+        for key in data:
+            r = regex.match(key)
+            if r is None:
+                continue
+            n = r.group('n')
+            start = prefix % n
+            values = {k[len(start):]: v for k, v in data.items()
+                      if k.startswith(start)}
+            items.append(NumberedItem(n, values))
+
+        index[(section, None)] = tuple(items)
+        for parity in (0, 1):
+            index[(section, parity)] = tuple(item for item in items
+                                             if int(item.n) % 2 == parity)
+    return index
+
+
+class KeyTable:
+    """
+    The keys of the translations of a blueprint, it is shared by the ``Lang``
+    objects of every language, which only store their values.
+
+    Every key can be found with its own spelling, or with the dashes replaced
+    by underscores (the spelling used from Python code and templates).
+
+    :param names: The keys, in the order in which the values are stored.
+
+    Example usage::
+
+        >>> table = KeyTable(['unique-key', 'other-key'])
+        >>> table.index['unique_key']
+        0
+        >>>
+    """
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names: list):
+        """
+        Initialize the object.
+        """
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for i, name in enumerate(self.names):
+            self.index.setdefault(name.replace('-', '_'), i)
+
+    def __repr__(self):
+        return '%s(%d keys)' % (self.__class__.__name__, len(self.names))
+
+    def covers(self, data: dict) -> bool:
+        return all(key in self.index for key in data)
+
+
+_missing = object()
 
 
 class Lang:
@@ -36,53 +187,142 @@ class Lang:
     impossibility of using integers at the beginning of the name for
     attributes/variables.
 
+    The objects are read-only, the keys are stored in a ``KeyTable`` that
+    can be shared with the other languages of the same blueprint, and the
+    values in a tuple.
+
     :param data: A ``dict`` object with the translations.
+    :param table: Optional ``KeyTable`` with (at least) the keys of data.
 
     Example usage::
 
         >>> lang = Lang({'unique-key': 'awesome value'})
         >>> lang.unique_key
         'awesome value'
+        >>> lang['unique-key']
+        'awesome value'
         >>>
     """
-    _data: dict = None
+    __slots__ = ('_table', '_values', '_numbered')
 
-    def __init__(self, data: dict):
+    def __init__(self, data: dict, table: KeyTable = None):
         """
         Initialize the object.
         """
-        object.__setattr__(self, '_data', data)
+        if table is None:
+            table = KeyTable(data)
+        values = tuple(data.get(name, _missing) for name in table.names)
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_numbered', build_numbered_index(data))
 
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self.get_data())
 
     def __setattr__(self, option, value) -> None:
-        self._data[option] = value
+        raise AttributeError('translations are read-only: %s' % option)
+
+    def __delattr__(self, option) -> None:
+        raise AttributeError('translations are read-only: %s' % option)
 
     def __getattr__(self, option: str) -> str:
-        option = option.replace('_', '-')
-        return self._data.get(option)
+        # Only reached for the keys, the slots are found before.
+        if option.startswith('__'):
+            raise AttributeError(option)
+        return self.get(option)
 
     def __getitem__(self, item):
-        return self.get_data()[item]
+        i = self._table.index.get(item)
+        if i is None or self._values[i] is _missing:
+            raise KeyError(item)
+        return self._values[i]
+
+    def __contains__(self, item) -> bool:
+        return self.get(item, _missing) is not _missing
+
+    def get(self, key: str, default: any = None) -> any:
+        """
+        Returns the value of a key, with any of its spellings.
+
+        :param key: The key, like ``unique-key`` or ``unique_key``
+        :param default: Value returned if the key is not found.
+        :return: The translation.
+        """
+        i = self._table.index.get(key)
+        if i is None:
+            return default
+        value = self._values[i]
+        return default if value is _missing else value
 
     def get_data(self) -> dict:
         """
-        Returns the dictionary with the translations.
+        Returns a dictionary with the translations.
+
+        :return: A new ``dict`` with the translations
+        """
+        return {name: value
+                for name, value in zip(self._table.names, self._values)
+                if value is not _missing}
+
+    def numbered(self, section: str, parity: int = None) -> tuple:
+        """
+        Returns the items of a numbered section (see ``NUMBERED_SECTIONS``),
+        they are found once, when the translation is loaded.
 
-        :return: A ``dict`` with the translations
+        :param section: The name of the section, like ``skills``
+        :param parity: ``0`` for the items with an even number, ``1`` for
+            the odd ones, or ``None`` for all of them.
+        :return: A tuple of ``NumberedItem`` objects.
         """
-        return self._data
+        return self._numbered.get((section, parity), ())
 
 
 _default_lang_obj = Lang
 
 
+def merge_fallbacks(data: dict, fallbacks: list = ()) -> tuple:
+    """
+    Fill the missing keys of every language with the values of the
+    fallback languages, the first language of the chain that has a key
+    wins.
+
+    :param data: A ``dict`` like ``{lang: values}``
+    :param fallbacks: The codes of the languages tried after the language
+        itself, like ``['en', 'es']``
+    :return: A tuple like ``(merged, filled)``, where ``merged`` is a new
+        ``dict`` like ``data``, and ``filled`` is a ``dict`` like
+        ``{lang: [keys filled in]}``
+
+    Example usage::
+
+        >>> merge_fallbacks({'ja': {}, 'en': {'a': 'A'}}, ['en'])
+        ({'ja': {'a': 'A'}, 'en': {'a': 'A'}}, {'ja': ['a'], 'en': []})
+    """
+    merged = {}
+    filled = {}
+    for lang, values in data.items():
+        result = dict(values)
+        for code in fallbacks:
+            if code == lang or code not in data:
+                continue
+            for key, value in data[code].items():
+                result.setdefault(key, value)
+        merged[lang] = result
+        filled[lang] = [key for key in result if key not in values]
+    return merged, filled
+
+
 class Locales:
     """
     Load translations from JSON files in a directory. When a file is loaded,
     it is cached to be available for query.
 
+    The translations of every blueprint can also be loaded at startup with
+    ``preload``, into an immutable index keyed by ``(bp_name, lang)``, so
+    ``get`` does not need to build the path of the file. The missing keys
+    of the preloaded translations are filled in from the fallback languages
+    (see ``merge_fallbacks``), the keys filled in are kept in ``filled``.
+
     :param static_folder: The folder where the translations are located.
     :param lang_class: Class from which the objects with the translations
         will be created, the default value is ``Lang``.
@@ -99,10 +339,18 @@ class Locales:
         True
         >>>
     """
+    LOCALES_FOLDER = 'locales'
+    SUBSET_SUFFIX = '.subset.json'
+
     def __init__(self, static_folder: str, lang_class: Lang = None):
         self.source_path = static_folder
         self._cache: dict = {}
         self._lang_class = lang_class or _default_lang_obj
+        self.index = MappingProxyType({})
+        self.files = {}
+        self.sources = {}
+        self.filled = {}
+        self.fallbacks = ()
 
     def get_abspath(self, filename: str) -> str:
         """
@@ -141,6 +389,12 @@ class Locales:
         """
         self._cache[filename] = value
 
+    def clear_cache(self) -> None:
+        """
+        Remove all the translations from the cache.
+        """
+        self._cache = {}
+
     def validate_cache(self, filename: str) -> bool:
         """
         Check if a translation is cached.
@@ -158,6 +412,10 @@ class Locales:
         :param filename: Relative path for the JSON file.
         :return: A ``dict`` object.
         """
+        if orjson is not None:
+            with open(filename, 'rb') as fp:
+                return orjson.loads(fp.read())
+
         with open(filename) as fp:
             data = json.load(fp)
         return data
@@ -182,13 +440,515 @@ class Locales:
         self.set_cache(filename, lang)
         return lang
 
+    @classmethod
+    def get_filename(cls, bp_name: str, lang: str) -> str:
+        """
+        Returns the (secured) name of the translation of a blueprint.
+
+        :param bp_name: The name of the blueprint, like ``home``
+        :param lang: The code of the language, like ``es``
+        :return: The relative path of the JSON file.
+        """
+        return sf('%s/%s/%s.json' % (cls.LOCALES_FOLDER, bp_name, lang))
+
+    @classmethod
+    def get_subset_filename(cls, bp_name: str, lang: str) -> str:
+        """
+        Returns the (secured) name of the translation of a blueprint with
+        only the keys used by the client, see ``LocalesCLI``.
+
+        :param bp_name: The name of the blueprint, like ``home``
+        :param lang: The code of the language, like ``es``
+        :return: The relative path of the JSON file.
+        """
+        return sf('%s/%s/%s%s' % (cls.LOCALES_FOLDER, bp_name, lang,
+                                  cls.SUBSET_SUFFIX))
+
+    def preload(self, langs: list, fallbacks: list = ()) -> int:
+        """
+        Load the translations of every blueprint for the supplied languages,
+        and replace the index with them.
+
+        :param langs: The codes of the languages.
+        :param fallbacks: The codes of the languages used to fill in the
+            missing keys, in order.
+        :return: The number of translations loaded.
+        """
+        index = {}
+        files = {}
+        sources = {}
+        filled = {}
+        folder = self.get_abspath(self.LOCALES_FOLDER)
+        for bp_name in sorted(os.listdir(folder)):
+            if not os.path.isdir(os.path.join(folder, bp_name)):
+                continue
+            for lang in langs:
+                filename = self.get_abspath(self.get_filename(bp_name, lang))
+                if os.path.exists(filename):
+                    sources[(bp_name, lang)] = self.read(filename)
+                    files[(bp_name, lang)] = filename
+            self._build(index, filled, sources, bp_name, fallbacks)
+
+        self.files = files
+        self.sources = sources
+        self.filled = filled
+        self.fallbacks = tuple(fallbacks)
+        self.index = MappingProxyType(index)
+        return len(index)
+
+    def _build(self, index: dict, filled: dict, sources: dict, bp_name: str,
+               fallbacks: list, changed: set = None) -> None:
+        data = {lang: values for (name, lang), values in sources.items()
+                if name == bp_name}
+        merged, keys = merge_fallbacks(data, fallbacks)
+
+        # one table with the keys of every language of the blueprint
+        names = {}
+        for values in merged.values():
+            names.update(dict.fromkeys(values))
+        table = None
+        for lang, values in merged.items():
+            key = (bp_name, lang)
+            filled[key] = keys[lang]
+            if changed is not None:
+                chain = {lang}.union(fallbacks)
+                if not chain.intersection(changed):
+                    continue
+                old = index[key]._table
+                if old.covers(values):
+                    index[key] = self._lang_class(values, old)
+                    continue
+            if table is None:
+                table = KeyTable(names)
+            index[key] = self._lang_class(values, table)
+
+    def reload(self, keys: list) -> None:
+        """
+        Load again some translations of the index, and the translations
+        that use them as fallback. The index is replaced with a new one, so
+        the readers never wait for the reload.
+
+        :param keys: A list of ``(bp_name, lang)`` tuples.
+        """
+        index = dict(self.index)
+        sources = dict(self.sources)
+        filled = dict(self.filled)
+        changed = {}
+        for key in keys:
+            sources[key] = self.read(self.files[key])
+            changed.setdefault(key[0], set()).add(key[1])
+            if stats.enabled:
+                stats.record('locales', 'reload')
+        for bp_name, langs in changed.items():
+            self._build(index, filled, sources, bp_name, self.fallbacks,
+                        changed=langs)
+        self.sources = sources
+        self.filled = filled
+        self.index = MappingProxyType(index)
+
+    def get(self, bp_name: str, lang: str) -> 'Lang':
+        """
+        Returns the translation of a blueprint, from the index if it has been
+        preloaded, otherwise, it is loaded like ``load``.
+
+        :param bp_name: The name of the blueprint, like ``home``
+        :param lang: The code of the language, like ``es``
+        :return: A ``Lang`` object.
+        """
+        try:
+            lang_obj = self.index[(bp_name, lang)]
+        except KeyError:
+            if stats.enabled:
+                stats.record('locales', 'miss')
+            return self.load(self.get_filename(bp_name, lang))
+
+        if stats.enabled:
+            stats.record('locales', 'hit')
+        return lang_obj
+
 
 i18n = Locales(core.static_folder)
 
 
+class LocalesWatcher(ConfigWatcher):
+    """
+    Background thread that reloads the translations of the index when their
+    files change, see ``ConfigWatcher``. Only the changed translations are
+    loaded again.
+
+    :param locales: The translations to watch.
+    :param interval: Seconds between checks.
+
+    Example usage::
+
+        >>> watcher = LocalesWatcher(i18n, interval=10)
+        >>> watcher.start()
+    """
+
+    def __init__(self, locales: Locales, interval: float = 10):
+        """
+        Initialize the object.
+        """
+        self.locales = locales
+        super().__init__(locales.get_abspath(Locales.LOCALES_FOLDER),
+                         ext='.json', interval=interval,
+                         name='locales-watcher')
+
+    def get_dirs(self) -> list:
+        files = self.locales.files.values()
+        return sorted({os.path.dirname(filename) for filename in files})
+
+    def get_stamp(self) -> dict:
+        """
+        Returns the mtime and size of the file of every translation.
+
+        :return: A ``dict`` like ``{(bp_name, lang): (mtime_ns, size)}``
+        """
+        stamp = {}
+        for key, filename in self.locales.files.items():
+            try:
+                st = os.stat(filename)
+            except FileNotFoundError:
+                continue
+            stamp[key] = (st.st_mtime_ns, st.st_size)
+        return stamp
+
+    def check(self) -> set:
+        """
+        Reload the translations whose files changed.
+
+        :return: A ``set`` with the changed ``(bp_name, lang)`` tuples.
+        """
+        stamp = self.get_stamp()
+        changed = {key for key, value in stamp.items()
+                   if self._stamp.get(key) != value}
+        self._stamp = stamp
+        if changed:
+            self.locales.reload(changed)
+            logger.info('translations reloaded: %s', ', '.join(
+                '%s/%s' % key for key in sorted(changed)))
+        return changed
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.wait()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.check()
+            except Exception as e:
+                logger.exception(e)
+
+
+def key_expression(key: str) -> str:
+    """
+    Convert the value of a ``data-i18n`` attribute, which can contain
+    template expressions, to a single template expression.
+
+    :param key: The value of the attribute, like ``{{ item.n }}-edu-date``
+    :return: An expression like ``(item.n) ~ '-edu-date'``
+    """
+    parts = []
+    for i, part in enumerate(re.split(r'{{(.*?)}}', key)):
+        if i % 2:
+            parts.append('(%s)' % part.strip())
+        elif part:
+            parts.append(repr(part))
+    return ' ~ '.join(parts) or "''"
+
+
+class TranslationFiller(Extension):
+    """
+    Template extension that fills the elements with a ``data-i18n``
+    attribute when the page is rendered, instead of leaving them empty for
+    jQuery.i18n. The template source is rewritten once, when it is compiled:
+
+    - ``<h2 data-i18n="key"></h2>`` gets the translation as its text.
+    - ``<img data-i18n="[alt]key" />`` gets an ``alt`` attribute.
+
+    The translation comes from the ``i18n`` variable of the template, or
+    from the index with the ``bp_name`` of the template and the language of
+    the request, so the output only depends on the page, the language and
+    the ``bp_name`` (the tier of the home page). The missing keys are left
+    empty, for the client.
+
+    Example usage::
+
+        >>> core.jinja_env.add_extension(TranslationFiller)
+    """
+    TEXT_RE = re.compile(r'(?P<open><(?P<tag>[\w-]+)\s[^>]*?'
+                         r'data-i18n="(?P<key>[^"\[][^"]*)"[^>]*>)'
+                         r'(?P<close></(?P=tag)>)')
+    ATTR_RE = re.compile(r'data-i18n="\[(?P<attr>[\w-]+)\](?P<key>[^"]*)"')
+
+    def preprocess(self, source: str, name: str, filename: str = None) -> str:
+        source = self.TEXT_RE.sub(self.fill_text, source)
+        return self.ATTR_RE.sub(self.fill_attr, source)
+
+    @staticmethod
+    def fill_text(match: re.Match) -> str:
+        return '%s{{ translate(%s) }}%s' % (
+            match.group('open'), key_expression(match.group('key')),
+            match.group('close'))
+
+    @staticmethod
+    def fill_attr(match: re.Match) -> str:
+        if match.group('attr') == 'html':
+            return match.group(0)
+        return '%s %s="{{ translate(%s) }}"' % (
+            match.group(0), match.group('attr'),
+            key_expression(match.group('key')))
+
+
+@pass_context
+def translate(ctx, key: str) -> str:
+    """
+    Template function used by ``TranslationFiller``.
+
+    :param key: The translation key.
+    :return: The translation, or an empty string if it is not found.
+    """
+    lang = ctx.get('i18n')
+    if not isinstance(lang, Lang):
+        lang = i18n.index.get((ctx.get('bp_name'),
+                               get_flask_locale().language))
+        if lang is None:
+            return ''
+    return lang.get(key, '')
+
+
+core.add_template_global(translate)
+
+
+def key_pattern(key: str) -> re.Pattern:
+    """
+    Convert the value of a ``data-i18n`` attribute to a regex. The string
+    literals of the template expressions are kept, the rest of the
+    expressions match any text.
+
+    :param key: The value of the attribute, like ``{{ item.n }}-edu-date``
+    :return: A compiled regex, like the one of ``.+-edu-date``
+    """
+    pattern = []
+    for i, part in enumerate(re.split(r'{{(.*?)}}', key)):
+        if not i % 2:
+            pattern.append(re.escape(part))
+            continue
+        for j, chunk in enumerate(STRING_RE.split(part)):
+            if j % 3 == 0:
+                if re.search(r'\w', chunk):
+                    pattern.append('.+')
+            elif chunk is not None:
+                pattern.append(re.escape(chunk))
+    return re.compile('^%s$' % ''.join(pattern))
+
+
+def extract_keys(source: str, keys: list, literals: bool = False) -> set:
+    """
+    Find the translation keys used by a template or a script.
+
+    :param source: The source code.
+    :param keys: The keys of the translation.
+    :param literals: Find also the string literals that are keys, like
+        ``$.i18n('input-code')`` (for the scripts)
+    :return: A ``set`` with the keys found.
+    """
+    found = set()
+    for match in I18N_ATTR_RE.finditer(source):
+        pattern = key_pattern(match.group('key'))
+        found.update(key for key in keys if pattern.match(key))
+    if literals:
+        found.update(match.group('key')
+                     for match in LITERAL_RE.finditer(source)
+                     if match.group('key') in keys)
+    return found
+
+
+def find_templates(env: Environment, name: str) -> list:
+    """
+    Find a template and every template that it extends or includes.
+
+    :param env: The template environment.
+    :param name: The name of the template.
+    :return: A list with the source of the templates.
+    """
+    sources = {}
+    pending = [name]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        source = env.loader.get_source(env, name)[0]
+        sources[name] = source
+        pending.extend(ref for ref in meta.find_referenced_templates(
+            env.parse(source)) if ref is not None)
+    return list(sources.values())
+
+
+def find_scripts(path: str) -> list:
+    """
+    Find a script and every script that it requires.
+
+    :param path: Location of the entry point of the bundle.
+    :return: A list with the source of the scripts.
+    """
+    sources = {}
+    pending = [path]
+    while pending:
+        path = os.path.normpath(pending.pop())
+        if path in sources or not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as fp:
+            source = sources[path] = fp.read()
+        folder = os.path.dirname(path)
+        pending.extend(os.path.join(folder, match.group('path'))
+                       for match in REQUIRE_RE.finditer(source))
+    return list(sources.values())
+
+
+class LocalesCLI(Reactor):
+    """
+    Write a translation with only the keys used by the client for every
+    page, they are served by ``/api/v1/i18n/<bp_name>/<lang>``. It must be
+    run after webpack copies the translations to the static folder, and
+    before the files are secured.
+    """
+
+    def __init__(self, parent):
+        self.name = 'locales'
+        self.parser = parent.add_parser(self.name,
+                                        help='Actions with translations')
+        self.parser.add_argument(
+            '--subset',
+            help='Write the translations of every page with only the keys '
+                 'used by its templates and scripts.',
+            action='store_true',
+        )
+        self.parser.add_argument(
+            '-r', '--report',
+            help='Show the keys of every translation that are filled in '
+                 'from the fallback languages (see locales.fallback).',
+            action='store_true',
+        )
+        self.parser.add_argument('--simulate', action='store_true')
+        self.folder = os.path.join(core.static_folder, Locales.LOCALES_FOLDER)
+
+    def read_folder(self, bp_name: str) -> dict:
+        """
+        Read every translation of a blueprint.
+
+        :param bp_name: The name of the blueprint, like ``home``
+        :return: A ``dict`` like ``{lang: values}``
+        """
+        folder = os.path.join(self.folder, bp_name)
+        data = {}
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith('.json') or \
+                    name.endswith(Locales.SUBSET_SUFFIX):
+                continue
+            data[name[:-len('.json')]] = Locales.read(
+                os.path.join(folder, name))
+        return data
+
+    def subset(self, bp_name: str, template: str,
+               fallbacks: list = ()) -> dict:
+        """
+        Find the keys used by a page in every language, the missing keys are
+        filled in from the fallback languages first.
+
+        :param bp_name: The name of the blueprint, like ``home``
+        :param template: The template rendered by the page.
+        :param fallbacks: See ``merge_fallbacks``
+        :return: A ``dict`` like ``{lang: (data, subset)}``
+        """
+        templates = find_templates(core.jinja_env, template)
+        scripts = find_scripts(os.path.join(SOURCE_FOLDER, bp_name + '.js'))
+        merged, _ = merge_fallbacks(self.read_folder(bp_name), fallbacks)
+        result = {}
+        for lang, data in merged.items():
+            used = set()
+            for source in templates:
+                used.update(extract_keys(source, data))
+            for source in scripts:
+                used.update(extract_keys(source, data, literals=True))
+            subset = {key: value for key, value in data.items()
+                      if key in used}
+            result[lang] = (data, subset)
+        return result
+
+    def write_subsets(self, simulate: bool = True,
+                      fallbacks: list = ()) -> None:
+        for bp_name, template in PAGE_TEMPLATES.items():
+            folder = os.path.join(self.folder, bp_name)
+            if not os.path.isdir(folder):
+                print(f'translations not found: {bp_name}', file=sys.stderr)
+                continue
+            result = self.subset(bp_name, template, fallbacks)
+            for lang, (data, subset) in result.items():
+                print(f'{bp_name}/{lang}: {len(subset)} of {len(data)} keys',
+                      file=sys.stderr)
+                if simulate:
+                    continue
+                path = os.path.join(folder, lang + Locales.SUBSET_SUFFIX)
+                with open(path + '.tmp', 'w', encoding='utf-8') as fp:
+                    json.dump(subset, fp, ensure_ascii=False,
+                              separators=(',', ':'), sort_keys=True)
+                os.replace(path + '.tmp', path)
+
+    def report(self, fallbacks: list = ()) -> None:
+        for bp_name in sorted(os.listdir(self.folder)):
+            if not os.path.isdir(os.path.join(self.folder, bp_name)):
+                continue
+            _, filled = merge_fallbacks(self.read_folder(bp_name), fallbacks)
+            for lang, keys in filled.items():
+                print(f'{bp_name}/{lang}: {len(keys)} keys from the '
+                      f'fallbacks', file=sys.stderr)
+                for key in keys:
+                    print(f'  {key}')
+
+    def process(self, args):
+        if not args.subset and not args.report:
+            self.parser.print_help()
+            return
+        fallbacks = get_fallbacks()
+        if args.subset:
+            self.write_subsets(simulate=args.simulate, fallbacks=fallbacks)
+        if args.report:
+            self.report(fallbacks)
+
+
 def load_available_languages(code_list: str):
-    for code in code_list.split(','):
-        languages.append(Locale(code))
+    languages[:] = [Locale(code) for code in code_list.split(',')]
+    _shared_locales.clear()
+    _shared_locales.update((lang.language, lang) for lang in languages)
+    negotiate_locale.cache_clear()
+
+
+def get_fallbacks() -> list:
+    """
+    Returns the fallback chain of the translations: the languages of
+    ``locales.fallback`` and the default language.
+    """
+    codes = [code for code in settings.locales.fallback.split(',') if code]
+    return codes + [settings.locales.language]
+
+
+def preload_translations() -> int:
+    count = i18n.preload([lang.language for lang in languages],
+                         fallbacks=get_fallbacks())
+    for (bp_name, lang), keys in sorted(i18n.filled.items()):
+        if keys:
+            logger.info('translation %s/%s: %d keys from the fallbacks',
+                        bp_name, lang, len(keys))
+    return count
+
+
+@on_reload('locales')
+def reload_languages(changed: set) -> None:
+    load_available_languages(settings.locales.available_languages)
+    i18n.clear_cache()
+    if i18n.index:
+        preload_translations()
 
 
 @core.context_processor
@@ -196,20 +956,32 @@ def ctx_languages():
     return dict(available_languages=languages, get_locale=get_flask_locale)
 
 
+@functools.lru_cache(maxsize=1024)
+def negotiate_locale(accept_language: str) -> Locale:
+    """
+    Returns the available language that best matches an ``Accept-Language``
+    header, or the default language. The results are kept in a bounded LRU
+    cache, which is cleared when the available languages are loaded.
+
+    :param accept_language: The value of the header.
+    :return: A shared ``Locale`` object.
+    """
+    accept = parse_accept_header(accept_language, LanguageAccept)
+    code = accept.best_match(list(_shared_locales))
+    if code is None:
+        code = settings.locales.language
+    return _shared_locales.get(code) or Locale(code)
+
+
 @babel.localeselector
 def get_locale() -> Locale:
-    a_lang = [lang.language for lang in languages]
-    source = [request.args, request.cookies]
     # LOCALE: BY USER
     #################
-    for src in source:
+    for src in (request.args, request.cookies):
         locale = src.get('locale', None)
-        if locale is None or locale not in a_lang:
-            continue
-        return Locale(locale)
+        if locale in _shared_locales:
+            return _shared_locales[locale]
 
     # LOCALE: BY SERVER
     ###################
-    if request.accept_languages is None or len(request.accept_languages) == 0:
-        return Locale(settings.locales.language)
-    return Locale(request.accept_languages.best_match(a_lang))
+    return negotiate_locale(request.headers.get('Accept-Language', ''))
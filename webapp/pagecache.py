@@ -0,0 +1,183 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response
+from flask import request
+from flask import Response
+from flask_babel import get_locale
+
+from .assets import assets
+from .locales import i18n
+from .settings import on_reload
+from .stats import stats
+
+
+class PageCache:
+    """
+    Bounded LRU cache of the rendered pages. The output of a page only
+    depends on the language, the tier (like ``home`` or ``home-limited``)
+    and the assets, so the pages are stored by
+    ``(endpoint, lang, tier, assets version)`` and served with a strong ETag.
+
+    The entries expire after ``ttl`` seconds, and the cache is cleared when
+    the translations are replaced (see ``Locales.preload``) or the settings
+    are reloaded. The cache is disabled while ``ttl`` is ``0``.
+
+    The streamed pages (see ``render_page``) are stored once they have been
+    sent completely, the first response is sent without ``ETag``.
+
+    :param max_entries: Maximum number of pages in the cache.
+    :param ttl: Seconds that a page is kept in the cache.
+
+    Example usage::
+
+        >>> page_cache = PageCache(max_entries=256, ttl=300)
+        >>> @bp_frontend_tac.route('/', methods=['GET'])
+        ... @page_cache.cached()
+        ... def tac_page():
+        ...     return render_template('tac/index.html')
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 0):
+        """
+        Initialize the object.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._index = i18n.index
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: tuple) -> tuple:
+        """
+        :return: A tuple like ``(body, etag)``, or ``None`` if the key is not
+            in the cache or it has expired.
+        """
+        if self._index is not i18n.index:
+            self.clear()
+            return None
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._items[key]
+                if stats.enabled:
+                    stats.record('pages', 'expired')
+                return None
+            self._items.move_to_end(key)
+            return item[1], item[2]
+
+    def set(self, key: tuple, body: bytes) -> str:
+        """
+        Add a page to the cache, the least recently used pages are removed
+        to make room for it.
+
+        :return: The ETag of the page, without quotes.
+        """
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (time.monotonic() + self.ttl, body, etag)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return etag
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._index = i18n.index
+
+    @staticmethod
+    def make_response(response: Response, etag: str = None) -> Response:
+        response.vary.update(('Accept-Language', 'Cookie'))
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        if etag is None:
+            return response
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def tee(self, key: tuple, response: Response) -> Response:
+        """
+        Store a streamed page while it is sent, the page is not stored if
+        the client disconnects before the end.
+
+        :param key: The key of the page.
+        :param response: The streamed response.
+        :return: The same response.
+        """
+        chunks = response.iter_encoded()
+
+        def generate():
+            body = []
+            for chunk in chunks:
+                body.append(chunk)
+                yield chunk
+            self.set(key, b''.join(body))
+
+        response.response = generate()
+        return self.make_response(response)
+
+    def cached(self, tier: callable = None):
+        """
+        Decorator of the view functions whose pages are cached.
+
+        :param tier: Optional function that returns the tier of the page.
+        """
+        def function_wrap(func):
+
+            @functools.wraps(func)
+            def decorated_function(*args, **kwargs):
+                if not self.ttl:
+                    return func(*args, **kwargs)
+
+                key = (request.endpoint, get_locale().language,
+                       tier() if tier is not None else None, assets.version)
+                item = self.get(key)
+                if item is not None:
+                    if stats.enabled:
+                        stats.record('pages', 'hit')
+                    response = Response(item[0], mimetype='text/html')
+                    return self.make_response(response, item[1])
+                if stats.enabled:
+                    stats.record('pages', 'miss')
+
+                response = make_response(func(*args, **kwargs))
+                if (response.status_code != 200 or
+                        response.mimetype != 'text/html'):
+                    return response
+                if response.is_streamed:
+                    return self.tee(key, response)
+                etag = self.set(key, response.get_data())
+                return self.make_response(response, etag)
+            return decorated_function
+        return function_wrap
+
+
+page_cache = PageCache()
+
+
+@on_reload()
+def clear_pages(changed: set) -> None:
+    page_cache.clear()
@@ -0,0 +1,139 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from flask import Blueprint
+from flask import g
+from flask import request
+
+from .assets import static_url
+from .webapp import core
+
+
+def format_link(url: str, rel: str = 'preload', as_: str = None,
+                crossorigin: bool = False) -> str:
+    """
+    Create the value of a ``Link`` header.
+
+    :param url: The URL of the resource.
+    :param rel: The relation of the resource (``preload``, ``preconnect``)
+    :param as_: The type of the resource (``script``, ``style``, ...)
+    :param crossorigin: Add the ``crossorigin`` attribute.
+    :return: Returns a string like ``<url>; rel=preload; as=script``
+    """
+    link = '<%s>; rel=%s' % (url, rel)
+    if as_ is not None:
+        link += '; as=%s' % as_
+    if crossorigin:
+        link += '; crossorigin'
+    return link
+
+
+# Resources of common/base.html
+BASE_LINKS = (
+    format_link('https://cdnjs.cloudflare.com/ajax/libs/jquery/3.2.1/'
+                'jquery.min.js', as_='script', crossorigin=True),
+    format_link('https://fonts.googleapis.com/css2?family=Poppins:wght@600&'
+                'family=Roboto:wght@300;400;500;700&display=swap',
+                as_='style'),
+    format_link('https://fonts.gstatic.com', rel='preconnect',
+                crossorigin=True),
+)
+
+
+class Preloads:
+    """
+    Table of the resources that every blueprint must preload, it is used to
+    send ``Link`` headers (and ``103 Early Hints``, when the WSGI server
+    provides the ``wsgi.early_hints`` callable) before the template render.
+
+    The bundle of a page is found with the ``bp_name`` of the blueprint and
+    the asset manifest, the header of every ``bp_name`` is created only once.
+
+    Example usage::
+
+        >>> preloads.register(bp_frontend_tac, 'tac')
+        >>> preloads.register(bp_frontend_home, get_bp_name, BASE_LINKS)
+    """
+
+    def __init__(self):
+        """
+        Initialize the object.
+        """
+        self.blueprints = {}
+        self.links = {}
+
+    def register(self, blueprint: Blueprint, bp_name: any,
+                 links: tuple = ()) -> None:
+        """
+        Add a blueprint to the table.
+
+        :param blueprint: The blueprint.
+        :param bp_name: The ``bp_name`` of the blueprint, or a function that
+            returns it (for the blueprints with several bundles)
+        :param links: Other resources to preload, see ``format_link``
+        """
+        self.blueprints[blueprint.name] = (bp_name, tuple(links))
+
+    def get_links(self, blueprint: str) -> str:
+        """
+        Returns the value of the ``Link`` header of a blueprint.
+
+        :param blueprint: The name of the blueprint.
+        :return: The value of the header, or ``None`` if the blueprint is not
+            in the table.
+        """
+        entry = self.blueprints.get(blueprint)
+        if entry is None:
+            return None
+
+        bp_name, links = entry
+        if callable(bp_name):
+            bp_name = bp_name()
+        try:
+            return self.links[bp_name]
+        except KeyError:
+            bundle = static_url(bp_name + '.bundle.js')
+            value = ', '.join((format_link(bundle, as_='script'),) + links)
+            self.links[bp_name] = value
+            return value
+
+    def clear(self) -> None:
+        """
+        Remove the headers created, it must be called when the asset
+        manifest is loaded.
+        """
+        self.links = {}
+
+
+preloads = Preloads()
+
+
+@core.before_request
+def send_early_hints():
+    links = preloads.get_links(request.blueprint)
+    if links is None:
+        return
+
+    g.preload_links = links
+    early_hints = request.environ.get('wsgi.early_hints')
+    if early_hints is not None:
+        early_hints([('Link', links)])
+
+
+@core.after_request
+def add_preload_links(response):
+    links = g.get('preload_links')
+    if (links is not None and response.status_code == 200 and
+            response.mimetype == 'text/html'):
+        response.headers.add('Link', links)
+    return response
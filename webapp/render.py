@@ -0,0 +1,102 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import functools
+
+from flask import current_app
+from flask import render_template
+from flask import request
+from flask import Response
+from flask import stream_with_context
+
+from .settings import settings_pool as settings
+
+try:
+    from flask import stream_template
+except ImportError:  # Flask < 2.2
+    stream_template = None
+
+# The chunks of a streamed page are sent when they reach this size, or when
+# the end of the <head> is rendered.
+FLUSH_SIZE = 16 * 1024
+HEAD_END = '</head>'
+
+
+def buffer_chunks(chunks, size: int = FLUSH_SIZE):
+    """
+    Join the small chunks of a template stream, so the response is not sent
+    in hundreds of writes. The ``<head>`` is sent as soon as it is rendered,
+    so the browser can start to download the scripts and fonts.
+
+    :param chunks: The chunks of the template.
+    :param size: Minimum size of the chunks sent.
+    """
+    buf = []
+    length = 0
+    for chunk in chunks:
+        buf.append(chunk)
+        length += len(chunk)
+        if length >= size or HEAD_END in chunk:
+            yield ''.join(buf)
+            buf = []
+            length = 0
+    if buf:
+        yield ''.join(buf)
+
+
+def generate_template(template_name: str, **context):
+    """
+    Render a template as a generator, like ``flask.stream_template``, which
+    is only available since Flask 2.2.
+
+    :param template_name: The name of the template.
+    :param context: The variables of the template.
+    :return: A generator with the chunks of the template.
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    template = app.jinja_env.get_or_select_template(template_name)
+    return stream_with_context(template.generate(context))
+
+
+@functools.lru_cache(maxsize=8)
+def parse_blueprints(value: str) -> frozenset:
+    return frozenset(name.strip() for name in value.split(',') if name)
+
+
+def is_streamed(blueprint: str) -> bool:
+    """
+    :param blueprint: The name of a blueprint.
+    :return: Returns ``True`` if the pages of the blueprint are streamed,
+        see ``server.stream_blueprints``
+    """
+    return blueprint in parse_blueprints(settings.server.stream_blueprints)
+
+
+def render_page(template_name: str, **context) -> any:
+    """
+    Render a page, the pages of the blueprints in
+    ``server.stream_blueprints`` are sent while they are rendered, instead
+    of building the whole document in memory first.
+
+    :param template_name: The name of the template.
+    :param context: The variables of the template.
+    :return: A ``str``, or a streamed ``Response``
+    """
+    if not is_streamed(request.blueprint):
+        return render_template(template_name, **context)
+    if stream_template is None:
+        chunks = generate_template(template_name, **context)
+    else:
+        chunks = stream_template(template_name, **context)
+    return Response(buffer_chunks(chunks), mimetype='text/html')
@@ -14,38 +14,74 @@
 import abc
 import ast
 import base64
+import functools
 import glob
+import hashlib
 import json
+import mmap
 import os
+import struct
+import tempfile
+import threading
+import time
 import uuid
 from binascii import Error as binasciiError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from configparser import ConfigParser
 from configparser import ExtendedInterpolation
+from configparser import NoOptionError
+from configparser import NoSectionError
 from typing import Union
 
 import hvac
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 from .exceptions import CriticalError
+from .exceptions import SecretUnavailableError
+from .logger import logger
+from .stats import stats
 from .webapp import core
 
+try:
+    from inotify_simple import flags as inotify_flags
+    from inotify_simple import INotify
+except ImportError:
+    INotify = None
+
 DEFAULT_NULL_RANDOM = uuid.uuid4().hex
 _type_string = Union[bytes, str]
 _default_encoding = 'utf-8'
 
 
-class SectionProxy:
+def to_python(value: str) -> any:
     """
-    A proxy for a single section from a parser.
+    Try to safely convert a raw configuration value to Python code. If the
+    value is not a valid Python literal, it is returned without changes.
 
-    It provides a basic layer to extend the use of ConfigParser in which
-    it acts as a proxy, redirecting queries from the magic `__getattr__`
-    and `__setattr__` methods to the corresponding methods in ConfigParser.
+    :param value: raw value read from the parser.
+    :return: the converted value (if done).
+    """
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+class SectionProxy:
+    """
+    A read-only, pre-parsed view of a single section from a parser.
 
-    As an additional feature when obtaining a value, it will try to convert
-    safely to Python code.
+    All the options of the section are read, interpolated and converted
+    safely to Python code only once, when the object is created. After that,
+    reading an option is a plain attribute lookup, so no query is made to
+    ConfigParser nor to ``ast.literal_eval`` on the hot path.
 
     :param parser: a ConfigParser object
-    :param section: section name to be redirected
+    :param section: section name to be compiled
 
     Example usage::
 
@@ -61,34 +97,55 @@ class SectionProxy:
         >>> sec.test_option
         1
         >>> sec.other_option = "test"
-        >>> sec.other_option
-        'test'
+        Traceback (most recent call last):
+          ...
+        AttributeError: settings are read-only: test_section.other_option
         >>>
     """
 
     _section: str = None
-    _cp: ConfigParser = None
 
     def __init__(self, parser: ConfigParser, section: str) -> None:
         """
         Initialize the object.
         """
-
-        object.__setattr__(self, '_cp', parser)
+        values = {option: to_python(value)
+                  for option, value in parser.items(section)}
+        self.__dict__.update(values)
         object.__setattr__(self, '_section', section)
 
     def __repr__(self):
         return f'<{self.__class__.__name__}: {self._section}>'
 
     def __setattr__(self, option: str, value: any) -> None:
-        self._cp.set(self._section, option, value)
+        raise AttributeError(
+            f'settings are read-only: {self._section}.{option}')
+
+    def __delattr__(self, option: str) -> None:
+        raise AttributeError(
+            f'settings are read-only: {self._section}.{option}')
 
     def __getattr__(self, option: str) -> any:
-        value = self._cp.get(self._section, option)
-        try:
-            return ast.literal_eval(value)
-        except ValueError:
-            return value
+        # Only reached when the option was not found in the section.
+        if option.startswith('__'):
+            raise AttributeError(option)
+        raise NoOptionError(option, self._section)
+
+
+class InstrumentedSectionProxy(SectionProxy):
+    """
+    A ``SectionProxy`` that counts and times every read of its options. It is
+    used instead of ``SectionProxy`` when the instrumentation is enabled.
+    """
+
+    def __getattribute__(self, option: str) -> any:
+        start = time.perf_counter()
+        value = object.__getattribute__(self, option)
+        if not option.startswith('_'):
+            section = object.__getattribute__(self, '_section')
+            stats.record('settings', f'{section}.{option}',
+                         time.perf_counter() - start)
+        return value
 
 
 _default_section_proxy = SectionProxy
@@ -96,20 +153,27 @@ _default_section_proxy = SectionProxy
 
 class ParserProxy:
     """
-    A proxy for a single section from a parser.
+    A proxy for a compiled snapshot of a parser.
 
     It provides a basic layer to extend the use of ConfigParser in which
-    it acts as a proxy, redirecting queries from the magic `__getattr__`
-    to an SectionProxy object.
+    every section is compiled into a ``SectionProxy`` object that can be
+    reached as a plain attribute of the proxy.
+
+    The snapshot lives in the instance ``__dict__``, which is never modified
+    once it has been built; calling ``compile`` builds a new one and replaces
+    it with a single assignment, so readers never see a partial snapshot.
 
     Example usage::
 
         >>> import configparser
         >>> cfg = configparser.ConfigParser()
+        >>> cfg.read_string('[test_section]\\ntest_option = 1')
         >>>
         >>> sec = ParserProxy(cfg)
         >>> sec.test_section
         <SectionProxy: test_section>
+        >>> sec.test_section.test_option
+        1
         >>>
     """
 
@@ -122,15 +186,36 @@ class ParserProxy:
 
         :param parser: a ConfigParser object
         """
-        self._cp = parser
-        self._sections = {}
+        self.compile(parser)
 
-    def __getattr__(self, section: str) -> _default_section_proxy:
-        if section in self._sections:
-            return self._sections[section]
+    def compile(self, parser: ConfigParser = None) -> None:
+        """
+        Compile every section of the parser into a new snapshot and replace
+        the current one.
 
-        self._sections[section] = _default_section_proxy(self._cp, section)
-        return self._sections[section]
+        :param parser: Optional ConfigParser object to be compiled, if it is
+            not given, the current parser is used.
+        """
+        if parser is None:
+            parser = self._cp
+
+        sections = {}
+        for section in parser.sections():
+            if hasattr(self.__class__, section):
+                raise CriticalError('invalid section name: %s' % section)
+            start = time.perf_counter()
+            sections[section] = _default_section_proxy(parser, section)
+            if stats.enabled:
+                stats.record('compile', section, time.perf_counter() - start)
+
+        snapshot = dict(sections, _cp=parser, _sections=sections)
+        self.__dict__ = snapshot
+
+    def __getattr__(self, section: str) -> _default_section_proxy:
+        # Only reached when the section was not found in the snapshot.
+        if section.startswith('__'):
+            raise AttributeError(section)
+        raise NoSectionError(section)
 
 
 class SecretEngine(abc.ABC):
@@ -142,6 +227,25 @@ class SecretEngine(abc.ABC):
     def get_value(self, *args, **kwargs):
         pass
 
+    def get_values(self, keys: list) -> dict:
+        """
+        Return several secrets at once. Engines able to read them in bulk
+        should override this method.
+
+        :param keys: A list with the keys used to find the secrets.
+        :return: A ``dict`` like ``{key: value}``
+        """
+        return {key: self.get_value(key) for key in keys}
+
+    def renew(self) -> float:
+        """
+        Renew the credentials used by the engine (if any).
+
+        :return: Seconds until the credentials must be renewed again, or
+            ``None`` if they do not expire.
+        """
+        return None
+
 
 class VaultEngine(SecretEngine):
     """
@@ -158,6 +262,9 @@ class VaultEngine(SecretEngine):
         required to search for secrets.
     :param client: The hvac Client object for HashiCorp’s Vault.
     :param mp: Optional mount point of secret engine
+    :param login: Optional function used to authenticate the client again
+        when its token can no longer be renewed, it must return the response
+        of the login request.
 
     Example usage::
 
@@ -165,13 +272,36 @@ class VaultEngine(SecretEngine):
         >>> engine = VaultEngine(kv_map, vault)
     """
 
-    def __init__(self, kv_map: dict, client: hvac.Client, mp: str = None):
+    MAX_WORKERS = 8
+
+    def __init__(self,
+                 kv_map: dict,
+                 client: hvac.Client,
+                 mp: str = None,
+                 login: callable = None):
         """
         Initialize the object.
         """
         self.__kv_map = kv_map
         self.__client = client
         self.__mp = mp
+        self.__login = login
+
+    def renew(self) -> float:
+        """
+        Renew the lease of the client token. If the token is not renewable
+        anymore, the client is authenticated again with the login function.
+
+        :return: Seconds until the token must be renewed again, or ``None``
+            if it does not expire.
+        """
+        try:
+            res = self.__client.auth.token.renew_self()
+        except hvac.exceptions.VaultError:
+            if self.__login is None:
+                raise
+            res = self.__login()
+        return res['auth']['lease_duration'] or None
 
     def get_value(self, key: str) -> str:
         """
@@ -198,13 +328,57 @@ class VaultEngine(SecretEngine):
         if kv is None:
             return DEFAULT_NULL_RANDOM
 
+        return self.read_path(kv['path']).get(kv['key'], DEFAULT_NULL_RANDOM)
+
+    def read_path(self, path: str) -> dict:
+        """
+        Read all the secrets stored in a path.
+
+        :param path: A string with the vault path.
+        :return: A ``dict`` with the secrets of the path.
+        """
         res = self.__client.secrets.kv.read_secret_version(
-            path=kv['path'],
+            path=path,
             mount_point=self.__mp,
         )
         if 'data' in res:
-            return res['data']['data'].get(kv['key'], DEFAULT_NULL_RANDOM)
-        return DEFAULT_NULL_RANDOM
+            return res['data']['data']
+        return {}
+
+    def get_values(self, keys: list) -> dict:
+        """
+        Return several secrets at once. The keys are grouped by vault path,
+        so every path is read only once, and the distinct paths are read
+        concurrently.
+
+        :param keys: A list with the keys used to find the secrets.
+        :return: A ``dict`` like ``{key: value}``
+
+        Example usage::
+
+            >>> engine.get_values(['JWT_ENCODE_KEY', 'JWT_DECODE_KEY'])
+            {'JWT_ENCODE_KEY': 'secret', 'JWT_DECODE_KEY': 'secret'}
+        """
+        values = {}
+        paths = {}
+        for key in keys:
+            kv = self.__kv_map.get(key)
+            if kv is None:
+                values[key] = DEFAULT_NULL_RANDOM
+            else:
+                paths.setdefault(kv['path'], []).append((key, kv['key']))
+
+        if not paths:
+            return values
+
+        workers = min(len(paths), self.MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            data = dict(zip(paths, executor.map(self.read_path, paths)))
+
+        for path, pairs in paths.items():
+            for key, vault_key in pairs:
+                values[key] = data[path].get(vault_key, DEFAULT_NULL_RANDOM)
+        return values
 
 
 class EnvironEngine(SecretEngine):
@@ -242,6 +416,636 @@ class EnvironEngine(SecretEngine):
         return os.environ.get(name, DEFAULT_NULL_RANDOM)
 
 
+class FileEngine(SecretEngine):
+    """
+    Read secrets from an encrypted and indexed file, without network access.
+
+    The file is mapped in memory with ``mmap`` and it contains a hash table
+    that points to the records, so looking up a secret is O(1). Every value
+    is encrypted with AES-GCM, using the name of the secret as associated
+    data, and the names are stored as keyed hashes only.
+
+    The file is laid out as follows (integers are little endian)::
+
+        header: magic (4) | version (1) | reserved (3) | slots (4)
+        table:  slots * [ name hash (8) | offset (4) | length (4) ]
+        data:   records [ nonce (12) | ciphertext + tag ]
+
+    :param filename: Location of the secrets file.
+    :param key: The 32 bytes key used to encrypt the file.
+
+    Example usage::
+
+        >>> key = FileEngine.generate_key()
+        >>> FileEngine.build('secrets.vcv', {'VARIABLE-NAME': 'value'}, key)
+        >>> engine = FileEngine('secrets.vcv', key)
+        >>> engine.get_value('VARIABLE-NAME')
+        'value'
+    """
+    MAGIC = b'VCVS'
+    VERSION = 1
+    HEADER = struct.Struct('<4sB3xI')
+    SLOT = struct.Struct('<8sII')
+    NONCE_SIZE = 12
+
+    def __init__(self, filename: str, key: bytes):
+        """
+        Initialize the object.
+        """
+        enc_key, self.__idx_key = self.derive_keys(key)
+        self.__aes = AESGCM(enc_key)
+        with open(filename, 'rb') as fp:
+            self.__map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, slots = self.HEADER.unpack_from(self.__map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise CriticalError('invalid secrets file: %s' % filename)
+        self.__slots = slots
+
+    @staticmethod
+    def generate_key() -> bytes:
+        """
+        Generate a new random key to encrypt a secrets file.
+
+        :return: 32 random bytes.
+        """
+        return AESGCM.generate_key(bit_length=256)
+
+    @staticmethod
+    def derive_keys(key: bytes) -> tuple:
+        """
+        Derive the encryption and the index keys from the file key.
+
+        :param key: The 32 bytes key of the file.
+        :return: A tuple like ``(encryption_key, index_key)``
+        """
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=64, salt=None,
+                    info=b'virtual-cv secrets file')
+        derived = hkdf.derive(key)
+        return derived[:32], derived[32:]
+
+    @staticmethod
+    def hash_name(name: str, idx_key: bytes) -> bytes:
+        """
+        Returns the keyed hash of the name of a secret.
+
+        :param name: The name of the secret.
+        :param idx_key: The index key.
+        :return: 8 bytes
+        """
+        return hashlib.blake2b(name.encode(_default_encoding), key=idx_key,
+                               digest_size=8).digest()
+
+    @classmethod
+    def build(cls, filename: str, values: dict, key: bytes) -> None:
+        """
+        Write a new secrets file. The file is written to a temporary location
+        and moved to the final location at the end, so a running engine never
+        reads a partial file. Every call uses its own temporary file, so
+        several processes can write the same file at once.
+
+        :param filename: Location of the secrets file.
+        :param values: A ``dict`` like ``{name: value}`` with the secrets.
+        :param key: The 32 bytes key used to encrypt the file.
+        """
+        enc_key, idx_key = cls.derive_keys(key)
+        aes = AESGCM(enc_key)
+        slots = 1
+        while slots < len(values) * 2:
+            slots *= 2
+
+        table = [None] * slots
+        data = bytearray()
+        offset = cls.HEADER.size + cls.SLOT.size * slots
+        for name, value in values.items():
+            name_b = name.encode(_default_encoding)
+            if isinstance(value, str):
+                value = value.encode(_default_encoding)
+            nonce = os.urandom(cls.NONCE_SIZE)
+            record = nonce + aes.encrypt(nonce, value, name_b)
+
+            name_hash = cls.hash_name(name, idx_key)
+            index = int.from_bytes(name_hash, 'little') % slots
+            while table[index] is not None:
+                index = (index + 1) % slots
+            table[index] = (name_hash, offset + len(data), len(record))
+            data += record
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename) or None,
+                                   prefix=os.path.basename(filename) + '.')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, slots))
+                for slot in table:
+                    fp.write(cls.SLOT.pack(*(slot or (bytes(8), 0, 0))))
+                fp.write(data)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get_value(self, key: str) -> str:
+        """
+        Return a secret according to the supplied key. If the value is not
+        found, it returns by default ``DEFAULT_NULL_RANDOM``
+
+        :param key: A string with the key used to find the secret.
+        :return: The super secret value
+        """
+        name_hash = self.hash_name(key, self.__idx_key)
+        index = int.from_bytes(name_hash, 'little') % self.__slots
+        for _ in range(self.__slots):
+            pos = self.HEADER.size + self.SLOT.size * index
+            slot_hash, offset, length = self.SLOT.unpack_from(self.__map, pos)
+            if offset == 0:
+                break
+            if slot_hash == name_hash:
+                record = self.__map[offset:offset + length]
+                nonce = record[:self.NONCE_SIZE]
+                try:
+                    value = self.__aes.decrypt(
+                        nonce, record[self.NONCE_SIZE:],
+                        key.encode(_default_encoding))
+                except InvalidTag:
+                    pass
+                else:
+                    return value.decode(_default_encoding)
+            index = (index + 1) % self.__slots
+        return DEFAULT_NULL_RANDOM
+
+    def close(self) -> None:
+        self.__map.close()
+
+
+class GuardedEngine(SecretEngine):
+    """
+    Protect the workers from a slow or failing secret engine.
+
+    Every call to the engine has a deadline, and a circuit breaker stops
+    calling it after ``threshold`` consecutive failures. While the breaker
+    is open, the last-known-good values are served, either from memory or
+    from an encrypted snapshot file (see ``FileEngine``). The snapshot is
+    written by ``save``, out of the request path: when the credentials are
+    renewed, and once the startup secrets have been read. After
+    ``reset_timeout`` seconds, a single call is allowed to check if the
+    engine is back. An unreadable snapshot is ignored.
+
+    The engine can be replaced by a ``factory`` that creates it (like
+    ``get_vault_engine``, which logs in and reads the key/value map), so a
+    worker that starts while the engine is unreachable is served from the
+    snapshot, and the engine is created by the first call that succeeds.
+
+    Every trip, timeout, failure and fallback is recorded in
+    ``webapp.stats.stats`` with the ``breaker`` kind.
+
+    :param engine: The engine to be protected.
+    :param timeout: Deadline (in seconds) of every call to the engine.
+    :param threshold: Consecutive failures that open the breaker.
+    :param reset_timeout: Seconds the breaker stays open.
+    :param snapshot: Optional location of the last-known-good snapshot.
+    :param key: The 32 bytes key used to encrypt the snapshot.
+    :param factory: A function that creates the engine, when it is not
+        given.
+
+    Example usage::
+
+        >>> engine = GuardedEngine(factory=get_vault_engine, timeout=2,
+        ...                        snapshot='lkg.vcv', key=key)
+        >>> engine.get_value('VARIABLE-NAME')
+        'super secret value'
+        >>> engine.save()
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self,
+                 engine: SecretEngine = None,
+                 timeout: float = 5,
+                 threshold: int = 3,
+                 reset_timeout: float = 30,
+                 snapshot: str = None,
+                 key: bytes = None,
+                 factory: callable = None):
+        """
+        Initialize the object.
+        """
+        if engine is None and factory is None:
+            raise CriticalError('No secret engine was provided.')
+        self.engine = engine
+        self._factory = factory
+        self._engine_lock = threading.Lock()
+        self.timeout = timeout
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=VaultEngine.MAX_WORKERS,
+            thread_name_prefix='secret-engine')
+        self._lkg = {}
+        self._changed = False
+        self._snapshot = snapshot if key is not None else None
+        self._snapshot_key = key
+        self._snapshot_engine = None
+        if self._snapshot and os.path.exists(self._snapshot):
+            try:
+                self._snapshot_engine = FileEngine(self._snapshot, key)
+            except (CriticalError, OSError, struct.error, ValueError) as e:
+                logger.warning('unreadable snapshot %s: %r', self._snapshot,
+                               e)
+
+    def allow(self) -> bool:
+        """
+        Check if the engine can be called according to the breaker state.
+
+        :return: Returns ``True`` if it can be called, otherwise, returns
+            ``False``
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (self.state == self.OPEN and
+                    time.monotonic() - self._opened_at >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.OPEN:
+                return
+            if self.state == self.HALF_OPEN or \
+                    self._failures >= self.threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                stats.record('breaker', 'trip')
+                logger.warning('secret engine breaker open after %s failures',
+                               self._failures)
+
+    def get_engine(self) -> SecretEngine:
+        """
+        Returns the protected engine, it is created by the factory on the
+        first call.
+        """
+        with self._engine_lock:
+            if self.engine is None:
+                self.engine = self._factory()
+            return self.engine
+
+    def invoke(self, name: str, *args) -> any:
+        return getattr(self.get_engine(), name)(*args)
+
+    def call(self, name: str, *args) -> any:
+        """
+        Call a method of the engine with a deadline.
+
+        :param name: The name of the method (like ``get_value``)
+        :param args: Positional arguments passed to the method.
+        :return: The value returned by the function.
+        :raises SecretUnavailableError: When the breaker is open, or the call
+            fails or does not finish in time.
+        """
+        if not self.allow():
+            stats.record('breaker', 'rejected')
+            raise SecretUnavailableError('secret engine breaker is open')
+
+        future = self._executor.submit(self.invoke, name, *args)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            stats.record('breaker', 'timeout')
+            self.on_failure()
+            raise SecretUnavailableError('secret engine timed out') from None
+        except Exception as e:
+            stats.record('breaker', 'failure')
+            self.on_failure()
+            raise SecretUnavailableError(repr(e)) from e
+
+        self.on_success()
+        return result
+
+    def remember(self, values: dict) -> None:
+        """
+        Keep the values as last-known-good, they are written to the snapshot
+        file by ``save``.
+
+        :param values: A ``dict`` like ``{key: value}``
+        """
+        for key, value in values.items():
+            if value != DEFAULT_NULL_RANDOM and self._lkg.get(key) != value:
+                self._lkg[key] = value
+                self._changed = True
+
+    def save(self) -> bool:
+        """
+        Write the last-known-good values to the snapshot file, if any of
+        them has changed since the last call.
+
+        :return: Returns ``True`` if the file was written, otherwise, returns
+            ``False``
+        """
+        if not self._changed or not self._snapshot:
+            return False
+
+        self._changed = False
+        try:
+            FileEngine.build(self._snapshot, dict(self._lkg),
+                             self._snapshot_key)
+        except OSError as e:
+            self._changed = True
+            logger.exception(e)
+            return False
+        return True
+
+    def fallback(self, key: str, error: Exception) -> str:
+        """
+        Returns the last-known-good value of a secret. The optional secrets
+        are never remembered, so when there is no value, it returns
+        ``DEFAULT_NULL_RANDOM`` like the engines do for a missing secret,
+        and the default of ``get_secret`` is used.
+
+        :param key: A string with the key of the secret.
+        :param error: The error raised by the engine.
+        :return: The super secret value, or ``DEFAULT_NULL_RANDOM``
+        """
+        value = self._lkg.get(key)
+        if value is None and self._snapshot_engine is not None:
+            try:
+                value = self._snapshot_engine.get_value(key)
+            except (struct.error, ValueError):
+                value = DEFAULT_NULL_RANDOM
+            if value != DEFAULT_NULL_RANDOM:
+                self._lkg[key] = value
+            else:
+                value = None
+
+        if value is None:
+            stats.record('breaker', 'miss')
+            logger.warning('secret %s is not available: %s', key, error)
+            return DEFAULT_NULL_RANDOM
+        stats.record('breaker', 'fallback')
+        return value
+
+    def get_value(self, key: str) -> str:
+        """
+        Return a secret from the engine, or its last-known-good value if the
+        engine is not available.
+
+        :param key: A string with the key used to find the secret.
+        :return: The super secret value
+        """
+        try:
+            value = self.call('get_value', key)
+        except SecretUnavailableError as e:
+            return self.fallback(key, e)
+
+        self.remember({key: value})
+        return value
+
+    def get_values(self, keys: list) -> dict:
+        """
+        Return several secrets at once from the engine, or their
+        last-known-good values if the engine is not available (every key
+        falls back on its own, see ``fallback``)
+
+        :param keys: A list with the keys used to find the secrets.
+        :return: A ``dict`` like ``{key: value}``
+        """
+        try:
+            values = self.call('get_values', keys)
+        except SecretUnavailableError as e:
+            return {key: self.fallback(key, e) for key in keys}
+
+        self.remember(values)
+        return values
+
+    def renew(self) -> float:
+        """
+        Renew the credentials of the engine. While the engine is not
+        available, it asks to be called again after ``reset_timeout``
+        seconds.
+
+        :return: Seconds until the credentials must be renewed again, or
+            ``None`` if they do not expire.
+        """
+        try:
+            lease = self.call('renew')
+        except SecretUnavailableError as e:
+            logger.warning('secret engine not renewed: %s', e)
+            lease = self.reset_timeout
+        self.save()
+        return lease
+
+
+class CachedEngine(SecretEngine):
+    """
+    Keep in memory the secrets returned by another engine.
+
+    Each secret is kept for a configurable time to live, and when the
+    background renewal is started, the secrets and the credentials of the
+    engine are renewed before they expire, so reading a secret on the hot
+    path does not reach the engine.
+
+    If a secret can not be renewed, the last value is served until it
+    expires.
+
+    :param engine: The engine to be cached.
+    :param ttl: Default time to live (in seconds) of the secrets.
+    :param ttls: Optional ``dict`` with the time to live of specific keys.
+    :param ratio: Fraction of the time to live after which the background
+        renewal reads a secret again.
+
+    Example usage::
+
+        >>> engine = CachedEngine(get_vault_engine(), ttl=300,
+        ...                       ttls={'JWT_ENCODE_KEY': 3600})
+        >>> engine.start()
+        >>> engine.get_value('JWT_ENCODE_KEY')
+        'super secret value'
+    """
+
+    def __init__(self,
+                 engine: SecretEngine,
+                 ttl: float = 300,
+                 ttls: dict = None,
+                 ratio: float = 0.75):
+        """
+        Initialize the object.
+        """
+        self.engine = engine
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.ratio = ratio
+        self._cache = {}
+        self._renew_at = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def get_ttl(self, key: str) -> float:
+        """
+        Returns the time to live of a secret.
+
+        :param key: A string with the key of the secret.
+        :return: Seconds
+        """
+        return self.ttls.get(key, self.ttl)
+
+    def set_cache(self, key: str, value: str) -> None:
+        """
+        Add a secret to the cache.
+
+        :param key: A string with the key of the secret.
+        :param value: The super secret value
+        """
+        now = time.monotonic()
+        ttl = self.get_ttl(key)
+        self._cache[key] = (value, now + ttl, now + ttl * self.ratio)
+
+    def fetch(self, key: str) -> str:
+        """
+        Read a secret from the engine and add it to the cache.
+
+        :param key: A string with the key of the secret.
+        :return: The super secret value
+        """
+        value = self.engine.get_value(key)
+        self.set_cache(key, value)
+        return value
+
+    def fetch_many(self, keys: list) -> dict:
+        """
+        Read several secrets from the engine at once and add them to the
+        cache.
+
+        :param keys: A list with the keys of the secrets.
+        :return: A ``dict`` like ``{key: value}``
+        """
+        values = self.engine.get_values(keys)
+        for key, value in values.items():
+            self.set_cache(key, value)
+        return values
+
+    def get_values(self, keys: list) -> dict:
+        """
+        Return several secrets at once, the ones that are not cached are read
+        from the engine in bulk.
+
+        :param keys: A list with the keys used to find the secrets.
+        :return: A ``dict`` like ``{key: value}``
+        """
+        now = time.monotonic()
+        values = {}
+        missing = []
+        for key in keys:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > now:
+                values[key] = entry[0]
+            else:
+                missing.append(key)
+
+        if missing:
+            with self._lock:
+                values.update(self.fetch_many(missing))
+        return values
+
+    def get_value(self, key: str, **kwargs) -> str:
+        """
+        Return a secret from the cache. If it is not cached or it has
+        expired, it is read from the engine.
+
+        :param key: A string with the key used to find the secret.
+        :param kwargs: Keyword argument parameters are passed to the engine,
+            when they are given, the cache is not used.
+        :return: The super secret value
+        """
+        if kwargs:
+            return self.engine.get_value(key, **kwargs)
+
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            return self.fetch(key)
+
+    def renew(self) -> float:
+        """
+        Renew the credentials of the engine.
+
+        :return: Seconds until the credentials must be renewed again, or
+            ``None`` if they do not expire.
+        """
+        lease = self.engine.renew()
+        if lease is not None:
+            self._renew_at = time.monotonic() + lease * self.ratio
+        else:
+            self._renew_at = None
+        return lease
+
+    def renew_due(self) -> float:
+        """
+        Renew the credentials and the secrets that are about to expire.
+
+        :return: Seconds until the next renewal is due.
+        """
+        now = time.monotonic()
+        if self._renew_at is not None and self._renew_at <= now:
+            self.renew()
+
+        # The requests add secrets to the cache while it is iterated.
+        with self._lock:
+            entries = list(self._cache.items())
+        due = [key for key, entry in entries if entry[2] <= now]
+        if due:
+            with self._lock:
+                self.fetch_many(due)
+            with self._lock:
+                entries = list(self._cache.items())
+
+        # Secrets cached after this call must be renewed in time too, so the
+        # delay is never longer than the shortest time to live.
+        ttl = min(self.ttl, min(self.ttls.values(), default=self.ttl))
+        deadlines = [entry[2] for _, entry in entries]
+        if self._renew_at is not None:
+            deadlines.append(self._renew_at)
+        delay = min(deadlines, default=float('inf')) - time.monotonic()
+        return max(min(delay, ttl * self.ratio), 0)
+
+    def _run(self) -> None:
+        delay = 0
+        while not self._stop_event.wait(delay):
+            try:
+                delay = self.renew_due()
+            except Exception as e:
+                logger.exception(e)
+                delay = min(self.ttl * (1 - self.ratio), 30)
+
+    def start(self) -> None:
+        """
+        Renew the credentials of the engine and start the background renewal.
+        """
+        self.renew()
+        self._thread = threading.Thread(
+            target=self._run, name='secret-renewal', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
 class Secrets:
     def __init__(self, engine: SecretEngine = None) -> None:
         self.engine = engine
@@ -305,6 +1109,26 @@ class Secrets:
             raise CriticalError(err_msg) from e
         return value
 
+    def prefetch(self, keys: list) -> dict:
+        """
+        Read several secrets from the engine at once. This is useful at
+        startup, where engines that keep the secrets in memory, like
+        ``CachedEngine``, can read them all in bulk instead of making one
+        request per key.
+
+        :param keys: A list with the variable names.
+        :return: A ``dict`` like ``{key: value}`` with the raw values.
+        :raises CriticalError: When the engine has not been defined.
+        """
+        if self.engine is None:
+            raise CriticalError('No secret engine was provided.')
+
+        start = time.perf_counter()
+        values = self.engine.get_values(keys)
+        if stats.enabled:
+            stats.record('secrets', '<prefetch>', time.perf_counter() - start)
+        return values
+
     def get_value(self,
                   key: str,
                   default: any = DEFAULT_NULL_RANDOM,
@@ -337,7 +1161,10 @@ class Secrets:
         if self.engine is None:
             raise CriticalError('No secret engine was provided.')
 
+        start = time.perf_counter()
         value = self.engine.get_value(key, **kwargs)
+        if stats.enabled:
+            stats.record('secrets', key, time.perf_counter() - start)
         if value == DEFAULT_NULL_RANDOM:
             if default != DEFAULT_NULL_RANDOM:
                 return default
@@ -355,24 +1182,59 @@ class Secrets:
 
 _default_parser_proxy = ParserProxy
 _global_secrets = Secrets()
+_reload_callbacks = []
 _global_config = ConfigParser(interpolation=ExtendedInterpolation())
 settings_pool = _default_parser_proxy(_global_config)
 
 
 def get_vault_engine():
     mount_point = os.environ.get('VAULT_MOUNT_POINT')
-    client = hvac.Client(url=os.environ.get('VAULT_ADDR'))
-    client.auth.approle.login(
+    client = hvac.Client(url=os.environ.get('VAULT_ADDR'),
+                         timeout=settings_pool.secret.timeout)
+    login = functools.partial(
+        client.auth.approle.login,
         role_id=os.environ.get('VAULT_ROLE_ID'),
         secret_id=os.environ.get('VAULT_SECRET_ID'),
     )
+    login()
 
     kv_map = client.secrets.kv.read_secret_version(
         mount_point=mount_point,
         path=os.environ.get('VAULT_KV_MAP_PATH'))
     kv_map = kv_map['data']['data'].get(os.environ.get('VAULT_KV_MAP_KEY'))
     kv_map = json.loads(kv_map)
-    return VaultEngine(kv_map, client, mp=mount_point)
+    return VaultEngine(kv_map, client, mp=mount_point, login=login)
+
+
+def get_file_key(required: bool = True) -> bytes:
+    """
+    Read the key of the secrets files from its environment variable.
+
+    :param required: Raise an error if the variable is not defined.
+    :return: The 32 bytes key, or ``None`` if it is not defined.
+    :raises CriticalError: When the key is required and is not defined.
+    """
+    name = settings_pool.file.key_variable
+    key = os.environ.get(name)
+    if key is None:
+        if required:
+            raise CriticalError('missing key: %s' % name)
+        return None
+    return Secrets.b64decode(name, key)
+
+
+def get_file_engine():
+    return FileEngine(settings_pool.file.path, get_file_key())
+
+
+def get_guarded_engine(factory: callable):
+    cfg = settings_pool.secret
+    return GuardedEngine(factory=factory,
+                         timeout=cfg.timeout,
+                         threshold=cfg.breaker_threshold,
+                         reset_timeout=cfg.breaker_reset,
+                         snapshot=cfg.snapshot_path or None,
+                         key=get_file_key(required=False))
 
 
 def set_secret_engine(engine: SecretEngine):
@@ -394,6 +1256,29 @@ def get_secret(key: str, **kwargs):
     return _global_secrets.get_value(key, **kwargs)
 
 
+def prefetch_secrets(keys: list) -> dict:
+    """
+    Read several secrets at once, so later calls to ``get_secret`` can be
+    served from memory. The values are not kept by ``get_secret``, so it is
+    only useful when the engine is wrapped by a ``CachedEngine``.
+
+    :param keys: A list with the variable names.
+    :return: A ``dict`` like ``{key: value}`` with the raw values.
+    """
+    return _global_secrets.prefetch(keys)
+
+
+def enable_instrumentation() -> None:
+    """
+    Count and time every read of the settings and every secret lookup. The
+    totals are available in ``webapp.stats.stats``.
+    """
+    global _default_section_proxy
+    _default_section_proxy = InstrumentedSectionProxy
+    stats.enabled = True
+    settings_pool.compile()
+
+
 def load(filename: str) -> None:
     """
     Read and parse a filename.
@@ -401,7 +1286,8 @@ def load(filename: str) -> None:
     :param filename: A string with the filename to be read.
     """
     with open(filename) as fp:
-        _global_config.read_file(fp)
+        settings_pool._cp.read_file(fp)
+    settings_pool.compile()
 
 
 def load_dir(dir_path: str, ext='.cfg'):
@@ -412,7 +1298,178 @@ def load_dir(dir_path: str, ext='.cfg'):
     :param ext: Extension name, the default value is ".cfg"
     """
     filenames = glob.glob(os.path.join(dir_path, '*' + ext))
-    _global_config.read(filenames)
+    settings_pool._cp.read(filenames)
+    settings_pool.compile()
+
+
+def on_reload(*sections: str):
+    """
+    Register a function to be called after the settings have been reloaded.
+    The function receives a ``set`` with the name of the changed sections.
+
+    :param sections: Optional names of the sections the function depends on,
+        if they are given, the function is only called when one of them has
+        changed.
+
+    Example usage::
+
+        >>> @on_reload('locales')
+        ... def reload_languages(changed):
+        ...     pass
+    """
+    def dummy_wrap(func):
+        _reload_callbacks.append((frozenset(sections), func))
+        return func
+
+    return dummy_wrap
+
+
+def reload_dir(dir_path: str, ext='.cfg', required: set = ()) -> set:
+    """
+    Read and parse again all files that contain the specified extension, and
+    replace the current settings snapshot with the new one. The files are
+    read into a new parser, so the readers keep using the previous snapshot
+    until it is swapped in a single assignment.
+
+    :param dir_path: A string with the directory to check
+    :param ext: Extension name, the default value is ".cfg"
+    :param required: The sections that must be present, otherwise, the
+        previous snapshot is kept (like when a file is half-written).
+    :return: A ``set`` with the name of the changed sections.
+    :raises CriticalError: When a section is missing or invalid, the previous
+        snapshot is kept.
+    """
+    parser = ConfigParser(interpolation=ExtendedInterpolation())
+    parser.read(glob.glob(os.path.join(dir_path, '*' + ext)))
+    missing = set(required) - set(parser.sections())
+    if missing:
+        raise CriticalError('missing sections: %s' %
+                            ', '.join(sorted(missing)))
+
+    previous = settings_pool._sections
+    settings_pool.compile(parser)
+    current = settings_pool._sections
+
+    changed = {
+        name for name in previous.keys() | current.keys()
+        if name not in previous or name not in current
+        or vars(previous[name]) != vars(current[name])
+    }
+    for deps, callback in _reload_callbacks:
+        if changed and (not deps or deps & changed):
+            callback(changed)
+    return changed
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Background thread that reloads the settings when the files of a
+    directory change.
+
+    Changes are detected by polling the mtime and size of the files every
+    ``interval`` seconds, or, when the ``inotify_simple`` package is
+    available, by waiting for inotify events on the directory.
+
+    :param dir_path: A string with the directory to watch.
+    :param ext: Extension name, the default value is ".cfg"
+    :param interval: Seconds between checks.
+    :param name: The name of the thread.
+    :param required: The sections that every reload must have, by default,
+        the sections loaded when the watcher is created.
+
+    Example usage::
+
+        >>> watcher = ConfigWatcher('config.d/', interval=2)
+        >>> watcher.start()
+    """
+
+    def __init__(self, dir_path: str, ext: str = '.cfg', interval: float = 2,
+                 name: str = 'config-watcher', required: set = None):
+        """
+        Initialize the object.
+        """
+        super().__init__(name=name, daemon=True)
+        self.dir_path = dir_path
+        self.ext = ext
+        self.interval = interval
+        if required is None:
+            required = settings_pool._sections
+        self.required = frozenset(required)
+        self._stop_event = threading.Event()
+        self._stamp = self.get_stamp()
+        self._inotify = None
+
+        if INotify is not None:
+            self._inotify = INotify()
+            for path in self.get_dirs():
+                self._inotify.add_watch(
+                    path,
+                    inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                    | inotify_flags.CREATE | inotify_flags.DELETE
+                    | inotify_flags.MOVED_FROM,
+                )
+
+    def get_dirs(self) -> list:
+        """
+        Returns the directories watched with inotify.
+        """
+        return [self.dir_path]
+
+    def get_stamp(self) -> dict:
+        """
+        Returns the mtime and size of every watched file.
+
+        :return: A ``dict`` like ``{filename: (mtime_ns, size)}``
+        """
+        stamp = {}
+        for filename in glob.glob(os.path.join(self.dir_path, '*' + self.ext)):
+            try:
+                st = os.stat(filename)
+            except FileNotFoundError:
+                continue
+            stamp[filename] = (st.st_mtime_ns, st.st_size)
+        return stamp
+
+    def wait(self) -> None:
+        """
+        Block until a change may have happened or the watcher is stopped.
+        """
+        if self._inotify is None:
+            self._stop_event.wait(self.interval)
+        else:
+            self._inotify.read(timeout=int(self.interval * 1000))
+
+    def check(self) -> set:
+        """
+        Reload the settings if any of the watched files changed.
+
+        :return: A ``set`` with the name of the changed sections.
+        """
+        stamp = self.get_stamp()
+        if stamp == self._stamp:
+            return set()
+
+        self._stamp = stamp
+        return reload_dir(self.dir_path, self.ext, self.required)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.wait()
+            if self._stop_event.is_set():
+                break
+            try:
+                changed = self.check()
+            except CriticalError as e:
+                # CriticalError is a SystemExit, it would stop the thread.
+                logger.error('settings not reloaded: %s', e)
+            except Exception as e:
+                logger.exception(e)
+            else:
+                if changed:
+                    logger.info('settings reloaded: %s', ', '.join(changed))
+
+    def stop(self) -> None:
+        self._stop_event.set()
 
 
 @core.context_processor
@@ -422,4 +1479,7 @@ def ctx_settings():
 
 __all__ = ['settings_pool', 'get_secret', 'load_dir', 'ParserProxy',
            'SectionProxy', 'Secrets', 'SecretEngine', 'VaultEngine',
-           'EnvironEngine', 'get_vault_engine', 'set_secret_engine']
+           'EnvironEngine', 'get_vault_engine', 'set_secret_engine',
+           'reload_dir', 'on_reload', 'ConfigWatcher', 'CachedEngine',
+           'prefetch_secrets', 'FileEngine', 'get_file_engine',
+           'enable_instrumentation', 'GuardedEngine', 'get_guarded_engine']
@@ -0,0 +1,278 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import abort
+from flask import request
+from flask import Response
+from flask import send_from_directory
+from werkzeug.exceptions import NotFound
+
+from .assets import Assets
+from .stats import stats
+from .webapp import core
+
+
+class HotCache:
+    """
+    Bounded LRU cache of the responses of small static files, the size of
+    the cache is the sum of the size of the bodies.
+
+    :param max_size: Maximum size (in bytes) of the cache.
+    :param max_item_size: Maximum size (in bytes) of a file in the cache.
+
+    Example usage::
+
+        >>> cache = HotCache(max_size=1024 * 1024)
+        >>> cache.set('favicon.ico', b'...', [('Content-Type', 'image/x')])
+        >>> cache.get('favicon.ico')
+        (b'...', [('Content-Type', 'image/x')])
+    """
+
+    def __init__(self, max_size: int = 8 * 1024 * 1024,
+                 max_item_size: int = 512 * 1024):
+        """
+        Initialize the object.
+        """
+        self.max_size = max_size
+        self.max_item_size = max_item_size
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: any) -> tuple:
+        """
+        :return: A tuple like ``(body, headers)``, or ``None`` if the key is
+            not in the cache.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def set(self, key: any, body: bytes, headers: list) -> bool:
+        """
+        Add a response to the cache, the least recently used responses are
+        removed to make room for it.
+
+        :return: Returns ``True`` if it was added, otherwise, returns
+            ``False`` (the body is too big)
+        """
+        if len(body) > min(self.max_item_size, self.max_size):
+            return False
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._items[key] = (body, headers)
+            self.size += len(body)
+            while self.size > self.max_size:
+                _, (old_body, _) = self._items.popitem(last=False)
+                self.size -= len(old_body)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class StaticFiles:
+    """
+    Serve the files of the static folder with strong ETags, computed once at
+    startup by ``index``. The names of the secured files (see ``Assets``)
+    are derived from the original name, not from the content, so they keep
+    their URL across deploys: they are served as public, but the clients
+    must revalidate them (a ``304`` while the ETag does not change).
+
+    When ``AssetsCLI`` has written the compressed variants of a file, the
+    best one according to ``Accept-Encoding`` is served instead, so there
+    is no compression in the request path.
+
+    The responses of the small files are kept in a ``HotCache``, so the most
+    requested files are served without touching the disk. Once the index is
+    built, the names that are not found (like the ones probed by bots) are
+    remembered for ``MISSING_TTL`` seconds.
+
+    The files that are not in the index are served as Flask does by default.
+
+    :param folder: Location of the static folder.
+    :param cache: The cache of the responses.
+
+    Example usage::
+
+        >>> static_files = StaticFiles(core.static_folder)
+        >>> static_files.index(assets.names.values())
+        >>> core.view_functions['static'] = static_files.send_file
+    """
+    MISSING_TTL = 60
+    MISSING_MAX = 4096
+
+    def __init__(self, folder: str, cache: HotCache = None):
+        """
+        Initialize the object.
+        """
+        self.folder = folder
+        self.cache = HotCache() if cache is None else cache
+        self.missing = {}
+        self.etags = {}
+        self.variants = {}
+        self.secured = frozenset()
+
+    @staticmethod
+    def get_etag(path: str) -> str:
+        """
+        Compute the strong ETag of a file from its content.
+
+        :param path: Location of the file.
+        :return: The ETag, without quotes.
+        """
+        return Assets.hash_file(path)[:32]
+
+    def index(self, secured: list = ()) -> int:
+        """
+        Compute the ETag of every file in the static folder.
+
+        :param secured: The names of the secured files.
+        :return: The number of files in the index.
+        """
+        etags = {}
+        variants = {}
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.folder)
+                filename = filename.replace(os.sep, '/')
+                etags[filename] = self.get_etag(path)
+                found = {encoding: filename + ext
+                         for encoding, ext in Assets.ENCODINGS.items()
+                         if os.path.exists(path + ext)}
+                if found:
+                    variants[filename] = found
+
+        self.etags = etags
+        self.variants = variants
+        self.missing = {}
+        self.cache.clear()
+        self.secured = frozenset(secured)
+        return len(etags)
+
+    def set_headers(self, response: Response, filename: str,
+                    etag: str) -> Response:
+        response.set_etag(etag)
+        if filename in self.variants:
+            response.vary.add('Accept-Encoding')
+        if filename in self.secured:
+            response.cache_control.public = True
+            response.cache_control.no_cache = True
+        return response
+
+    def send_unknown(self, filename: str, **kwargs) -> Response:
+        """
+        Serve a file that is not in the index.
+
+        :param filename: Relative path of the file in the folder.
+        :param kwargs: Keyword arguments passed to ``send_from_directory``
+        :return: The response with the file.
+        :raises NotFound: When the file does not exist.
+        """
+        if not self.etags:
+            return send_from_directory(self.folder, filename, **kwargs)
+
+        expires = self.missing.get(filename)
+        if expires is not None and expires > time.monotonic():
+            abort(404)
+
+        try:
+            return send_from_directory(self.folder, filename, **kwargs)
+        except NotFound:
+            if len(self.missing) >= self.MISSING_MAX:
+                self.missing = {}
+            self.missing[filename] = time.monotonic() + self.MISSING_TTL
+            raise
+
+    def send_file(self, filename: str, mimetype: str = None) -> Response:
+        """
+        View function of the static files.
+
+        :param filename: Relative path of the file in the folder.
+        :param mimetype: The mimetype of the file, by default it is guessed
+            from the filename.
+        :return: The response with the file, or 304 if the client already has
+            the same version.
+        """
+        etag = self.etags.get(filename)
+        if etag is None:
+            return self.send_unknown(filename, mimetype=mimetype)
+
+        variants = self.variants.get(filename)
+        encoding = None
+        if variants is not None:
+            encoding = request.accept_encodings.best_match(variants)
+            if encoding is not None:
+                etag = '%s-%s' % (etag, encoding)
+
+        if request.if_none_match.contains_weak(etag):
+            return self.set_headers(Response(status=304), filename, etag)
+
+        # the same file is served with different mimetypes (like favicon)
+        key = (filename, encoding, mimetype)
+        item = self.cache.get(key)
+        if item is not None:
+            if stats.enabled:
+                stats.record('static', 'hit')
+            return Response(item[0], headers=item[1])
+        if stats.enabled:
+            stats.record('static', 'miss')
+
+        path = filename
+        if encoding is not None:
+            path = variants[encoding]
+        mimetype = mimetype or mimetypes.guess_type(filename)[0]
+        mimetype = mimetype or 'application/octet-stream'
+
+        abspath = os.path.join(self.folder, path)
+        try:
+            st = os.stat(abspath)
+        except FileNotFoundError:
+            abort(404)
+        if st.st_size > self.cache.max_item_size:
+            response = send_from_directory(self.folder, path, etag=False,
+                                           mimetype=mimetype)
+        else:
+            with open(abspath, 'rb') as fp:
+                body = fp.read()
+            response = Response(body, mimetype=mimetype)
+            response.last_modified = st.st_mtime
+            response.cache_control.no_cache = True
+        if encoding is not None:
+            response.content_encoding = encoding
+        self.set_headers(response, filename, etag)
+
+        if st.st_size <= self.cache.max_item_size:
+            self.cache.set(key, body, list(response.headers))
+        return response
+
+
+static_files = StaticFiles(core.static_folder)
+core.view_functions['static'] = static_files.send_file
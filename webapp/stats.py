@@ -0,0 +1,144 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import sys
+import threading
+
+import requests
+
+from .common import Reactor
+from .webapp import core
+
+
+class Stats:
+    """
+    Thread-safe counters of how many times something happens and how long
+    it takes, grouped by kind and name.
+
+    Recording is opt-in: callers on the hot path must check ``enabled``
+    before measuring anything.
+
+    Example usage::
+
+        >>> stats = Stats()
+        >>> stats.enabled = True
+        >>> stats.record('settings', 'server.debug_mode', 0.000001)
+        >>> stats.totals()
+        [{'kind': 'settings', 'name': 'server.debug_mode', 'count': 1,
+          'time': 1e-06}]
+    """
+
+    def __init__(self):
+        """
+        Initialize the object.
+        """
+        self.enabled = False
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, elapsed: float = 0) -> None:
+        """
+        Count an event and add the time it took.
+
+        :param kind: Group of the event. Eg.: settings, secrets, etc.
+        :param name: Name of the event.
+        :param elapsed: Seconds spent.
+        """
+        with self._lock:
+            entry = self._data.get((kind, name))
+            if entry is None:
+                self._data[(kind, name)] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def get(self, kind: str, name: str) -> tuple:
+        """
+        Returns the totals of an event.
+
+        :return: A tuple like ``(count, seconds)``
+        """
+        return tuple(self._data.get((kind, name), (0, 0)))
+
+    def totals(self) -> list:
+        """
+        Returns the totals of every event, sorted by the time spent.
+
+        :return: A ``list`` of ``dict`` objects.
+        """
+        with self._lock:
+            data = [dict(kind=kind, name=name, count=count, time=elapsed)
+                    for (kind, name), (count, elapsed) in self._data.items()]
+        data.sort(key=lambda e: (e['time'], e['count']), reverse=True)
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data = {}
+
+
+stats = Stats()
+
+
+@core.before_request
+def count_request():
+    if stats.enabled:
+        stats.record('http', 'requests')
+
+
+# STATS CLI
+###############################################################################
+class StatsCLI(Reactor):
+    LINE_FORMAT = '{kind:<10} {name:<40} {count:>10} {time:>12} {avg:>10}'
+
+    def __init__(self, parent):
+        self.name = 'stats'
+        self.parser = parent.add_parser(
+            self.name, help='Show the counters of a running instance')
+        self.parser.add_argument(
+            '-u', '--url',
+            help='Base URL of the instance, eg.: http://localhost:5000',
+            metavar='<url>',
+            required=True,
+        )
+        self.parser.add_argument(
+            '-k', '--kind',
+            help='Show only the counters of a kind, eg.: settings, secrets',
+            metavar='<kind>',
+        )
+
+    def show(self, data: list, kind: str = None):
+        print(self.LINE_FORMAT.format(kind='KIND', name='NAME', count='COUNT',
+                                      time='TOTAL (ms)', avg='AVG (us)'))
+        for entry in data:
+            if kind is not None and entry['kind'] != kind:
+                continue
+            print(self.LINE_FORMAT.format(
+                kind=entry['kind'],
+                name=entry['name'],
+                count=entry['count'],
+                time='%.3f' % (entry['time'] * 1e3),
+                avg='%.2f' % (entry['time'] / entry['count'] * 1e6),
+            ))
+
+    def process(self, args):
+        url = args.url.rstrip('/') + '/api/v1/debug/stats'
+        res = requests.get(url, timeout=10)
+        if res.status_code != 200:
+            print('error: %s returned %s' % (url, res.status_code),
+                  file=sys.stderr)
+            exit(1)
+        self.show(res.json()['stats'], kind=args.kind)
+
+
+__all__ = ['stats', 'Stats', 'StatsCLI']
@@ -0,0 +1,140 @@
+#  Copyright 2021 Ismael Lugo <ismael.lugo@deloe.net>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import time
+
+from flask import Flask
+from flask import url_for
+
+from .locales import i18n
+from .locales import languages
+from .locales import negotiate_locale
+from .logger import logger
+
+# Pages rendered by the warm-up, in every language.
+PAGES = ('frontend_home.home_page', 'frontend_tac.tac_page',
+         'frontend_pp.privacy_page', 'frontend_auth.auth_code')
+
+# The most common Accept-Language headers (the defaults of the browsers),
+# they are negotiated once so the first requests are served from the cache
+# of ``negotiate_locale``.
+ACCEPT_LANGUAGES = (
+    '',
+    'es-ES,es;q=0.9',
+    'es-ES,es;q=0.9,en;q=0.8',
+    'es-419,es;q=0.9',
+    'es-CL,es;q=0.9',
+    'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
+    'en-US,en;q=0.9',
+    'en-US,en;q=0.5',
+    'en-GB,en-US;q=0.9,en;q=0.8',
+    'en-GB,en;q=0.9',
+    'ja,en-US;q=0.9,en;q=0.8',
+    'ja-JP,ja;q=0.9',
+)
+
+
+class WarmUp:
+    """
+    Prepare a worker before it accepts traffic: every page is requested in
+    every language (and tier) through the test client, so the templates are
+    compiled, and the translations, the secured names of the assets and the
+    caches of the pages and static files are ready for the first request.
+    The time of every step is logged.
+
+    :param app: The application.
+    :param token: Optional access token, the pages are also requested with
+        it to render the tier of the authenticated users.
+
+    Example usage::
+
+        >>> warm_up = WarmUp(core, token=create_access_token('warm-up'))
+        >>> warm_up.add('qr', qr.get_qr_code, 'https://localhost')
+        >>> warm_up.run()
+        {'locales': 0.0001, 'qr': 0.0201, 'pages': 0.4113, ...}
+    """
+
+    def __init__(self, app: Flask, token: str = None):
+        """
+        Initialize the object.
+        """
+        self.app = app
+        self.token = token
+        self.client = app.test_client()
+        self.steps = [('locales', self.warm_locales, ()),
+                      ('pages', self.warm_pages, ()),
+                      ('errors', self.warm_errors, ()),
+                      ('translations', self.warm_translations, ())]
+
+    def add(self, name: str, func: callable, *args) -> None:
+        """
+        Add a step to the warm-up.
+
+        :param name: The name of the step, used in the log.
+        :param func: The function of the step.
+        :param args: The arguments of the function.
+        """
+        self.steps.append((name, func, args))
+
+    def get(self, path: str, **query) -> int:
+        response = self.client.get(path, query_string=query)
+        response.get_data()  # render the streamed pages
+        response.close()
+        if response.status_code >= 500:
+            logger.warning('warm-up: %s returned %d', path,
+                           response.status_code)
+        return response.status_code
+
+    @staticmethod
+    def warm_locales() -> None:
+        for accept_language in ACCEPT_LANGUAGES:
+            negotiate_locale(accept_language)
+
+    def warm_pages(self) -> None:
+        with self.app.test_request_context('/'):
+            paths = [url_for(endpoint) for endpoint in PAGES]
+        tokens = [{}] if self.token is None else [{}, {'__token': self.token}]
+        for path in paths:
+            for lang in languages:
+                for token in tokens:
+                    self.get(path, locale=lang.language, **token)
+
+    def warm_errors(self) -> None:
+        for lang in languages:
+            self.get('/warm-up/not-found', locale=lang.language)
+
+    def warm_translations(self) -> None:
+        # the token is required by the translations with private data
+        token = {} if self.token is None else {'__token': self.token}
+        for bp_name, lang in i18n.index:
+            self.get('/api/v1/i18n/%s/%s' % (bp_name, lang), **token)
+
+    def run(self) -> dict:
+        """
+        Run every step.
+
+        :return: A ``dict`` with the seconds spent in every step.
+        """
+        timings = {}
+        start = time.perf_counter()
+        for name, func, args in self.steps:
+            step_start = time.perf_counter()
+            try:
+                func(*args)
+            except Exception as e:
+                logger.exception(e)
+            timings[name] = time.perf_counter() - step_start
+            logger.info('warm-up %s: %.1f ms', name, timings[name] * 1e3)
+        logger.info('warm-up done in %.1f ms',
+                    (time.perf_counter() - start) * 1e3)
+        return timings
@@ -11,9 +11,70 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import hashlib
+import inspect
+import os
+
+import jinja2
 from flask import Flask
 from flask_babel import Babel
 from flask_wtf.csrf import CSRFProtect
+from jinja2 import FileSystemBytecodeCache
+
+
+class TemplateCache(FileSystemBytecodeCache):
+    """
+    Bytecode cache of the compiled templates, stored in a folder that is
+    shared by every worker of the node, so a template is only compiled by
+    the first worker that needs it. The bytecode is discarded when the
+    source of the template changes.
+
+    :param directory: The folder of the cache, by default, a folder in the
+        temporary directory of the user.
+    :param salt: Text added to the key of every template, it must change
+        when the compiled code changes for the same source (like the
+        extensions of the environment).
+
+    Example usage::
+
+        >>> salt = TemplateCache.get_salt(core.jinja_env.extensions)
+        >>> core.jinja_env.bytecode_cache = TemplateCache('/var/cache/cv',
+        ...                                               salt=salt)
+    """
+
+    def __init__(self, directory: str = None, salt: str = ''):
+        """
+        Initialize the object.
+        """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, pattern='__webapp_%s.cache')
+        self.salt = salt
+
+    @staticmethod
+    def get_salt(extensions: dict) -> str:
+        """
+        Create the salt of an environment from the version of Jinja and the
+        source code of its extensions, so a deploy that changes how an
+        extension rewrites the templates does not load stale bytecode.
+
+        :param extensions: The extensions of the environment, like
+            ``{identifier: extension}``
+        :return: The hexadecimal salt.
+        """
+        digest = hashlib.sha256(jinja2.__version__.encode('utf-8'))
+        for identifier in sorted(extensions):
+            digest.update(identifier.encode('utf-8'))
+            try:
+                path = inspect.getsourcefile(type(extensions[identifier]))
+                with open(path, 'rb') as fp:
+                    digest.update(fp.read())
+            except (OSError, TypeError):
+                pass
+        return digest.hexdigest()[:16]
+
+    def get_cache_key(self, name: str, filename: str = None) -> str:
+        return super().get_cache_key(self.salt + name, filename)
 
 
 core = Flask(__name__, static_folder='assets/dist')
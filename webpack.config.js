@@ -20,11 +20,6 @@ module.exports = [
                         },
                     ],
             },
-        resolve: {
-            alias: {
-                    locales: `${__dirname}/webapp/assets/src/locales/home`,
-                },
-            },
         plugins: [
                 new CopyPlugin({
                   patterns: [
@@ -57,11 +52,6 @@ module.exports = [
                         },
                     ],
             },
-        resolve: {
-            alias: {
-                    locales: `${__dirname}/webapp/assets/src/locales/home-limited`,
-                },
-            },
         plugins: [
                 new CopyPlugin({
                   patterns: [
@@ -119,17 +109,19 @@ module.exports = [
                         },
                     ],
             },
-        resolve: {
-            alias: {
-                    locales: `${__dirname}/webapp/assets/src/locales/errors`,
-                },
-            },
         plugins: [
-          new webpack.EnvironmentPlugin({
-            "TS_G_ANALYTICS_ID": process.env.TS_G_ANALYTICS_ID,
-          } ),
+                new CopyPlugin({
+                  patterns: [
+                    {
+                        from: "webapp/assets/src/locales/errors/",
+                        to: "locales/errors/"
+                    },
+                  ],
+                }),
+                new webpack.EnvironmentPlugin({
+                    "TS_G_ANALYTICS_ID": process.env.TS_G_ANALYTICS_ID,
+                }),
         ],
-
     },
    {
         entry: './webapp/assets/src/privacy.js',
@@ -173,11 +165,6 @@ module.exports = [
                         },
                     ],
             },
-        resolve: {
-            alias: {
-                    locales: `${__dirname}/webapp/assets/src/locales/auth`,
-                },
-            },
         plugins: [
                 new CopyPlugin({
                   patterns: [